@@ -19,4 +19,5 @@ urlpatterns = [
     path("", include("notifications.urls")),
     path("attendance/", include("attendance.urls")),
     path("finance/", include("finance.urls")),
+    path("documents/", include("documents.urls")),
 ]
\ No newline at end of file
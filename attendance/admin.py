@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Attendance, AttendanceEntry
+from .models import AbsenceStreakAlert, Attendance, AttendanceBitmap, AttendanceEntry, AttendanceSyncLog, AttendanceTally, DailyAttendanceStat, with_summary
 
 class AttendanceEntryInline(admin.TabularInline):
     model = AttendanceEntry
@@ -13,8 +13,64 @@ class AttendanceAdmin(admin.ModelAdmin):
     ordering = ("-date",)
     inlines = [AttendanceEntryInline]
 
+    def get_queryset(self, request):
+        return with_summary(super().get_queryset(request))
+
+    @admin.display(description="Total students", ordering="entry_count")
+    def total_students(self, obj):
+        return obj.entry_count
+
 @admin.register(AttendanceEntry)
 class AttendanceEntryAdmin(admin.ModelAdmin):
     list_display = ("attendance", "student", "status")
     list_filter = ("status", "attendance__date")
-    search_fields = ("student__user__first_name", "attendance__date")
\ No newline at end of file
+    search_fields = ("student__user__first_name", "attendance__date")
+
+@admin.register(AttendanceTally)
+class AttendanceTallyAdmin(admin.ModelAdmin):
+    list_display = ("student", "present_days", "absent_days", "late_days", "excused_days", "updated_at")
+    search_fields = ("student__reg_no", "student__user__first_name")
+    readonly_fields = ("student", "present_days", "absent_days", "late_days", "excused_days", "updated_at")
+
+    def has_add_permission(self, request):
+        return False
+
+@admin.register(DailyAttendanceStat)
+class DailyAttendanceStatAdmin(admin.ModelAdmin):
+    list_display = ("date", "dimension", "course", "cohort", "present", "absent", "late", "excused", "total")
+    list_filter = ("dimension", "course")
+    date_hierarchy = "date"
+
+    def has_add_permission(self, request):
+        return False
+
+@admin.register(AttendanceSyncLog)
+class AttendanceSyncLogAdmin(admin.ModelAdmin):
+    list_display = ("client_id", "device_id", "date", "result", "synced_by", "recorded_at", "received_at")
+    list_filter = ("result", "date")
+    search_fields = ("client_id", "device_id")
+    readonly_fields = ("client_id", "device_id", "date", "attendance", "recorded_at", "received_at",
+                       "synced_by", "result", "detail")
+
+    def has_add_permission(self, request):
+        return False
+
+@admin.register(AbsenceStreakAlert)
+class AbsenceStreakAlertAdmin(admin.ModelAdmin):
+    list_display = ("student", "started_on", "last_absent_on", "days", "created_at")
+    list_filter = ("started_on",)
+    search_fields = ("student__reg_no", "student__user__first_name")
+    raw_id_fields = ("student",)
+
+    def has_add_permission(self, request):
+        return False
+
+@admin.register(AttendanceBitmap)
+class AttendanceBitmapAdmin(admin.ModelAdmin):
+    list_display = ("student", "year", "updated_at")
+    list_filter = ("year",)
+    search_fields = ("student__reg_no", "student__user__first_name")
+    readonly_fields = ("student", "year", "statuses", "marked", "updated_at")
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,159 @@
+"""
+Attendance analytics.
+
+DailyAttendanceStat holds one row per day and dimension: the whole
+institute, each course (students counted through their active
+enrollments) and each admission-month cohort. Sheet saves call
+refresh_daily_stats() with the dates they touched. Each of those days is
+re-aggregated from its entries with one conditional-aggregate query per
+dimension. Reports then read about one row per day in the range instead
+of scanning every entry.
+
+A refresh locks the days' sheets first, so two saves touching the same
+day take turns and the second re-aggregates with the first one's entries.
+The rows are unique per day and dimension value.
+
+Course rows reflect enrollments as they were when the day was last
+refreshed; rebuild_daily_stats() recomputes history after bulk changes.
+"""
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q, Sum
+from django.db.models.functions import ExtractIsoWeekDay, TruncMonth
+from courses.models import Enrollment
+from .models import Attendance, AttendanceEntry, DailyAttendanceStat
+from datetime import timedelta
+
+COUNT_FIELDS = ("present", "absent", "late", "excused", "total")
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def _status_counts():
+    return {
+        "present": Count("id", filter=Q(status=AttendanceEntry.Status.PRESENT)),
+        "absent": Count("id", filter=Q(status=AttendanceEntry.Status.ABSENT)),
+        "late": Count("id", filter=Q(status=AttendanceEntry.Status.LATE)),
+        "excused": Count("id", filter=Q(status=AttendanceEntry.Status.EXCUSED)),
+        "total": Count("id"),
+    }
+
+
+def _stat_rows(entries):
+    Dimension = DailyAttendanceStat.Dimension
+    rows = [
+        DailyAttendanceStat(date=row.pop("attendance__date"), dimension=Dimension.ALL, **row)
+        for row in entries.values("attendance__date").annotate(**_status_counts()).order_by()
+    ]
+    rows += [
+        DailyAttendanceStat(
+            date=row.pop("attendance__date"), dimension=Dimension.COURSE,
+            course_id=row.pop("student__enrollments__course_id"), **row,
+        )
+        for row in entries.filter(student__enrollments__status=Enrollment.Status.ACTIVE)
+        .values("attendance__date", "student__enrollments__course_id")
+        .annotate(**_status_counts()).order_by()
+    ]
+    rows += [
+        DailyAttendanceStat(date=row.pop("attendance__date"), dimension=Dimension.COHORT, **row)
+        for row in entries.annotate(cohort=TruncMonth("student__admission_date"))
+        .values("attendance__date", "cohort")
+        .annotate(**_status_counts()).order_by()
+    ]
+    return rows
+
+
+def refresh_daily_stats(dates):
+    dates = {d for d in dates if d}
+    if not dates:
+        return
+    with transaction.atomic():
+        list(Attendance.objects.select_for_update().filter(date__in=dates).order_by("date").values_list("id"))
+        DailyAttendanceStat.objects.filter(date__in=dates).delete()
+        DailyAttendanceStat.objects.bulk_create(
+            _stat_rows(AttendanceEntry.objects.filter(attendance__date__in=dates)), batch_size=1000
+        )
+
+
+def rebuild_daily_stats(start=None, end=None, step_days=31):
+    """
+    Recompute the statistics for [start, end] (default: all history), one
+    window of `step_days` at a time. Returns the number of rows written.
+    """
+    span = Attendance.objects.aggregate(first=Min("date"), last=Max("date"))
+    start = start or span["first"]
+    end = end or span["last"]
+    if not start or not end:
+        return 0
+
+    written = 0
+    window_start = start
+    while window_start <= end:
+        window_end = min(window_start + timedelta(days=step_days - 1), end)
+        with transaction.atomic():
+            list(
+                Attendance.objects.select_for_update()
+                .filter(date__range=(window_start, window_end)).order_by("date").values_list("id")
+            )
+            DailyAttendanceStat.objects.filter(date__range=(window_start, window_end)).delete()
+            rows = DailyAttendanceStat.objects.bulk_create(
+                _stat_rows(AttendanceEntry.objects.filter(attendance__date__range=(window_start, window_end))),
+                batch_size=1000,
+            )
+        written += len(rows)
+        window_start = window_end + timedelta(days=1)
+    return written
+
+
+def _sums():
+    return {field: Sum(field) for field in COUNT_FIELDS}
+
+
+def _with_rate(row):
+    counts = {field: row.get(field) or 0 for field in COUNT_FIELDS}
+    # Late counts as attended, as on the dashboard
+    counts["rate"] = round((counts["present"] + counts["late"]) / counts["total"] * 100, 1) if counts["total"] else 0
+    return counts
+
+
+def attendance_report(start, end, course_id=None):
+    """
+    Status counts and attendance rate for [start, end], with a daily trend
+    and breakdowns by weekday, course and admission cohort. With `course_id`
+    everything is limited to that course's students (no cohort breakdown).
+    """
+    Dimension = DailyAttendanceStat.Dimension
+    in_range = DailyAttendanceStat.objects.filter(date__range=(start, end))
+    if course_id:
+        rows = in_range.filter(dimension=Dimension.COURSE, course_id=course_id)
+    else:
+        rows = in_range.filter(dimension=Dimension.ALL)
+
+    trend = [
+        {"date": row["date"], **_with_rate(row)}
+        for row in rows.order_by("date").values("date", *COUNT_FIELDS)
+    ]
+    by_weekday = [
+        {"weekday": WEEKDAYS[row["weekday"] - 1], "days": row["days"], **_with_rate(row)}
+        for row in rows.annotate(weekday=ExtractIsoWeekDay("date"))
+        .values("weekday").annotate(days=Count("id"), **_sums()).order_by("weekday")
+    ]
+    by_course = [
+        {"course_id": row["course_id"], "course__title": row["course__title"], **_with_rate(row)}
+        for row in in_range.filter(dimension=Dimension.COURSE, **({"course_id": course_id} if course_id else {}))
+        .values("course_id", "course__title").annotate(**_sums()).order_by("course__title")
+    ]
+    by_cohort = [] if course_id else [
+        {"cohort": row["cohort"].strftime("%Y-%m") if row["cohort"] else None, **_with_rate(row)}
+        for row in in_range.filter(dimension=Dimension.COHORT)
+        .values("cohort").annotate(**_sums()).order_by("cohort")
+    ]
+
+    return {
+        "start": start,
+        "end": end,
+        "course": course_id,
+        "stats": _with_rate(rows.aggregate(**_sums())),
+        "trend": trend,
+        "by_weekday": by_weekday,
+        "by_course": by_course,
+        "by_cohort": by_cohort,
+    }
@@ -0,0 +1,308 @@
+"""
+Packed attendance bitmaps.
+
+An optional compact copy of the entries table (settings.ATTENDANCE_BITMAPS):
+one AttendanceBitmap per student and calendar year, holding two bits of
+status per day of the year (P=0, A=1, L=2, E=3) and one "marked" bit per
+day. A year of one student is 138 bytes however many days were marked.
+
+Sheet saves patch the day's bits of the sheet's students with bitwise
+operations on the stored bytes (apply_day()), holding row locks on those
+bitmaps so concurrent saves of other days do not overwrite each other's
+bits; single-entry edits and deletes recompute the affected student-years
+from the entries (refresh_bitmaps()). Readers unpack whole sets of
+bitmaps into NumPy matrices: absence streaks and the per-year calendar
+with its rate are computed from those, without touching the entries.
+`rebuild_attendance_bitmaps --check` compares the bitmaps with the entries.
+"""
+from django.conf import settings
+from django.db import transaction
+from students.models import Student
+from .models import AttendanceBitmap, AttendanceEntry
+import calendar
+import numpy as np
+
+DAYS = 366
+STATUS_BYTES = (DAYS * 2 + 7) // 8
+MARKED_BYTES = (DAYS + 7) // 8
+STATUSES = np.array(AttendanceEntry.Status.values)
+CODES = {status: code for code, status in enumerate(STATUSES.tolist())}
+PRESENT = CODES[AttendanceEntry.Status.PRESENT]
+ABSENT = CODES[AttendanceEntry.Status.ABSENT]
+LATE = CODES[AttendanceEntry.Status.LATE]
+UNMARKED = "."
+
+
+def enabled():
+    return settings.ATTENDANCE_BITMAPS
+
+
+def day_of_year(day):
+    return day.timetuple().tm_yday - 1
+
+
+def pack(codes, marks):
+    """(rows x 366 status codes, rows x 366 marked flags) -> (rows x 92, rows x 46) uint8."""
+    codes = codes.astype(np.uint8)
+    bits = np.stack([codes >> 1, codes & 1], axis=-1).reshape(len(codes), DAYS * 2)
+    return np.packbits(bits, axis=1), np.packbits(marks.astype(bool), axis=1)
+
+
+def unpack(statuses, marked):
+    """Inverse of pack()."""
+    bits = np.unpackbits(statuses, axis=1)[:, :DAYS * 2].reshape(len(statuses), DAYS, 2)
+    return bits[..., 0] << 1 | bits[..., 1], np.unpackbits(marked, axis=1)[:, :DAYS].astype(bool)
+
+
+def _matrix(chunks, width):
+    return np.frombuffer(b"".join(chunks), np.uint8).reshape(-1, width).copy()
+
+
+def _stored(student_ids=None, year=None, active_only=False, lock=False):
+    """
+    (keys, statuses, marked) of stored bitmaps; keys are (student_id, year)
+    rows sorted by both. With `lock` the rows stay locked until commit.
+    """
+    bitmaps = AttendanceBitmap.objects.select_for_update() if lock else AttendanceBitmap.objects.all()
+    if student_ids is not None:
+        bitmaps = bitmaps.filter(student_id__in=student_ids)
+    if year is not None:
+        bitmaps = bitmaps.filter(year=year)
+    if active_only:
+        bitmaps = bitmaps.filter(student__active=True)
+    rows = list(bitmaps.order_by("student_id", "year").values_list("student_id", "year", "statuses", "marked"))
+    if not rows:
+        return (np.empty((0, 2), np.int64), np.empty((0, STATUS_BYTES), np.uint8),
+                np.empty((0, MARKED_BYTES), np.uint8))
+    student_id, years, statuses, marked = zip(*rows)
+    keys = np.column_stack([np.array(student_id, np.int64), np.array(years, np.int64)])
+    return keys, _matrix(statuses, STATUS_BYTES), _matrix(marked, MARKED_BYTES)
+
+
+def _from_entries(entries):
+    """(keys, codes, marks) built from an entries queryset, keyed like _stored()."""
+    rows = list(entries.values_list("student_id", "attendance__date", "status").order_by())
+    if not rows:
+        return np.empty((0, 2), np.int64), np.empty((0, DAYS), np.uint8), np.empty((0, DAYS), bool)
+    student_id, days, status = zip(*rows)
+    days = np.array(days, dtype="datetime64[D]")
+    years = days.astype("datetime64[Y]")
+    keys = np.column_stack([np.array(student_id, np.int64), years.astype(np.int64) + 1970])
+    keys, row = np.unique(keys, axis=0, return_inverse=True)
+    row = row.ravel()
+    index = (days - years.astype("datetime64[D]")).astype(np.int64)
+    letters, letter_row = np.unique(np.array(status), return_inverse=True)
+    codes = np.zeros((len(keys), DAYS), np.uint8)
+    marks = np.zeros((len(keys), DAYS), bool)
+    codes[row, index] = np.array([CODES[s] for s in letters.tolist()], np.uint8)[letter_row.ravel()]
+    marks[row, index] = True
+    return keys, codes, marks
+
+
+def _upsert(keys, statuses, marked, batch_size=1000):
+    AttendanceBitmap.objects.bulk_create(
+        [
+            AttendanceBitmap(student_id=int(student_id), year=int(year), statuses=s.tobytes(), marked=m.tobytes())
+            for (student_id, year), s, m in zip(keys, statuses, marked)
+        ],
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=["student", "year"],
+        update_fields=["statuses", "marked", "updated_at"],
+    )
+
+
+def _create_missing(keys):
+    """Insert empty bitmaps for the (student_id, year) keys that have none."""
+    AttendanceBitmap.objects.bulk_create(
+        [
+            AttendanceBitmap(student_id=student_id, year=year, statuses=bytes(STATUS_BYTES), marked=bytes(MARKED_BYTES))
+            for student_id, year in keys
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+def apply_day(day, statuses):
+    """
+    Set `day` for the students in `statuses` ({student_id: status letter, or
+    None to clear the day}), patching their bitmaps for that year in place.
+    Bitmaps left with no marked day are deleted.
+    """
+    if not enabled() or not statuses:
+        return
+    with transaction.atomic():
+        # Create the missing bitmaps of students being marked, then lock them all
+        # while the day is patched in, so the patch starts from committed bytes
+        _create_missing((student_id, day.year) for student_id, status in statuses.items() if status is not None)
+        keys, stored_statuses, stored_marked = _stored(list(statuses), day.year, lock=True)
+        keys, status_bytes, marked_bytes = _patch_day(day, statuses, keys, stored_statuses, stored_marked)
+        # A year with no marked day left goes, as in refresh_bitmaps()
+        emptied = ~marked_bytes.any(axis=1)
+        _upsert(keys[~emptied], status_bytes[~emptied], marked_bytes[~emptied])
+        if emptied.any():
+            AttendanceBitmap.objects.filter(student_id__in=keys[emptied, 0].tolist(), year=day.year).delete()
+
+
+def _patch_day(day, statuses, keys, stored_statuses, stored_marked):
+    """(keys, statuses, marked) of the stored bitmaps with `day` set from `statuses`."""
+    status_bytes, marked_bytes = stored_statuses.copy(), stored_marked.copy()
+    letters = [statuses[student_id] for student_id in keys[:, 0].tolist()]
+    codes = np.array([CODES.get(letter, 0) for letter in letters], np.uint8)
+    is_marked = np.array([letter is not None for letter in letters])
+
+    index = day_of_year(day)
+    shift = 6 - 2 * (index % 4)
+    column = status_bytes[:, index // 4]
+    status_bytes[:, index // 4] = (column & np.uint8(~(3 << shift) & 0xFF)) | (codes << shift)
+    bit = np.uint8(0x80 >> (index % 8))
+    column = marked_bytes[:, index // 8]
+    marked_bytes[:, index // 8] = np.where(is_marked, column | bit, column & ~bit)
+    return keys, status_bytes, marked_bytes
+
+
+def refresh_bitmaps(student_ids, years=None):
+    """Recompute the bitmaps of the given students (in `years`, or all years) from the entries."""
+    if not enabled():
+        return
+    student_ids = {s for s in student_ids if s}
+    if not student_ids:
+        return
+    # Students deleted in the same transaction take their bitmaps with them
+    student_ids = list(Student.objects.filter(id__in=student_ids).values_list("id", flat=True))
+    entries = AttendanceEntry.objects.filter(student_id__in=student_ids)
+    bitmaps = AttendanceBitmap.objects.filter(student_id__in=student_ids)
+    if years is not None:
+        entries = entries.filter(attendance__date__year__in=years)
+        bitmaps = bitmaps.filter(year__in=years)
+
+    with transaction.atomic():
+        # Lock the student-years first (creating missing ones), as apply_day() does, so a
+        # concurrent patch of another day commits before they are recomputed, not after
+        _create_missing(entries.values_list("student_id", "attendance__date__year").order_by().distinct())
+        list(bitmaps.select_for_update().order_by("student_id", "year").values_list("pk"))
+        keys, codes, marks = _from_entries(entries)
+        emptied = set(bitmaps.values_list("student_id", "year")) - set(map(tuple, keys.tolist()))
+        _upsert(keys, *pack(codes, marks))
+        for student_id, year in emptied:
+            AttendanceBitmap.objects.filter(student_id=student_id, year=year).delete()
+
+
+def rebuild_bitmaps():
+    """Rebuild every bitmap from the entries. Returns the number of bitmaps written."""
+    keys, codes, marks = _from_entries(AttendanceEntry.objects.all())
+    with transaction.atomic():
+        AttendanceBitmap.objects.all().delete()
+        _upsert(keys, *pack(codes, marks))
+    return len(keys)
+
+
+def find_mismatches():
+    """Student-years whose bitmap disagrees with the entries, as (student_id, year, problem)."""
+    keys, codes, marks = _from_entries(AttendanceEntry.objects.all())
+    stored_keys, stored_statuses, stored_marked = _stored()
+    stored = {
+        (student_id, year): i for i, (student_id, year) in enumerate(stored_keys.tolist())
+    }
+
+    mismatches = []
+    for i, key in enumerate(map(tuple, keys.tolist())):
+        j = stored.pop(key, None)
+        if j is None:
+            mismatches.append((*key, "missing"))
+        else:
+            stored_codes, stored_marks = unpack(stored_statuses[j:j + 1], stored_marked[j:j + 1])
+            differ = (marks[i] != stored_marks[0]) | (marks[i] & (codes[i] != stored_codes[0]))
+            if differ.any():
+                mismatches.append((*key, f"{int(differ.sum())} day(s) differ"))
+    mismatches.extend((*key, "orphan") for key in stored)
+    return mismatches
+
+
+def current_streaks(student_ids=None, threshold=1):
+    """
+    The bitmap counterpart of attendance.streaks.current_streaks(): the run
+    of absences after each active student's last mark of another status,
+    following it back across years, as {student_id: (days, started_on, last_absent_on)}.
+    """
+    keys, statuses, marked = _stored(student_ids, active_only=True)
+    if not len(keys):
+        return {}
+    # Newest year first within each student
+    order = np.lexsort((-keys[:, 1], keys[:, 0]))
+    keys, statuses, marked = keys[order], statuses[order], marked[order]
+    codes, marks = unpack(statuses, marked)
+
+    day = np.arange(DAYS)
+    other = marks & (codes != ABSENT)
+    broken = other.any(axis=1)
+    last_other = np.where(broken, np.where(other, day, -1).max(axis=1), -1)
+    in_run = marks & (codes == ABSENT) & (day > last_other[:, None])
+    run_days = in_run.sum(axis=1)
+
+    # A year counts while no newer year of the same student broke the run
+    students, first, group = np.unique(keys[:, 0], return_index=True, return_inverse=True)
+    group = group.ravel()
+    breaks_before = np.cumsum(broken) - broken
+    counted = (breaks_before - breaks_before[first][group] == 0) & (run_days > 0)
+
+    year_start = (keys[:, 1] - 1970).astype("datetime64[Y]").astype("datetime64[D]")
+    started = year_start + np.where(counted, in_run.argmax(axis=1), 0)
+    ended = year_start + np.where(counted, DAYS - 1 - in_run[:, ::-1].argmax(axis=1), 0)
+
+    days = np.bincount(group, weights=run_days * counted, minlength=len(students)).astype(int)
+    started_on = np.full(len(students), np.datetime64("9999-12-31"), "datetime64[D]")
+    last_on = np.full(len(students), np.datetime64("0001-01-01"), "datetime64[D]")
+    np.minimum.at(started_on, group[counted], started[counted])
+    np.maximum.at(last_on, group[counted], ended[counted])
+
+    hit = days >= max(threshold, 1)
+    return {
+        int(student_id): (int(n), started_on[i].item(), last_on[i].item())
+        for i, (student_id, n) in enumerate(zip(students, days)) if hit[i]
+    }
+
+
+def year_view(student_id, year):
+    """
+    Counts, attendance rate, absence streaks and a month-by-month calendar
+    (one letter per day, "." where unmarked) of one student's year. Read
+    from the bitmap when bitmaps are enabled, otherwise from the entries.
+    """
+    if enabled():
+        _, statuses, marked = _stored([student_id], year)
+        codes, marks = unpack(statuses, marked)
+    else:
+        _, codes, marks = _from_entries(
+            AttendanceEntry.objects.filter(student_id=student_id, attendance__date__year=year)
+        )
+    codes = codes[0] if len(codes) else np.zeros(DAYS, np.uint8)
+    marks = marks[0] if len(marks) else np.zeros(DAYS, bool)
+
+    counts = np.bincount(codes[marks], minlength=len(STATUSES))
+    total = int(marks.sum())
+    absent = np.concatenate([[0], (codes[marks] == ABSENT).astype(np.int8), [0]])
+    edges = np.diff(absent)
+    runs = np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)
+
+    letters = np.where(marks, STATUSES[codes], UNMARKED)
+    months, start = [], 0
+    for month in range(1, 13):
+        length = calendar.monthrange(year, month)[1]
+        months.append({"month": month, "days": "".join(letters[start:start + length])})
+        start += length
+
+    return {
+        "student": student_id,
+        "year": year,
+        "present": int(counts[PRESENT]),
+        "absent": int(counts[ABSENT]),
+        "late": int(counts[LATE]),
+        "excused": int(counts[CODES[AttendanceEntry.Status.EXCUSED]]),
+        "total": total,
+        "rate": round(float(counts[PRESENT] + counts[LATE]) / total * 100, 1) if total else 0,
+        "current_absence_streak": int(runs[-1]) if len(runs) and absent[-2] else 0,
+        "longest_absence_streak": int(runs.max()) if len(runs) else 0,
+        "months": months,
+    }
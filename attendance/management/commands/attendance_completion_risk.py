@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from attendance.risk import DEFAULT_WINDOW, build_projection
+import time
+
+
+class Command(BaseCommand):
+    help = "List active enrollments at risk of missing their course's required attendance, ranked per course."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--course", type=int, help="Only this course id.")
+        parser.add_argument("--window", type=int, default=DEFAULT_WINDOW,
+                            help="Class days the recent attendance rate is measured over.")
+        parser.add_argument("--min-risk", type=float, default=0.01,
+                            help="Leave out enrollments below this risk score (0-1).")
+
+    def handle(self, *args, **options):
+        if options["window"] < 1:
+            raise CommandError("--window must be at least 1.")
+
+        started = time.perf_counter()
+        projection = build_projection(timezone.localdate(), options["window"], options["course"])
+        elapsed = time.perf_counter() - started
+
+        listed = 0
+        for course in projection["courses"]:
+            rows = [e for e in course["enrollments"] if e["risk"] >= options["min_risk"]]
+            if not rows:
+                continue
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{course['course__title']} ({len(rows)})"))
+            for e in rows:
+                projected = e["projected_completion"] or "never"
+                self.stdout.write(
+                    f"  {e['risk']:.2f}  {e['reg_no']:<12} {e['student_name']:<30} "
+                    f"{e['present_days']:>3}/{e['required_days']:<3} {e['recent_rate']:>5.1f}%  "
+                    f"projected {projected}, term ends {e['term_end']}"
+                )
+            listed += len(rows)
+
+        total = sum(len(c["enrollments"]) for c in projection["courses"])
+        self.stdout.write(self.style.SUCCESS(
+            f"{listed} of {total} active enrollment(s) at risk "
+            f"({projection['class_days_per_week']} class days/week) in {elapsed:.2f}s."
+        ))
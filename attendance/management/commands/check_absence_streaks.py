@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from attendance.streaks import alert_absence_streaks
+import time
+
+
+class Command(BaseCommand):
+    help = (
+        "Find active students absent for consecutive class days and alert each streak once. "
+        "Sheet saves already do this for the students they mark; run it after imports or threshold changes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threshold", type=int, default=settings.ABSENCE_STREAK_THRESHOLD,
+                            help="Consecutive absent days that raise an alert.")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Report what would be alerted without writing anything.")
+
+    def handle(self, *args, **options):
+        if options["threshold"] < 1:
+            raise CommandError("--threshold must be at least 1.")
+
+        started = time.perf_counter()
+        streaks, alerts = alert_absence_streaks(threshold=options["threshold"], dry_run=options["dry_run"])
+        verb = "would be alerted" if options["dry_run"] else "alerted"
+        self.stdout.write(self.style.SUCCESS(
+            f"{streaks} student(s) absent {options['threshold']}+ class days in a row, "
+            f"{len(alerts)} new streak(s) {verb} ({time.perf_counter() - started:.2f}s)."
+        ))
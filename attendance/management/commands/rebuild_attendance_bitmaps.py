@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from attendance.bitmaps import find_mismatches, rebuild_bitmaps
+import time
+
+
+class Command(BaseCommand):
+    help = "Verify the packed attendance bitmaps against the entries table and rebuild them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--check", action="store_true",
+                            help="Only report student-years whose bitmap disagrees with the entries; change nothing.")
+
+    def handle(self, *args, **options):
+        if not settings.ATTENDANCE_BITMAPS:
+            self.stdout.write(self.style.WARNING(
+                "ATTENDANCE_BITMAPS is off: sheet saves do not maintain the bitmaps."
+            ))
+
+        started = time.perf_counter()
+        mismatches = find_mismatches()
+        for student_id, year, problem in mismatches:
+            self.stdout.write(f"student {student_id}, {year}: {problem}")
+
+        if options["check"]:
+            style = self.style.SUCCESS if not mismatches else self.style.WARNING
+            self.stdout.write(style(
+                f"{len(mismatches)} bitmap(s) out of step with the entries ({time.perf_counter() - started:.2f}s)."
+            ))
+            return
+
+        written = rebuild_bitmaps()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {written} bitmap(s); {len(mismatches)} were out of step ({time.perf_counter() - started:.2f}s)."
+        ))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+from attendance.analytics import rebuild_daily_stats
+from datetime import date
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily attendance statistics (all, per course, per cohort) from the entries."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", help="First day to rebuild (YYYY-MM-DD). Defaults to the earliest sheet.")
+        parser.add_argument("--end", help="Last day to rebuild (YYYY-MM-DD). Defaults to the latest sheet.")
+
+    def handle(self, *args, **options):
+        try:
+            start = date.fromisoformat(options["start"]) if options["start"] else None
+            end = date.fromisoformat(options["end"]) if options["end"] else None
+        except ValueError:
+            raise CommandError("Dates must be YYYY-MM-DD.")
+        if start and end and start > end:
+            raise CommandError("--start must not be after --end.")
+
+        written = rebuild_daily_stats(start, end)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} daily statistics row(s)."))
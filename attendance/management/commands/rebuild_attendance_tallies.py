@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from attendance.tallies import find_mismatches, rebuild_tallies
+
+
+class Command(BaseCommand):
+    help = "Reconcile the per-student attendance tallies against the entries table and rebuild them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--check", action="store_true",
+                            help="Only report tallies that disagree with the entries; change nothing.")
+
+    def handle(self, *args, **options):
+        mismatches = find_mismatches()
+        for expected, stored in mismatches:
+            if expected is None:
+                self.stdout.write(f"orphan tally for student {stored.student_id}")
+            elif stored is None:
+                self.stdout.write(f"missing tally for student {expected.student_id}")
+            else:
+                self.stdout.write(
+                    f"student {expected.student_id}: present {stored.present_days} -> {expected.present_days}, "
+                    f"absent {stored.absent_days} -> {expected.absent_days}, "
+                    f"late {stored.late_days} -> {expected.late_days}, "
+                    f"excused {stored.excused_days} -> {expected.excused_days}"
+                )
+
+        if options["check"]:
+            style = self.style.SUCCESS if not mismatches else self.style.WARNING
+            self.stdout.write(style(f"{len(mismatches)} tally row(s) out of step."))
+            return
+
+        written = rebuild_tallies()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {written} tally row(s); {len(mismatches)} were out of step."
+        ))
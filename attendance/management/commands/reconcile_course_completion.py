@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from attendance.services import evaluate_completion, notify_completions
+from attendance.tallies import rebuild_tallies
+import time
+
+
+class Command(BaseCommand):
+    help = (
+        "Complete every active enrollment whose present days reached the course requirement. "
+        "Meant to run nightly; catches edits made outside the attendance API."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true",
+                            help="List the enrollments that would be completed without writing anything.")
+        parser.add_argument("--no-notify", action="store_true",
+                            help="Complete enrollments without notifying the students.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        with transaction.atomic():
+            # Completion reads the tallies; bring them in line with the entries first
+            # (a dry run rolls the rebuild back with everything else)
+            rebuild_tallies()
+            completed = evaluate_completion(dry_run=options["dry_run"])
+            if options["dry_run"]:
+                transaction.set_rollback(True)
+            elif not options["no_notify"]:
+                notify_completions(completed)
+
+        for enrollment in completed:
+            self.stdout.write(f"  {enrollment.student.reg_no}: {enrollment.course.title}")
+        verb = "would be completed" if options["dry_run"] else "completed"
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(completed)} enrollment(s) {verb} ({time.perf_counter() - started:.2f}s)."
+        ))
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def build_tallies(apps, schema_editor):
+    AttendanceEntry = apps.get_model("attendance", "AttendanceEntry")
+    AttendanceTally = apps.get_model("attendance", "AttendanceTally")
+
+    statuses = {"P": "present_days", "A": "absent_days", "L": "late_days", "E": "excused_days"}
+    AttendanceTally.objects.bulk_create(
+        [
+            AttendanceTally(student_id=row.pop("student_id"), **row)
+            for row in AttendanceEntry.objects.values("student_id").annotate(**{
+                field: Count("id", filter=Q(status=status)) for status, field in statuses.items()
+            }).order_by()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0001_initial'),
+        ('students', '0003_student_photo_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceTally',
+            fields=[
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='attendance_tally', serialize=False, to='students.student')),
+                ('present_days', models.PositiveIntegerField(default=0)),
+                ('absent_days', models.PositiveIntegerField(default=0)),
+                ('late_days', models.PositiveIntegerField(default=0)),
+                ('excused_days', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Attendance Tally',
+                'verbose_name_plural': 'Attendance Tallies',
+            },
+        ),
+        migrations.RunPython(build_tallies, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncMonth
+
+
+def build_daily_stats(apps, schema_editor):
+    AttendanceEntry = apps.get_model("attendance", "AttendanceEntry")
+    DailyAttendanceStat = apps.get_model("attendance", "DailyAttendanceStat")
+
+    counts = {
+        "present": Count("id", filter=Q(status="P")),
+        "absent": Count("id", filter=Q(status="A")),
+        "late": Count("id", filter=Q(status="L")),
+        "excused": Count("id", filter=Q(status="E")),
+        "total": Count("id"),
+    }
+    entries = AttendanceEntry.objects.all()
+    rows = [
+        DailyAttendanceStat(date=row.pop("attendance__date"), dimension="all", **row)
+        for row in entries.values("attendance__date").annotate(**counts).order_by()
+    ]
+    rows += [
+        DailyAttendanceStat(date=row.pop("attendance__date"), dimension="course",
+                            course_id=row.pop("student__enrollments__course_id"), **row)
+        for row in entries.filter(student__enrollments__status="active")
+        .values("attendance__date", "student__enrollments__course_id").annotate(**counts).order_by()
+    ]
+    rows += [
+        DailyAttendanceStat(date=row.pop("attendance__date"), dimension="cohort", **row)
+        for row in entries.annotate(cohort=TruncMonth("student__admission_date"))
+        .values("attendance__date", "cohort").annotate(**counts).order_by()
+    ]
+    DailyAttendanceStat.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0002_attendance_tally'),
+        ('courses', '0002_delete_coursematerial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyAttendanceStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('dimension', models.CharField(choices=[('all', 'All students'), ('course', 'Course'), ('cohort', 'Admission cohort')], max_length=10)),
+                ('cohort', models.DateField(blank=True, help_text='First day of the admission month', null=True)),
+                ('present', models.PositiveIntegerField(default=0)),
+                ('absent', models.PositiveIntegerField(default=0)),
+                ('late', models.PositiveIntegerField(default=0)),
+                ('excused', models.PositiveIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('course', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='courses.course')),
+            ],
+            options={
+                'verbose_name': 'Daily Attendance Stat',
+                'verbose_name_plural': 'Daily Attendance Stats',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['dimension', 'date'], name='attendance__dimensi_930e50_idx')],
+            },
+        ),
+        migrations.RunPython(build_daily_stats, migrations.RunPython.noop),
+    ]
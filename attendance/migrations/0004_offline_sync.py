@@ -0,0 +1,42 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0003_daily_attendance_stat'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendanceentry',
+            name='recorded_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='AttendanceSyncLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('client_id', models.CharField(max_length=64, unique=True)),
+                ('device_id', models.CharField(blank=True, max_length=64)),
+                ('date', models.DateField()),
+                ('recorded_at', models.DateTimeField(help_text='Device time the sheet was recorded')),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('result', models.CharField(choices=[('applied', 'Applied'), ('unchanged', 'Unchanged'), ('conflict', 'Rejected (conflict)')], max_length=10)),
+                ('detail', models.JSONField(blank=True, default=dict)),
+                ('attendance', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sync_logs', to='attendance.attendance')),
+                ('synced_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Attendance Sync Log',
+                'verbose_name_plural': 'Attendance Sync Logs',
+                'ordering': ['-received_at'],
+                'indexes': [models.Index(fields=['date'], name='attendance__date_c90dfa_idx')],
+            },
+        ),
+    ]
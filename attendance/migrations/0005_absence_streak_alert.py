@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0004_offline_sync'),
+        ('students', '0003_student_photo_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AbsenceStreakAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_on', models.DateField(help_text='First absent day of the streak')),
+                ('last_absent_on', models.DateField()),
+                ('days', models.PositiveIntegerField(help_text='Streak length when the alert was sent')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='absence_alerts', to='students.student')),
+            ],
+            options={
+                'verbose_name': 'Absence Streak Alert',
+                'verbose_name_plural': 'Absence Streak Alerts',
+                'ordering': ['-created_at'],
+                'constraints': [models.UniqueConstraint(fields=('student', 'started_on'), name='unique_absence_alert_per_streak')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0005_absence_streak_alert'),
+        ('students', '0003_student_photo_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceBitmap',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('statuses', models.BinaryField(help_text='2 bits per day of the year')),
+                ('marked', models.BinaryField(help_text='1 bit per day of the year')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_bitmaps', to='students.student')),
+            ],
+            options={
+                'verbose_name': 'Attendance Bitmap',
+                'verbose_name_plural': 'Attendance Bitmaps',
+                'constraints': [models.UniqueConstraint(fields=('student', 'year'), name='unique_attendance_bitmap_per_year')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:42
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def drop_duplicate_stats(apps, schema_editor):
+    """Keep the newest row of each day and dimension value; rebuild_attendance_stats fixes the counts."""
+    DailyAttendanceStat = apps.get_model("attendance", "DailyAttendanceStat")
+    keys = ("date", "dimension", "course", "cohort")
+    keep = DailyAttendanceStat.objects.values(*keys).annotate(last=Max("id")).order_by().values_list("last", flat=True)
+    DailyAttendanceStat.objects.exclude(id__in=list(keep)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0006_attendance_bitmap'),
+        ('courses', '0002_delete_coursematerial'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_stats, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='dailyattendancestat',
+            constraint=models.UniqueConstraint(condition=models.Q(('dimension', 'all')), fields=('date',), name='unique_daily_stat_all'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyattendancestat',
+            constraint=models.UniqueConstraint(condition=models.Q(('dimension', 'course')), fields=('date', 'course'), name='unique_daily_stat_course'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyattendancestat',
+            constraint=models.UniqueConstraint(condition=models.Q(('dimension', 'cohort')), fields=('date', 'cohort'), name='unique_daily_stat_cohort'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Count, Q
 from django.conf import settings
 from students.models import Student
 
@@ -22,16 +23,24 @@ class Attendance(models.Model):
 
     @property
     def total_students(self):
+        if hasattr(self, "entry_count"):
+            return self.entry_count
         return self.entries.count()
 
     @property
     def summary(self):
         """Returns counts of Present, Absent, etc."""
+        if not hasattr(self, "entry_count"):
+            # Not loaded through with_summary(): one aggregate query for this day
+            counts = self.entries.aggregate(**summary_counts(prefix=""))
+        else:
+            counts = {name: getattr(self, name) for name in SUMMARY_FIELDS}
         return {
-            "present": self.entries.filter(status=AttendanceEntry.Status.PRESENT).count(),
-            "absent": self.entries.filter(status=AttendanceEntry.Status.ABSENT).count(),
-            "late": self.entries.filter(status=AttendanceEntry.Status.LATE).count(),
-            "excused": self.entries.filter(status=AttendanceEntry.Status.EXCUSED).count(),
+            "present": counts["present_count"],
+            "absent": counts["absent_count"],
+            "late": counts["late_count"],
+            "excused": counts["excused_count"],
+            "total": counts["entry_count"],
         }
 
 
@@ -50,6 +59,8 @@ class AttendanceEntry(models.Model):
         default=Status.PRESENT
     )
     remarks = models.CharField(max_length=255, blank=True)
+    # When the status was recorded: the device's clock for offline syncs, the server's otherwise
+    recorded_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         unique_together = ("attendance", "student")
@@ -57,4 +68,178 @@ class AttendanceEntry(models.Model):
         verbose_name_plural = "Attendance Entries"
 
     def __str__(self):
-        return f"{self.student} - {self.get_status_display()}"
\ No newline at end of file
+        return f"{self.student} - {self.get_status_display()}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored values so signal handlers can tell what moved on update
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+
+SUMMARY_FIELDS = ("present_count", "absent_count", "late_count", "excused_count", "entry_count")
+
+
+def summary_counts(prefix="entries__"):
+    """Conditional counts of a day's entries, for annotate() or aggregate()."""
+    key = f"{prefix}id"
+    return {
+        "present_count": Count(key, filter=Q(**{f"{prefix}status": AttendanceEntry.Status.PRESENT})),
+        "absent_count": Count(key, filter=Q(**{f"{prefix}status": AttendanceEntry.Status.ABSENT})),
+        "late_count": Count(key, filter=Q(**{f"{prefix}status": AttendanceEntry.Status.LATE})),
+        "excused_count": Count(key, filter=Q(**{f"{prefix}status": AttendanceEntry.Status.EXCUSED})),
+        "entry_count": Count(key),
+    }
+
+
+def with_summary(queryset):
+    """Annotate Attendance rows with their status counts, computed in the same query."""
+    if not queryset.query.order_by:
+        # Meta.ordering is not applied to GROUP BY queries
+        queryset = queryset.order_by(*Attendance._meta.ordering)
+    return queryset.annotate(**summary_counts())
+
+
+class AttendanceTally(models.Model):
+    """
+    Per-student counts of attendance entries by status, kept in step with
+    the entries by `attendance.tallies`. Completion checks and enrollment
+    progress read these columns instead of counting the entries table.
+    """
+    student = models.OneToOneField(Student, on_delete=models.CASCADE, primary_key=True, related_name="attendance_tally")
+    present_days = models.PositiveIntegerField(default=0)
+    absent_days = models.PositiveIntegerField(default=0)
+    late_days = models.PositiveIntegerField(default=0)
+    excused_days = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Attendance Tally"
+        verbose_name_plural = "Attendance Tallies"
+
+    def __str__(self):
+        return f"{self.student_id}: {self.present_days} present"
+
+
+class DailyAttendanceStat(models.Model):
+    """
+    Entries rolled up per day and dimension (see attendance.analytics):
+    the whole institute, each course (via active enrollments) and each
+    admission-month cohort.
+    """
+    class Dimension(models.TextChoices):
+        ALL = "all", "All students"
+        COURSE = "course", "Course"
+        COHORT = "cohort", "Admission cohort"
+
+    date = models.DateField()
+    dimension = models.CharField(max_length=10, choices=Dimension.choices)
+    course = models.ForeignKey("courses.Course", on_delete=models.CASCADE, null=True, blank=True, related_name="+")
+    cohort = models.DateField(null=True, blank=True, help_text="First day of the admission month")
+    present = models.PositiveIntegerField(default=0)
+    absent = models.PositiveIntegerField(default=0)
+    late = models.PositiveIntegerField(default=0)
+    excused = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-date"]
+        indexes = [
+            models.Index(fields=["dimension", "date"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["date"], condition=Q(dimension="all"), name="unique_daily_stat_all"),
+            models.UniqueConstraint(
+                fields=["date", "course"], condition=Q(dimension="course"), name="unique_daily_stat_course"
+            ),
+            models.UniqueConstraint(
+                fields=["date", "cohort"], condition=Q(dimension="cohort"), name="unique_daily_stat_cohort"
+            ),
+        ]
+        verbose_name = "Daily Attendance Stat"
+        verbose_name_plural = "Daily Attendance Stats"
+
+    def __str__(self):
+        return f"{self.date} {self.dimension}: {self.present}/{self.total}"
+
+
+class AttendanceSyncLog(models.Model):
+    """
+    One offline sheet received from a device (see attendance.sync). The
+    client-generated id makes retries idempotent: a sheet already logged is
+    answered from its stored result instead of being applied again.
+    """
+    class Result(models.TextChoices):
+        APPLIED = "applied", "Applied"
+        UNCHANGED = "unchanged", "Unchanged"
+        CONFLICT = "conflict", "Rejected (conflict)"
+
+    client_id = models.CharField(max_length=64, unique=True)
+    device_id = models.CharField(max_length=64, blank=True)
+    date = models.DateField()
+    attendance = models.ForeignKey(Attendance, on_delete=models.SET_NULL, null=True, blank=True, related_name="sync_logs")
+    recorded_at = models.DateTimeField(help_text="Device time the sheet was recorded")
+    received_at = models.DateTimeField(auto_now_add=True)
+    synced_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name="+")
+    result = models.CharField(max_length=10, choices=Result.choices)
+    detail = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        ordering = ["-received_at"]
+        indexes = [
+            models.Index(fields=["date"]),
+        ]
+        verbose_name = "Attendance Sync Log"
+        verbose_name_plural = "Attendance Sync Logs"
+
+    def __str__(self):
+        return f"{self.client_id} ({self.date}): {self.result}"
+
+
+class AbsenceStreakAlert(models.Model):
+    """
+    One alert per absence streak (see attendance.streaks). A streak is
+    identified by its first absent day, so it alerts once however long it
+    runs; a new streak after the student returns alerts again.
+    """
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name="absence_alerts")
+    started_on = models.DateField(help_text="First absent day of the streak")
+    last_absent_on = models.DateField()
+    days = models.PositiveIntegerField(help_text="Streak length when the alert was sent")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        constraints = [
+            models.UniqueConstraint(fields=["student", "started_on"], name="unique_absence_alert_per_streak"),
+        ]
+        verbose_name = "Absence Streak Alert"
+        verbose_name_plural = "Absence Streak Alerts"
+
+    def __str__(self):
+        return f"{self.student_id} absent {self.days} days from {self.started_on}"
+
+
+class AttendanceBitmap(models.Model):
+    """
+    A student's attendance for one calendar year, packed (see
+    attendance.bitmaps): two bits of status per day of the year and one
+    "marked" bit per day telling marked days from days without an entry.
+    Kept alongside the entries when settings.ATTENDANCE_BITMAPS is on.
+    """
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name="attendance_bitmaps")
+    year = models.PositiveSmallIntegerField()
+    statuses = models.BinaryField(help_text="2 bits per day of the year")
+    marked = models.BinaryField(help_text="1 bit per day of the year")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["student", "year"], name="unique_attendance_bitmap_per_year"),
+        ]
+        verbose_name = "Attendance Bitmap"
+        verbose_name_plural = "Attendance Bitmaps"
+
+    def __str__(self):
+        return f"{self.student_id} {self.year}"
@@ -0,0 +1,156 @@
+"""
+At-risk projection for course completion.
+
+For every active enrollment: how many present days are still needed
+(Course.required_attendance_days minus the student's tally), how often
+the student has been present lately, and therefore when the requirement
+will be met. That is compared with the end of the course term
+(enrolled_on + duration_weeks).
+
+The recent history comes from one query as a students x class-days NumPy
+matrix over the last `history_days` sheets. All rates and projections are
+computed on whole arrays; nothing loops per student. Results are cached
+until the next attendance, enrollment or course write commits, in any
+process (see invalidate_projection() and core.counters).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from core.counters import get_counter, increment_on_commit
+from courses.models import Enrollment
+from .models import Attendance, AttendanceEntry
+import numpy as np
+
+PROJECTION_KEY = "attendance:risk:{generation}:{today:%Y-%m-%d}:{window}:{course}"
+GENERATION_KEY = "attendance:generation"
+DEFAULT_WINDOW = 20
+HISTORY_DAYS = 60
+
+
+def _class_days(today, history_days):
+    """(sheet ids, dates) of the last `history_days` sheets up to today, oldest first."""
+    sheets = list(
+        Attendance.objects.filter(date__lte=today).order_by("-date").values_list("id", "date")[:history_days]
+    )[::-1]
+    ids = np.array([pk for pk, _ in sheets], np.int64)
+    dates = np.array([d for _, d in sheets], dtype="datetime64[D]")
+    return ids, dates
+
+
+def _present_matrix(student_ids, sheet_ids):
+    """Boolean students x sheets matrix of Present marks (one query)."""
+    matrix = np.zeros((len(student_ids), len(sheet_ids)), dtype=bool)
+    if not len(student_ids) or not len(sheet_ids):
+        return matrix
+    marks = np.array(
+        AttendanceEntry.objects.filter(
+            attendance_id__in=sheet_ids.tolist(), status=AttendanceEntry.Status.PRESENT,
+        ).values_list("student_id", "attendance_id").order_by(),
+        dtype=np.int64,
+    ).reshape(-1, 2)
+    rows = np.searchsorted(student_ids, marks[:, 0])
+    # Sheet ids are not ordered by date, so map them through a sort
+    order = np.argsort(sheet_ids)
+    cols = order[np.searchsorted(sheet_ids[order], marks[:, 1])]
+    known = (rows < len(student_ids)) & (student_ids[rows.clip(max=len(student_ids) - 1)] == marks[:, 0])
+    matrix[rows[known], cols[known]] = True
+    return matrix
+
+
+def build_projection(today, window=DEFAULT_WINDOW, course_id=None, history_days=HISTORY_DAYS):
+    enrollments = Enrollment.objects.filter(status=Enrollment.Status.ACTIVE)
+    if course_id:
+        enrollments = enrollments.filter(course_id=course_id)
+    rows = list(
+        enrollments.annotate(present_days=Coalesce(F("student__attendance_tally__present_days"), Value(0)))
+        .values_list(
+            "id", "student_id", "student__reg_no", "student__user__first_name", "student__user__last_name",
+            "course_id", "course__title", "course__required_attendance_days", "course__duration_weeks",
+            "enrolled_on", "present_days",
+        )
+        .order_by()
+    )
+    sheet_ids, dates = _class_days(today, max(history_days, window))
+    if not rows:
+        return {"as_of": today, "window": window, "class_days_per_week": 0, "courses": []}
+
+    (enrollment_id, student_id, reg_no, first_name, last_name, course, title,
+     required, weeks, enrolled_on, present) = zip(*rows)
+    student_id = np.array(student_id, np.int64)
+    students = np.unique(student_id)
+    matrix = _present_matrix(students, sheet_ids)[np.searchsorted(students, student_id)]
+
+    enrolled_on = np.array(enrolled_on, dtype="datetime64[D]")
+    required = np.array(required, np.int64)
+    present = np.array(present, np.int64)
+    term_end = enrolled_on + np.array(weeks, np.int64) * 7
+    today64 = np.datetime64(today, "D")
+
+    # Recent rate: Present share of the last `window` class days since each enrollment
+    eligible = dates[None, :] >= enrolled_on[:, None]
+    from_end = np.cumsum(eligible[:, ::-1], axis=1)[:, ::-1]
+    in_window = eligible & (from_end <= window)
+    recent_days = in_window.sum(axis=1)
+    recent_present = (matrix & in_window).sum(axis=1)
+    rate = np.divide(recent_present, recent_days, out=np.full(len(present), np.nan), where=recent_days > 0)
+    # Students with no recent class days are assumed to attend like everyone else
+    known = ~np.isnan(rate)
+    rate = np.where(known, rate, rate[known].mean() if known.any() else 0.0)
+
+    # Class days per week, from the sheets of the last eight weeks
+    per_week = float((dates > today64 - 56).sum()) / 8
+
+    remaining = np.maximum(required - present, 0)
+    days_left = np.maximum((term_end - today64).astype(np.int64), 0)
+    expected_present = rate * per_week * days_left / 7
+    shortfall = np.maximum(remaining - expected_present, 0)
+    risk = np.divide(shortfall, remaining, out=np.zeros(len(remaining)), where=remaining > 0)
+
+    attend_rate = rate * per_week / 7  # present days per calendar day
+    needed_days = np.divide(remaining, attend_rate, out=np.full(len(remaining), np.inf), where=attend_rate > 0)
+    finite = np.isfinite(needed_days)
+    projected = today64 + np.where(finite, np.ceil(needed_days), 0).astype("timedelta64[D]")
+
+    courses = {}
+    for i in np.lexsort((-remaining, -risk)):
+        entry = courses.setdefault(course[i], {"course_id": course[i], "course__title": title[i], "enrollments": []})
+        entry["enrollments"].append({
+            "enrollment_id": enrollment_id[i],
+            "student_id": int(student_id[i]),
+            "reg_no": reg_no[i],
+            "student_name": f"{first_name[i]} {last_name[i]}".strip(),
+            "present_days": int(present[i]),
+            "required_days": int(required[i]),
+            "recent_rate": round(float(rate[i]) * 100, 1),
+            "projected_completion": projected[i].item() if finite[i] else None,
+            "term_end": term_end[i].item(),
+            "risk": round(float(risk[i]), 2),
+        })
+    for entry in courses.values():
+        entry["at_risk"] = sum(1 for e in entry["enrollments"] if e["risk"] > 0)
+
+    return {
+        "as_of": today,
+        "window": window,
+        "class_days_per_week": round(per_week, 1),
+        "courses": sorted(courses.values(), key=lambda c: c["at_risk"], reverse=True),
+    }
+
+
+def invalidate_projection():
+    """Drop cached projections once the current transaction commits."""
+    increment_on_commit(GENERATION_KEY)
+
+
+def get_projection(window=DEFAULT_WINDOW, course_id=None):
+    """Return (payload, cache_status) where cache_status is HIT or MISS."""
+    today = timezone.localdate()
+    key = PROJECTION_KEY.format(generation=get_counter(GENERATION_KEY), today=today, window=window, course=course_id or "all")
+    payload = cache.get(key)
+    if payload is not None:
+        return payload, "HIT"
+    payload = build_projection(today, window, course_id)
+    cache.set(key, payload, timeout=settings.ATTENDANCE_RISK_CACHE_SECONDS)
+    return payload, "MISS"
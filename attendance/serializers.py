@@ -2,9 +2,32 @@ from rest_framework import serializers
 from django.db import transaction
 from .models import Attendance, AttendanceEntry
 from students.models import Student
-from courses.models import Enrollment
+from .services import save_sheet_entries
+from .sync import CONFLICT_POLICIES, LAST_WRITER_WINS
+
+# A month and a half of daily sheets per upload
+MAX_SYNC_SHEETS = 45
+
+
+def validate_student_ids(student_ids):
+    """
+    Ensure all student IDs exist and are active, and appear only once.
+    One query for the whole sheet.
+    """
+    if len(set(student_ids)) != len(student_ids):
+        raise serializers.ValidationError("Each student can appear only once per sheet.")
+
+    known = set(Student.objects.filter(id__in=student_ids, active=True).values_list("id", flat=True))
+    unknown = sorted(set(student_ids) - known)
+    if unknown:
+        raise serializers.ValidationError(
+            f"Unknown or inactive student id(s): {', '.join(map(str, unknown))}."
+        )
+    return student_ids
 
 class AttendanceEntrySerializer(serializers.ModelSerializer):
+    # A plain id: AttendanceSerializer checks every student in one query
+    student = serializers.IntegerField(source="student_id")
     student_name = serializers.ReadOnlyField(source="student.user.get_full_name")
     reg_no = serializers.ReadOnlyField(source="student.reg_no")
 
@@ -43,27 +66,11 @@ class AttendanceSerializer(serializers.ModelSerializer):
         """
         Ensure all student IDs exist and are active.
         """
-        student_ids = [e.get('student') for e in entries_data]
-        existing_count = Student.objects.filter(id__in=student_ids, active=True).count()
-        
-        # Note: We perform a loose check here. Strict validation 
-        # per ID happens during bulk creation or can be added if strictness is required.
-        return student_ids
+        return validate_student_ids([e["student_id"] for e in entries_data])
 
-    def _check_student_completion(self, student_id):
-        """
-        After marking attendance, check if the student has completed their course.
-        """
-        try:
-            # Find all active enrollments for this student
-            enrollments = Enrollment.objects.filter(
-                student_id=student_id, 
-                status="active"
-            )
-            for enrollment in enrollments:
-                enrollment.check_and_update_status()
-        except Exception:
-            pass
+    def validate_entries(self, value):
+        self._validate_student_ids(value)
+        return value
 
     @transaction.atomic
     def create(self, validated_data):
@@ -72,16 +79,8 @@ class AttendanceSerializer(serializers.ModelSerializer):
         
         attendance = Attendance.objects.create(**validated_data)
 
-        # Bulk create entries
-        AttendanceEntry.objects.bulk_create([
-            AttendanceEntry(attendance=attendance, **e) for e in entries_data
-        ])
-        
-        # Check completion status for all students present
-        for entry in entries_data:
-            if entry.get('status') == 'P':
-                self._check_student_completion(entry['student'])
-                
+        # Bulk create entries; completion is checked for the students present
+        save_sheet_entries(attendance, entries_data, created=True)
         return attendance
 
     @transaction.atomic
@@ -91,24 +90,86 @@ class AttendanceSerializer(serializers.ModelSerializer):
         instance.remarks = validated_data.get("remarks", instance.remarks)
         instance.save()
 
-        # Update or Create entries
-        processed_student_ids = []
-        
-        for entry_data in entries_data:
-            student_id = entry_data.get("student")
-            status_val = entry_data.get("status")
-            remarks_val = entry_data.get("remarks", "")
-
-            processed_student_ids.append(student_id)
-
-            entry, created = AttendanceEntry.objects.update_or_create(
-                attendance=instance,
-                student_id=student_id,
-                defaults={"status": status_val, "remarks": remarks_val}
-            )
-            
-            # If status changed to Present, check completion
-            if status_val == 'P':
-                self._check_student_completion(student_id)
-
-        return instance
\ No newline at end of file
+        # Only entries that differ from the stored sheet are written
+        save_sheet_entries(instance, entries_data)
+        return instance
+
+
+class AttendanceSummarySerializer(serializers.ModelSerializer):
+    """
+    A day's sheet without its entries (`?view=summary`); the counts come
+    from the list queryset's annotations.
+    """
+    summary = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Attendance
+        fields = ["id", "date", "taken_by", "remarks", "summary", "created_at"]
+        read_only_fields = fields
+
+    def get_summary(self, obj):
+        return obj.summary
+
+
+class CompactAttendanceSerializer(serializers.Serializer):
+    """
+    A whole sheet as parallel arrays, matching the roster: `ids` and a
+    `statuses` string with one status letter per id ("PPALE..."). Creates
+    the day's sheet or updates it; stored remarks are left as they are.
+    """
+    date = serializers.DateField()
+    remarks = serializers.CharField(required=False, allow_blank=True)
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+    statuses = serializers.CharField()
+
+    def validate(self, attrs):
+        if len(attrs["ids"]) != len(attrs["statuses"]):
+            raise serializers.ValidationError({"statuses": "Give exactly one status letter per id."})
+        invalid = set(attrs["statuses"]) - set(AttendanceEntry.Status.values)
+        if invalid:
+            raise serializers.ValidationError({
+                "statuses": f"Unknown status letter(s): {', '.join(sorted(invalid))}."
+            })
+        try:
+            validate_student_ids(attrs["ids"])
+        except serializers.ValidationError as e:
+            raise serializers.ValidationError({"ids": e.detail})
+        return attrs
+
+    @transaction.atomic
+    def submit(self):
+        """Returns (sheet, created, changes) where changes are as from save_sheet_entries()."""
+        data = self.validated_data
+        sheet, created = Attendance.objects.get_or_create(
+            date=data["date"],
+            defaults={"taken_by": self.context["request"].user, "remarks": data.get("remarks", "")},
+        )
+        if not created and "remarks" in data and data["remarks"] != sheet.remarks:
+            sheet.remarks = data["remarks"]
+            sheet.save(update_fields=["remarks", "updated_at"])
+
+        entries = [{"student_id": sid, "status": st} for sid, st in zip(data["ids"], data["statuses"])]
+        changes = save_sheet_entries(sheet, entries, created=created, keep_remarks=True)
+        return sheet, created, changes
+
+
+class SyncEntrySerializer(serializers.Serializer):
+    student = serializers.IntegerField(source="student_id")
+    status = serializers.ChoiceField(choices=AttendanceEntry.Status.choices)
+    remarks = serializers.CharField(max_length=255, required=False, allow_blank=True)
+    recorded_at = serializers.DateTimeField(required=False)
+
+
+class SyncSheetSerializer(serializers.Serializer):
+    client_id = serializers.CharField(max_length=64)
+    date = serializers.DateField()
+    recorded_at = serializers.DateTimeField()
+    remarks = serializers.CharField(required=False, allow_blank=True)
+    entries = SyncEntrySerializer(many=True)
+
+
+class SyncBatchSerializer(serializers.Serializer):
+    """Pending offline sheets of one device (see attendance.sync)."""
+    device_id = serializers.CharField(max_length=64, required=False, allow_blank=True, default="")
+    conflict = serializers.ChoiceField(choices=CONFLICT_POLICIES, default=LAST_WRITER_WINS)
+    sheets = SyncSheetSerializer(many=True, allow_empty=False, max_length=MAX_SYNC_SHEETS)
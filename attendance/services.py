@@ -0,0 +1,171 @@
+"""
+Course completion from attendance.
+
+An enrollment is complete once its student has as many "Present" days
+as the course requires. evaluate_completion() settles that for any set
+of students with one query and one UPDATE, comparing each student's
+AttendanceTally.present_days with Course.required_attendance_days.
+Saving a sheet runs it for the students marked present by that save;
+`reconcile_course_completion` runs it for everyone.
+
+Sheets are written by save_sheet_entries(), which diffs the submitted
+entries against the stored ones and upserts only the rows that changed,
+then runs completion and absence-streak checks for the students it touched.
+build_roster() gives the columnar sheet the marking screen loads.
+"""
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from courses.models import Enrollment
+from notifications.models import Notification
+from students.models import Student
+from .analytics import refresh_daily_stats
+from .bitmaps import apply_day
+from .models import AttendanceEntry
+from .risk import invalidate_projection
+from .streaks import alert_absence_streaks
+from .tallies import refresh_tallies
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def evaluate_completion(student_ids=None, today=None, dry_run=False):
+    """
+    Mark active enrollments whose present days reached the course requirement
+    as completed. `student_ids` limits the pass to those students (None: all).
+    Returns the enrollments this call completed (with student user and
+    course loaded); a dry run returns those it would complete.
+    """
+    today = today or timezone.localdate()
+    active = Enrollment.objects.filter(status=Enrollment.Status.ACTIVE)
+    if student_ids is not None:
+        active = active.filter(student_id__in=student_ids)
+
+    crossed = list(
+        active.annotate(present_days=Coalesce(F("student__attendance_tally__present_days"), Value(0)))
+        .filter(present_days__gte=F("course__required_attendance_days"))
+        .values_list("id", flat=True)
+    )
+    if crossed and not dry_run:
+        with transaction.atomic():
+            # Lock the rows still active: one completed by a concurrent pass is skipped once
+            # that pass commits, so it is completed (and reported) by one call only
+            crossed = list(
+                Enrollment.objects.select_for_update()
+                .filter(id__in=crossed, status=Enrollment.Status.ACTIVE)
+                .order_by("id").values_list("id", flat=True)
+            )
+            Enrollment.objects.filter(id__in=crossed).update(
+                status=Enrollment.Status.COMPLETED, completion_date=today
+            )
+        invalidate_projection()
+    return list(Enrollment.objects.filter(id__in=crossed).select_related("student__user", "course"))
+
+
+def notify_completions(enrollments):
+    """One bulk insert of "course completed" notifications for the students."""
+    Notification.objects.bulk_create([
+        Notification(
+            recipient_id=e.student.user_id,
+            title="Course completed",
+            message=(
+                f"Congratulations! You have completed the attendance required for {e.course.title}. "
+                "Your certificate can now be issued."
+            ),
+        )
+        for e in enrollments
+    ], batch_size=2000)
+
+
+def complete_enrollments(student_ids, today=None):
+    """evaluate_completion() plus notifications, as one unit. Returns the enrollments completed."""
+    if not student_ids:
+        return []
+    with transaction.atomic():
+        completed = evaluate_completion(student_ids, today)
+        notify_completions(completed)
+    if completed:
+        logger.info("%d enrollment(s) completed from attendance", len(completed))
+    return completed
+
+
+def save_sheet_entries(attendance, entries, created=False, keep_remarks=False):
+    """
+    Write `entries` (dicts with student_id, status, remarks) onto the sheet.
+    Existing rows are read in one query and only rows that differ are
+    written, in one upsert. The tallies (and bitmaps) of the students whose
+    rows changed and the day's statistics are refreshed; students newly
+    marked present are evaluated for completion and those newly marked
+    absent for absence streaks. With `keep_remarks`, entries without a
+    "remarks" key keep the stored remarks. Written rows get the entry's
+    "recorded_at", or the current time.
+    Returns [(student_id, previous status or None, new status)] for the rows written.
+    """
+    existing = {} if created else {
+        student_id: (status, remarks)
+        for student_id, status, remarks in attendance.entries.values_list("student_id", "status", "remarks")
+    }
+
+    now = timezone.now()
+    rows, changes = [], []
+    for entry in entries:
+        student_id = entry["student_id"]
+        status = entry.get("status", AttendanceEntry.Status.PRESENT)
+        previous = existing.get(student_id)
+        remarks = entry.get("remarks", previous[1] if previous and keep_remarks else "")
+        if previous == (status, remarks):
+            continue
+        rows.append(AttendanceEntry(
+            attendance=attendance, student_id=student_id, status=status, remarks=remarks,
+            recorded_at=entry.get("recorded_at") or now,
+        ))
+        changes.append((student_id, previous[0] if previous else None, status))
+
+    if rows:
+        AttendanceEntry.objects.bulk_create(
+            rows,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["attendance", "student"],
+            update_fields=["status", "remarks", "recorded_at"],
+        )
+        refresh_tallies({student_id for student_id, _, _ in changes})
+        apply_day(attendance.date, {student_id: status for student_id, _, status in changes})
+        refresh_daily_stats({attendance.date})
+        invalidate_projection()
+
+    complete_enrollments({
+        student_id for student_id, previous, status in changes
+        if status == AttendanceEntry.Status.PRESENT and previous != AttendanceEntry.Status.PRESENT
+    })
+    alert_absence_streaks({
+        student_id for student_id, previous, status in changes
+        if status == AttendanceEntry.Status.ABSENT and previous != AttendanceEntry.Status.ABSENT
+    })
+    return changes
+
+
+def build_roster(day, course_id=None):
+    """
+    Active students (of one course, if given) with their status on `day`,
+    as parallel arrays, in one query. Status is None for students not yet marked.
+    """
+    marked = AttendanceEntry.objects.filter(student=OuterRef("pk"), attendance__date=day).values("status")[:1]
+    students = Student.objects.filter(active=True)
+    if course_id:
+        students = students.filter(enrollments__course_id=course_id, enrollments__status=Enrollment.Status.ACTIVE)
+    rows = (
+        students.annotate(marked=Subquery(marked))
+        .order_by("user__first_name", "user__last_name", "id")
+        .values_list("id", "reg_no", "user__first_name", "user__last_name", "marked")
+    )
+
+    roster = {"date": day, "course": course_id, "ids": [], "reg_nos": [], "names": [], "statuses": []}
+    for student_id, reg_no, first_name, last_name, status in rows:
+        roster["ids"].append(student_id)
+        roster["reg_nos"].append(reg_no)
+        roster["names"].append(f"{first_name} {last_name}".strip())
+        roster["statuses"].append(status)
+    return roster
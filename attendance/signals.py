@@ -0,0 +1,82 @@
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from courses.models import Course, Enrollment
+from .analytics import refresh_daily_stats
+from .bitmaps import apply_day, refresh_bitmaps
+from .models import Attendance, AttendanceEntry
+from .risk import invalidate_projection
+from .tallies import refresh_tallies
+
+
+def _tally_students(entry):
+    students = {entry.student_id}
+    loaded = getattr(entry, "_loaded_values", None)
+    if loaded and "student_id" in loaded:
+        # An edit may have moved the entry to another student
+        students.add(loaded["student_id"])
+    return students
+
+
+def _stat_dates(entry):
+    sheets = {entry.attendance_id}
+    loaded = getattr(entry, "_loaded_values", None)
+    if loaded and "attendance_id" in loaded:
+        sheets.add(loaded["attendance_id"])
+    return set(Attendance.objects.filter(id__in=sheets).values_list("date", flat=True))
+
+
+def _deleted_model(origin):
+    return origin.model if isinstance(origin, QuerySet) else type(origin)
+
+
+# Sheet saves write entries in bulk and refresh tallies and statistics
+# themselves; these receivers cover single-entry writes such as admin edits.
+@receiver(post_save, sender=AttendanceEntry)
+def update_tally_on_entry_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    students, dates = _tally_students(instance), _stat_dates(instance)
+    refresh_tallies(students)
+    refresh_daily_stats(dates)
+    refresh_bitmaps(students, {d.year for d in dates})
+    invalidate_projection()
+
+
+@receiver(post_delete, sender=AttendanceEntry)
+def update_tally_on_entry_delete(sender, instance, origin=None, **kwargs):
+    # A deleted student's tally goes with it; a deleted sheet is refreshed once, below.
+    # Statistics of days touched by a student deletion are repaired by rebuild_attendance_stats.
+    if _deleted_model(origin) is AttendanceEntry:
+        students, dates = _tally_students(instance), _stat_dates(instance)
+        refresh_tallies(students)
+        refresh_daily_stats(dates)
+        refresh_bitmaps(students, {d.year for d in dates})
+        invalidate_projection()
+
+
+@receiver(pre_delete, sender=Attendance)
+def remember_sheet_students(sender, instance, **kwargs):
+    instance._tally_students = set(instance.entries.values_list("student_id", flat=True))
+
+
+@receiver(post_delete, sender=Attendance)
+def update_tallies_on_sheet_delete(sender, instance, origin=None, **kwargs):
+    if _deleted_model(origin) is Attendance:
+        students = getattr(instance, "_tally_students", ())
+        refresh_tallies(students)
+        refresh_daily_stats({instance.date})
+        apply_day(instance.date, dict.fromkeys(students))
+        invalidate_projection()
+
+
+# Enrolling, dropping or completing a student and changing a course's
+# requirements or length all move the completion projection
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def mark_projection_stale(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_projection()
@@ -0,0 +1,135 @@
+"""
+Consecutive-absence alerts.
+
+A student's current absence streak is the run of "Absent" marks after
+their latest mark of any other status, counting only the days they were
+marked (sheets of other courses do not break it). current_streaks() works
+that out for any set of students in one grouped query over the absences
+that have no later mark of another status.
+
+alert_absence_streaks() records an AbsenceStreakAlert per streak that has
+reached the threshold and notifies the student and the office staff in
+bulk. A streak alerts only once: it is skipped when the student already
+has an alert reaching into it (last_absent_on on or after its first day),
+so a backfilled earlier absence, which moves the streak's start, does not
+alert it again. The students' rows are locked while their alerts are
+checked and written, so concurrent saves never notify the same streak twice.
+Saving a sheet runs it for the students marked absent by that save;
+`check_absence_streaks` runs it for everyone.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, Max, Min, OuterRef
+from accounts.models import User
+from notifications.models import Notification
+from students.models import Student
+from . import bitmaps
+from .models import AbsenceStreakAlert, AttendanceEntry
+import logging
+
+logger = logging.getLogger(__name__)
+
+ABSENT = AttendanceEntry.Status.ABSENT
+
+
+def current_streaks(student_ids=None, threshold=1):
+    """
+    {student_id: (days, started_on, last_absent_on)} for active students whose
+    current absence streak is at least `threshold` days. `student_ids`
+    limits the query to those students (None: all). Read from the bitmaps
+    when they are enabled.
+    """
+    if bitmaps.enabled():
+        return bitmaps.current_streaks(student_ids, threshold)
+    later_mark = AttendanceEntry.objects.filter(
+        student_id=OuterRef("student_id"), attendance__date__gt=OuterRef("attendance__date"),
+    ).exclude(status=ABSENT)
+    absences = AttendanceEntry.objects.filter(status=ABSENT, student__active=True)
+    if student_ids is not None:
+        absences = absences.filter(student_id__in=student_ids)
+    rows = (
+        absences.exclude(Exists(later_mark))
+        .values("student_id")
+        .annotate(
+            days=Count("id"),
+            started_on=Min("attendance__date"),
+            last_absent_on=Max("attendance__date"),
+        )
+        .filter(days__gte=max(threshold, 1))
+        .values_list("student_id", "days", "started_on", "last_absent_on")
+        .order_by()
+    )
+    return {student_id: (days, started_on, last_on) for student_id, days, started_on, last_on in rows}
+
+
+def alert_absence_streaks(student_ids=None, threshold=None, dry_run=False):
+    """
+    Alert every streak of at least `threshold` days (default
+    settings.ABSENCE_STREAK_THRESHOLD) that has not been alerted yet.
+    Returns (streak_count, new AbsenceStreakAlert list).
+    """
+    if student_ids is not None and not student_ids:
+        return 0, []
+    threshold = threshold or settings.ABSENCE_STREAK_THRESHOLD
+    streaks = current_streaks(student_ids, threshold)
+    if not streaks:
+        return 0, []
+
+    with transaction.atomic():
+        if not dry_run:
+            # A concurrent save alerting the same students waits here, then sees this one's alerts
+            list(Student.objects.select_for_update().filter(id__in=streaks.keys()).order_by("id").values_list("id"))
+        alerts = _new_alerts(streaks)
+        if not dry_run and alerts:
+            AbsenceStreakAlert.objects.bulk_create(alerts, batch_size=2000)
+            Notification.objects.bulk_create(_notifications(alerts), batch_size=2000)
+    if alerts and not dry_run:
+        logger.info("Sent %d absence streak alert(s); %d streak(s) at or over %d days", len(alerts), len(streaks), threshold)
+    return len(streaks), alerts
+
+
+def _new_alerts(streaks):
+    latest = dict(
+        AbsenceStreakAlert.objects.filter(student_id__in=streaks.keys())
+        .values("student_id").annotate(last=Max("last_absent_on")).values_list("student_id", "last").order_by()
+    )
+    return [
+        AbsenceStreakAlert(student_id=student_id, started_on=started_on, last_absent_on=last_on, days=days)
+        for student_id, (days, started_on, last_on) in streaks.items()
+        # An earlier alert ending inside this streak was for the same streak, whatever its start is now
+        if latest.get(student_id) is None or latest[student_id] < started_on
+    ]
+
+
+def _notifications(alerts):
+    """The student's notice and one for every active staff member, per alert."""
+    students = {
+        s["id"]: s for s in Student.objects.filter(id__in=[a.student_id for a in alerts]).values(
+            "id", "reg_no", "user_id", "user__first_name", "user__last_name", "guardian_name", "guardian_phone",
+        )
+    }
+    staff = list(User.objects.filter(is_staff=True, is_active=True).values_list("id", flat=True))
+    notifications = []
+    for alert in alerts:
+        s = students[alert.student_id]
+        name = f"{s['user__first_name']} {s['user__last_name']}".strip()
+        notifications.append(Notification(
+            recipient_id=s["user_id"],
+            title="Absent from class",
+            message=(
+                f"You have been absent for {alert.days} class days in a row since {alert.started_on:%d %b %Y}. "
+                "Please contact the office; your guardian will be informed."
+            ),
+        ))
+        notifications.extend(
+            Notification(
+                recipient_id=user_id,
+                title="Consecutive absences",
+                message=(
+                    f"{name} ({s['reg_no']}) has been absent {alert.days} class days in a row since "
+                    f"{alert.started_on:%d %b %Y}. Guardian: {s['guardian_name']}, {s['guardian_phone']}."
+                ),
+            )
+            for user_id in staff
+        )
+    return notifications
@@ -0,0 +1,122 @@
+"""
+Offline attendance sync.
+
+Devices mark attendance without connectivity and later upload every
+pending sheet in one batch. Each sheet carries a client-generated id and
+the device time it was recorded, and each entry may carry its own time.
+apply_sync_batch() applies the whole batch in one transaction:
+
+- a client id already in AttendanceSyncLog is answered from the log, so
+  retrying an upload never applies a sheet twice;
+- student ids of every sheet are checked with one query;
+- each day is diffed against the stored sheet and written with one
+  upsert (save_sheet_entries). Entries the server recorded later than the
+  device did are "stale". Under "last_writer_wins" they are skipped and
+  the rest applied; under "reject" the whole day is rejected.
+
+Device times in the future are capped at the server's clock, so a
+misconfigured device cannot win every later conflict.
+"""
+from django.db import transaction
+from django.utils import timezone
+from students.models import Student
+from .models import Attendance, AttendanceSyncLog
+from .services import save_sheet_entries
+
+LAST_WRITER_WINS = "last_writer_wins"
+REJECT = "reject"
+CONFLICT_POLICIES = (LAST_WRITER_WINS, REJECT)
+
+
+def _result(sheet, result, **extra):
+    return {"client_id": sheet["client_id"], "date": sheet["date"].isoformat(), "result": result, **extra}
+
+
+def _apply_day(sheet, user, policy, now):
+    day_time = min(sheet["recorded_at"], now)
+    attendance, created = Attendance.objects.get_or_create(
+        date=sheet["date"], defaults={"taken_by": user, "remarks": sheet.get("remarks", "")}
+    )
+    stored = {} if created else {
+        student_id: (status, remarks, recorded_at)
+        for student_id, status, remarks, recorded_at
+        in attendance.entries.values_list("student_id", "status", "remarks", "recorded_at")
+    }
+
+    winners, stale = [], []
+    for entry in sheet["entries"]:
+        recorded_at = min(entry.get("recorded_at") or day_time, now)
+        previous = stored.get(entry["student_id"])
+        remarks = entry.get("remarks", previous[1] if previous else "")
+        if previous and (previous[0], previous[1]) != (entry["status"], remarks) \
+                and previous[2] and previous[2] > recorded_at:
+            stale.append(entry["student_id"])
+            continue
+        winners.append({**entry, "remarks": remarks, "recorded_at": recorded_at})
+
+    if stale and policy == REJECT:
+        return attendance, _result(
+            sheet, AttendanceSyncLog.Result.CONFLICT, id=attendance.pk, written=0, conflicts=stale,
+            message="The server has newer marks for some students; nothing was written for this day.",
+        )
+
+    if not created and "remarks" in sheet and sheet["remarks"] != attendance.remarks:
+        attendance.remarks = sheet["remarks"]
+        attendance.save(update_fields=["remarks", "updated_at"])
+    changes = save_sheet_entries(attendance, winners, created=created)
+    result = AttendanceSyncLog.Result.APPLIED if changes or created else AttendanceSyncLog.Result.UNCHANGED
+    return attendance, _result(sheet, result, id=attendance.pk, written=len(changes), stale=stale)
+
+
+def apply_sync_batch(sheets, user=None, device_id="", policy=LAST_WRITER_WINS):
+    """
+    Apply validated offline sheets (dicts with client_id, date, recorded_at,
+    optional remarks, and entries of student_id, status, optional remarks and
+    recorded_at). Returns one result dict per sheet, in order.
+    """
+    now = timezone.now()
+    client_ids = [s["client_id"] for s in sheets]
+    logged = {
+        log.client_id: log
+        for log in AttendanceSyncLog.objects.filter(client_id__in=client_ids)
+    }
+    active = set(Student.objects.filter(
+        id__in={e["student_id"] for s in sheets for e in s["entries"]}, active=True
+    ).values_list("id", flat=True))
+
+    results, logs, seen = [], [], set()
+    with transaction.atomic():
+        for sheet in sheets:
+            client_id = sheet["client_id"]
+            if client_id in logged or client_id in seen:
+                previous = logged.get(client_id)
+                results.append(_result(
+                    sheet, "duplicate", original=previous.detail if previous else None,
+                ))
+                continue
+            seen.add(client_id)
+
+            student_ids = [e["student_id"] for e in sheet["entries"]]
+            unknown = sorted(set(student_ids) - active)
+            if unknown or len(set(student_ids)) != len(student_ids):
+                # Not logged: the device may fix the sheet and retry with the same id
+                results.append(_result(sheet, "error", message=(
+                    f"Unknown or inactive student id(s): {', '.join(map(str, unknown))}." if unknown
+                    else "Each student can appear only once per sheet."
+                )))
+                continue
+
+            attendance, result = _apply_day(sheet, user, policy, now)
+            results.append(result)
+            logs.append(AttendanceSyncLog(
+                client_id=client_id,
+                device_id=device_id,
+                date=sheet["date"],
+                attendance=attendance,
+                recorded_at=min(sheet["recorded_at"], now),
+                synced_by=user,
+                result=result["result"],
+                detail=result,
+            ))
+        AttendanceSyncLog.objects.bulk_create(logs)
+    return results
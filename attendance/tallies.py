@@ -0,0 +1,101 @@
+"""
+Maintenance of the AttendanceTally table.
+
+Every write path calls refresh_tallies() with the students it touched. A
+refresh is set-based: one grouped aggregate over those students' entries
+and one upsert, whatever the number of students. rebuild_tallies() runs
+the same computation over every student for reconciliation.
+
+A refresh locks the students' tally rows before counting. Under READ
+COMMITTED two transactions saving entries for the same student would
+otherwise each count without the other's rows and the later upsert would
+win; with the lock the second one waits, then counts both.
+"""
+from django.db import transaction
+from django.db.models import Count, Q
+from students.models import Student
+from .models import AttendanceEntry, AttendanceTally
+
+STATUS_FIELDS = {
+    AttendanceEntry.Status.PRESENT: "present_days",
+    AttendanceEntry.Status.ABSENT: "absent_days",
+    AttendanceEntry.Status.LATE: "late_days",
+    AttendanceEntry.Status.EXCUSED: "excused_days",
+}
+TALLY_UPDATE_FIELDS = list(STATUS_FIELDS.values()) + ["updated_at"]
+
+
+def _compute(student_ids, entries):
+    """Build AttendanceTally rows for `student_ids` from an entries queryset."""
+    counts = {
+        row["student_id"]: row
+        for row in entries.values("student_id").annotate(**{
+            field: Count("id", filter=Q(status=status)) for status, field in STATUS_FIELDS.items()
+        }).order_by()
+    }
+    empty = dict.fromkeys(STATUS_FIELDS.values(), 0)
+    return [
+        AttendanceTally(student_id=student_id, **{
+            field: counts.get(student_id, empty)[field] for field in STATUS_FIELDS.values()
+        })
+        for student_id in student_ids
+    ]
+
+
+def _upsert(rows, batch_size=1000):
+    AttendanceTally.objects.bulk_create(
+        rows,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=["student"],
+        update_fields=TALLY_UPDATE_FIELDS,
+    )
+
+
+def _lock(student_ids):
+    """Create missing tally rows, then lock all of them (in key order) until commit."""
+    AttendanceTally.objects.bulk_create(
+        [AttendanceTally(student_id=student_id) for student_id in student_ids], ignore_conflicts=True
+    )
+    list(
+        AttendanceTally.objects.select_for_update()
+        .filter(student_id__in=student_ids).order_by("student_id").values_list("student_id", flat=True)
+    )
+
+
+def refresh_tallies(student_ids):
+    """Recompute the tallies of the given students."""
+    student_ids = {s for s in student_ids if s}
+    if not student_ids:
+        return
+    # Students deleted in the same transaction take their tally with them
+    student_ids = set(Student.objects.filter(id__in=student_ids).values_list("id", flat=True))
+    with transaction.atomic():
+        _lock(student_ids)
+        _upsert(_compute(student_ids, AttendanceEntry.objects.filter(student_id__in=student_ids)))
+
+
+def expected_tallies():
+    student_ids = list(Student.objects.order_by("id").values_list("id", flat=True))
+    return _compute(student_ids, AttendanceEntry.objects.all())
+
+
+def rebuild_tallies():
+    """Rebuild the whole table from the entries. Returns the number of rows written."""
+    rows = expected_tallies()
+    with transaction.atomic():
+        _upsert(rows)
+    return len(rows)
+
+
+def find_mismatches():
+    """Tallies that disagree with the entries, as (expected, stored) pairs."""
+    stored = {row.student_id: row for row in AttendanceTally.objects.all()}
+    fields = list(STATUS_FIELDS.values())
+    mismatches = []
+    for expected in expected_tallies():
+        current = stored.pop(expected.student_id, None)
+        if current is None or any(getattr(current, f) != getattr(expected, f) for f in fields):
+            mismatches.append((expected, current))
+    mismatches.extend((None, orphan) for orphan in stored.values())
+    return mismatches
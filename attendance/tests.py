@@ -1 +1,398 @@
-from django.test import TestCase
\ No newline at end of file
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from courses.models import Course, Enrollment
+from notifications.models import Notification
+from students.models import Student
+from .models import Attendance, AttendanceEntry, AttendanceSyncLog, AttendanceTally
+
+
+def make_student(username):
+    user = User.objects.create_user(username=username, password="x", first_name=username.title(), last_name="K")
+    return Student.objects.create(user=user, reg_no=f"STU-{username}", guardian_name="G", guardian_phone="9999999999")
+
+
+def make_course(code="TAIL-1", required_days=2):
+    return Course.objects.create(
+        code=code, title="Tailoring Basics", duration_weeks=12,
+        total_fees=Decimal("6000.00"), required_attendance_days=required_days,
+    )
+
+
+class AttendanceAPITestCase(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username="admin", password="x", is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.course = make_course()
+        self.students = [make_student(name) for name in ("asha", "bina", "cara")]
+        for student in self.students:
+            Enrollment.objects.create(student=student, course=self.course)
+
+    def post_sheet(self, day, statuses):
+        return self.client.post("/api/v1/attendance/records/", {
+            "date": day.isoformat(),
+            "entries": [{"student": s.pk, "status": st} for s, st in zip(self.students, statuses)],
+        }, format="json")
+
+
+class CourseCompletionTests(AttendanceAPITestCase):
+    def test_sheet_save_completes_students_reaching_required_days(self):
+        self.assertEqual(self.post_sheet(date(2025, 6, 2), ["P", "P", "A"]).status_code, 201)
+        self.assertFalse(Enrollment.objects.filter(status="completed").exists())
+
+        self.post_sheet(date(2025, 6, 3), ["P", "A", "P"])
+        completed = Enrollment.objects.filter(status="completed")
+        self.assertEqual([e.student for e in completed], [self.students[0]])
+        self.assertEqual(Notification.objects.filter(recipient=self.students[0].user).count(), 1)
+
+    def test_nightly_reconciliation_catches_rows_written_directly(self):
+        from django.core.management import call_command
+        from io import StringIO
+
+        # bulk_create sends no signals, so the tallies are not refreshed
+        AttendanceEntry.objects.bulk_create([
+            AttendanceEntry(attendance=Attendance.objects.create(date=day), student=self.students[1], status="P")
+            for day in (date(2025, 6, 2), date(2025, 6, 3))
+        ])
+
+        call_command("reconcile_course_completion", stdout=StringIO())
+        self.assertEqual(
+            list(Enrollment.objects.filter(status="completed").values_list("student", flat=True)),
+            [self.students[1].pk],
+        )
+
+
+class AttendanceSheetEditTests(AttendanceAPITestCase):
+    def edit_queries(self, sheet, statuses):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.put(f"/api/v1/attendance/records/{sheet}/", {
+                "date": "2025-06-02",
+                "entries": [{"student": s.pk, "status": st} for s, st in zip(self.students, statuses)],
+            }, format="json")
+        self.assertEqual(resp.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_full_class_edit_costs_constant_queries(self):
+        sheet = self.post_sheet(date(2025, 6, 2), ["A"] * 3).data["id"]
+        small = self.edit_queries(sheet, ["P", "A", "A"])
+
+        self.students += [make_student(f"extra{i}") for i in range(20)]
+        self.post_sheet(date(2025, 6, 3), ["A"] * len(self.students))
+        large = self.edit_queries(sheet, ["L"] + ["P"] * (len(self.students) - 1))
+
+        self.assertEqual(small, large)
+        self.assertEqual(AttendanceEntry.objects.filter(attendance_id=sheet, status="P").count(), 22)
+
+    def test_unknown_or_inactive_students_are_rejected(self):
+        Student.objects.filter(pk=self.students[2].pk).update(active=False)
+        resp = self.post_sheet(date(2025, 6, 2), ["P", "P", "P"])
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn(str(self.students[2].pk), str(resp.data["details"]["entries"]))
+        self.assertFalse(Attendance.objects.exists())
+
+
+class AttendanceListTests(AttendanceAPITestCase):
+    def test_list_counts_come_from_one_annotated_query(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        self.post_sheet(date(2025, 6, 2), ["P", "A", "L"])
+        self.post_sheet(date(2025, 6, 3), ["P", "P", "E"])
+
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get("/api/v1/attendance/records/?view=summary")
+        results = resp.data["results"] if isinstance(resp.data, dict) else resp.data
+        self.assertNotIn("entries", results[0])
+        self.assertEqual(results[0]["summary"], {"present": 2, "absent": 0, "late": 0, "excused": 1, "total": 3})
+        self.assertEqual(results[1]["summary"]["late"], 1)
+        # Pagination count plus the page itself
+        self.assertLessEqual(len(ctx.captured_queries), 2)
+
+        full = self.client.get("/api/v1/attendance/records/").data
+        self.assertEqual(len((full["results"] if isinstance(full, dict) else full)[0]["entries"]), 3)
+
+
+class AttendanceTallyTests(AttendanceAPITestCase):
+    def test_tallies_follow_sheet_saves_and_single_entry_edits(self):
+        from django.core.management import call_command
+        from io import StringIO
+        from .tallies import find_mismatches
+
+        sheet = self.post_sheet(date(2025, 6, 2), ["P", "A", "L"]).data["id"]
+        self.client.put(f"/api/v1/attendance/records/{sheet}/", {
+            "date": "2025-06-02",
+            "entries": [{"student": s.pk, "status": "P"} for s in self.students],
+        }, format="json")
+        AttendanceEntry.objects.filter(attendance_id=sheet, student=self.students[2]).first().delete()
+        self.post_sheet(date(2025, 6, 3), ["E", "P", "A"])
+
+        enrollment = Enrollment.objects.select_related("student__attendance_tally").get(student=self.students[1])
+        self.assertEqual(enrollment.get_present_days_count(), 2)
+        self.assertEqual(find_mismatches(), [])
+
+        AttendanceTally.objects.filter(student=self.students[0]).update(present_days=9)
+        out = StringIO()
+        call_command("rebuild_attendance_tallies", "--check", stdout=out)
+        self.assertIn("1 tally row(s) out of step", out.getvalue())
+        call_command("rebuild_attendance_tallies", stdout=StringIO())
+        self.assertEqual(find_mismatches(), [])
+
+
+class AttendanceAnalyticsTests(AttendanceAPITestCase):
+    def test_report_reads_daily_stats_with_breakdowns(self):
+        from django.utils import timezone
+        from datetime import timedelta
+
+        other = make_course("EMB-1")
+        Enrollment.objects.create(student=self.students[2], course=other)
+        today = timezone.now().date()
+        self.post_sheet(today - timedelta(days=20), ["P", "A", "L"])
+        self.post_sheet(today - timedelta(days=1), ["P", "P", "E"])
+
+        resp = self.client.get("/api/v1/attendance/analytics/summary/?days=30")
+        self.assertEqual(resp.data["stats"], {
+            "present": 3, "absent": 1, "late": 1, "excused": 1, "total": 6, "rate": 66.7,
+        })
+        # The trend covers the whole `days` range, not just the last week
+        self.assertEqual(len(resp.data["chart_data"]), 2)
+        self.assertEqual(sum(r["days"] for r in resp.data["by_weekday"]), 2)
+        by_course = {r["course_id"]: r["total"] for r in resp.data["by_course"]}
+        self.assertEqual(by_course, {self.course.pk: 6, other.pk: 2})
+
+        resp = self.client.get(f"/api/v1/attendance/analytics/summary/?days=30&course={other.pk}")
+        self.assertEqual((resp.data["stats"]["late"], resp.data["stats"]["excused"]), (1, 1))
+
+    def test_daily_stats_are_unique_per_day_and_dimension(self):
+        from django.db import IntegrityError, transaction
+        from .analytics import refresh_daily_stats
+        from .models import DailyAttendanceStat
+
+        day = date(2025, 6, 2)
+        self.post_sheet(day, ["P", "A", "L"])
+        refresh_daily_stats({day})
+        rows = DailyAttendanceStat.objects.filter(date=day)
+        self.assertEqual(rows.count(), 3)  # all, the course and the admission cohort
+
+        for row in rows:
+            with self.assertRaises(IntegrityError), transaction.atomic():
+                DailyAttendanceStat.objects.create(
+                    date=day, dimension=row.dimension, course=row.course, cohort=row.cohort
+                )
+
+
+class RosterTests(AttendanceAPITestCase):
+    def test_roster_round_trip_with_etag(self):
+        url = "/api/v1/attendance/records/roster/?date=2025-06-02"
+        resp = self.client.get(url)
+        self.assertEqual(resp.data["ids"], [s.pk for s in self.students])
+        self.assertEqual(resp.data["names"], ["Asha K", "Bina K", "Cara K"])
+        self.assertEqual(resp.data["statuses"], [None, None, None])
+        etag = resp["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        submit = {"date": "2025-06-02", "ids": resp.data["ids"], "statuses": "PAL"}
+        resp = self.client.post("/api/v1/attendance/records/compact/", submit, format="json")
+        self.assertEqual((resp.status_code, resp.data["written"]), (201, 3))
+        AttendanceEntry.objects.filter(student=self.students[0]).update(remarks="Left early")
+        resp = self.client.post("/api/v1/attendance/records/compact/", {**submit, "statuses": "PPL"}, format="json")
+        self.assertEqual((resp.status_code, resp.data["written"]), (200, 1))
+        self.assertEqual(AttendanceEntry.objects.get(student=self.students[0]).remarks, "Left early")
+
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["statuses"], ["P", "P", "L"])
+
+        bad = self.client.post("/api/v1/attendance/records/compact/", {**submit, "statuses": "PX"}, format="json")
+        self.assertEqual(bad.status_code, 400)
+
+
+class OfflineSyncTests(AttendanceAPITestCase):
+    def test_batch_applies_days_once_and_resolves_conflicts(self):
+        url = "/api/v1/attendance/records/sync/"
+        a, b, c = (s.pk for s in self.students)
+        # The office marked the 2nd at 10:00; the device marked it offline at 09:00
+        self.post_sheet(date(2025, 6, 2), ["P", "P", "P"])
+        AttendanceEntry.objects.update(recorded_at="2025-06-02T10:00:00Z")
+        batch = {"device_id": "tablet-1", "sheets": [
+            {"client_id": "d1", "date": "2025-06-02", "recorded_at": "2025-06-02T09:00:00Z",
+             "entries": [{"student": a, "status": "A"}, {"student": b, "status": "P"},
+                         {"student": c, "status": "L", "recorded_at": "2025-06-02T11:00:00Z"}]},
+            {"client_id": "d2", "date": "2025-06-03", "recorded_at": "2025-06-03T09:00:00Z",
+             "entries": [{"student": a, "status": "P"}, {"student": b, "status": "A"}]},
+            {"client_id": "d3", "date": "2025-06-04", "recorded_at": "2025-06-04T09:00:00Z",
+             "entries": [{"student": 999999, "status": "P"}]},
+        ]}
+
+        reject = self.client.post(url, {**batch, "conflict": "reject"}, format="json").data["results"]
+        self.assertEqual([r["result"] for r in reject], ["conflict", "applied", "error"])
+        self.assertEqual(reject[0]["conflicts"], [a])
+        self.assertEqual(AttendanceEntry.objects.get(attendance__date=date(2025, 6, 2), student_id=c).status, "P")
+
+        batch["sheets"][0]["client_id"] = "d1-retry"
+        results = self.client.post(url, batch, format="json").data["results"]
+        self.assertEqual([r["result"] for r in results], ["applied", "duplicate", "error"])
+        self.assertEqual((results[0]["written"], results[0]["stale"]), (1, [a]))
+        statuses = dict(AttendanceEntry.objects.filter(attendance__date=date(2025, 6, 2))
+                        .values_list("student_id", "status"))
+        self.assertEqual(statuses, {a: "P", b: "P", c: "L"})
+        self.assertEqual(AttendanceSyncLog.objects.count(), 3)
+
+
+class CompletionRiskTests(AttendanceAPITestCase):
+    def test_enrollments_ranked_by_projected_shortfall(self):
+        from django.core.cache import cache
+        from django.utils import timezone
+        from datetime import timedelta
+
+        cache.clear()
+        today = timezone.localdate()
+        Course.objects.filter(pk=self.course.pk).update(required_attendance_days=10)
+        Enrollment.objects.update(enrolled_on=today - timedelta(weeks=4))
+        for offset, statuses in enumerate([["P", "P", "A"], ["P", "A", "A"], ["P", "P", "A"], ["P", "A", "A"]]):
+            self.post_sheet(today - timedelta(days=offset + 1), statuses)
+
+        url = "/api/v1/attendance/analytics/completion-risk/"
+        resp = self.client.get(url)
+        self.assertEqual(resp["X-Cache"], "MISS")
+        self.assertEqual(resp.data["class_days_per_week"], 0.5)
+        ranked = resp.data["courses"][0]["enrollments"]
+        # Four more class days before the term ends: cara never comes, bina comes half the time
+        self.assertEqual([e["reg_no"] for e in ranked], ["STU-cara", "STU-bina", "STU-asha"])
+        self.assertEqual([e["risk"] for e in ranked], [1.0, 0.75, 0.33])
+        self.assertIsNone(ranked[0]["projected_completion"])
+        self.assertEqual(ranked[2]["projected_completion"], today + timedelta(weeks=12))
+
+        self.assertEqual(self.client.get(url)["X-Cache"], "HIT")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post_sheet(today, ["P", "P", "P"])
+        self.assertEqual(self.client.get(url)["X-Cache"], "MISS")
+
+        # Enrollment and course changes move the projection too
+        with self.captureOnCommitCallbacks(execute=True):
+            Enrollment.objects.get(student=self.students[2]).delete()
+        resp = self.client.get(url)
+        self.assertEqual(resp["X-Cache"], "MISS")
+        self.assertEqual(len(resp.data["courses"][0]["enrollments"]), 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.refresh_from_db()
+            self.course.duration_weeks = 52
+            self.course.save()
+        self.assertEqual(self.client.get(url)["X-Cache"], "MISS")
+
+
+class AbsenceStreakTests(AttendanceAPITestCase):
+    def test_each_streak_alerts_student_and_staff_once(self):
+        from django.test import override_settings
+        from .models import AbsenceStreakAlert
+
+        def alerts():
+            return Notification.objects.filter(title__in=["Absent from class", "Consecutive absences"])
+
+        with override_settings(ABSENCE_STREAK_THRESHOLD=3):
+            self.post_sheet(date(2025, 6, 2), ["A", "P", "A"])
+            self.post_sheet(date(2025, 6, 3), ["A", "P", "A"])
+            self.assertFalse(alerts().exists())
+            self.post_sheet(date(2025, 6, 4), ["A", "P", "P"])
+            self.assertEqual(
+                sorted(alerts().values_list("recipient__username", flat=True)), ["admin", "asha"]
+            )
+            self.assertIn("G, 9999999999", alerts().get(recipient=self.admin).message)
+
+            # The same streak running on does not alert again
+            self.post_sheet(date(2025, 6, 5), ["A", "P", "P"])
+            self.assertEqual(alerts().count(), 2)
+
+            # A new streak after a present day does
+            self.post_sheet(date(2025, 6, 6), ["P", "P", "P"])
+            for day in (9, 10, 11):
+                self.post_sheet(date(2025, 6, day), ["A", "P", "P"])
+        self.assertEqual(alerts().count(), 4)
+        self.assertEqual(
+            list(AbsenceStreakAlert.objects.order_by("started_on").values_list("started_on", "days")),
+            [(date(2025, 6, 2), 3), (date(2025, 6, 9), 3)],
+        )
+
+    def test_backfilled_absence_does_not_realert_the_streak(self):
+        from django.test import override_settings
+        from .models import AbsenceStreakAlert
+
+        with override_settings(ABSENCE_STREAK_THRESHOLD=3):
+            for day in (3, 4, 5):
+                self.post_sheet(date(2025, 6, day), ["A", "P", "P"])
+            self.assertEqual(AbsenceStreakAlert.objects.count(), 1)
+
+            # A forgotten sheet for the day before moves the streak's start back a day
+            self.post_sheet(date(2025, 6, 2), ["A", "P", "P"])
+            self.post_sheet(date(2025, 6, 6), ["A", "P", "P"])
+        self.assertEqual(
+            list(AbsenceStreakAlert.objects.values_list("started_on", "days")), [(date(2025, 6, 3), 3)]
+        )
+        self.assertEqual(Notification.objects.filter(title="Absent from class").count(), 1)
+
+
+class AttendanceBitmapTests(AttendanceAPITestCase):
+    def test_bitmaps_follow_writes_and_agree_with_entries(self):
+        from django.core.management import call_command
+        from django.test import override_settings
+        from io import StringIO
+        from . import bitmaps, streaks
+
+        asha, bina, cara = self.students
+        with override_settings(ATTENDANCE_BITMAPS=True):
+            self.post_sheet(date(2024, 12, 30), ["P", "A", "A"])
+            self.post_sheet(date(2024, 12, 31), ["A", "A", "L"])
+            self.post_sheet(date(2025, 1, 2), ["A", "A", "E"])
+            sheet = Attendance.objects.get(date=date(2025, 1, 2))
+            self.client.put(f"/api/v1/attendance/records/{sheet.pk}/", {
+                "date": "2025-01-02", "entries": [{"student": s.pk, "status": "A"} for s in self.students],
+            }, format="json")
+            entry = AttendanceEntry.objects.get(attendance__date=date(2024, 12, 30), student=cara)
+            entry.status = "P"
+            entry.save()
+            Attendance.objects.create(date=date(2025, 1, 3)).delete()
+            self.post_sheet(date(2025, 1, 6), ["A", "P", "A"])
+            Attendance.objects.get(date=date(2025, 1, 6)).delete()
+
+            self.assertEqual(bitmaps.find_mismatches(), [])
+            from_bitmaps = streaks.current_streaks()
+            resp = self.client.get(f"/api/v1/attendance/records/calendar/?student={bina.pk}&year=2024")
+        with override_settings(ATTENDANCE_BITMAPS=False):
+            self.assertEqual(from_bitmaps, streaks.current_streaks())
+        # Bina's streak runs across the new year
+        self.assertEqual(from_bitmaps[bina.pk], (3, date(2024, 12, 30), date(2025, 1, 2)))
+
+        self.assertEqual(resp.data["absent"], 2)
+        self.assertEqual(resp.data["current_absence_streak"], 2)
+        self.assertEqual(resp.data["months"][11]["days"], "." * 29 + "AA")
+        for year in ("0", "10000", "twenty"):
+            resp = self.client.get(f"/api/v1/attendance/records/calendar/?student={bina.pk}&year={year}")
+            self.assertEqual(resp.status_code, 400)
+
+        out = StringIO()
+        call_command("rebuild_attendance_bitmaps", "--check", stdout=out)
+        self.assertIn("0 bitmap(s) out of step", out.getvalue())
+
+    def test_deleting_a_years_only_sheet_drops_its_bitmaps(self):
+        from django.core.management import call_command
+        from django.test import override_settings
+        from io import StringIO
+        from .models import AttendanceBitmap
+
+        with override_settings(ATTENDANCE_BITMAPS=True):
+            self.post_sheet(date(2025, 6, 2), ["P", "A", "L"])
+            self.post_sheet(date(2026, 1, 5), ["P", "A", "L"])
+            Attendance.objects.get(date=date(2026, 1, 5)).delete()
+
+            self.assertFalse(AttendanceBitmap.objects.filter(year=2026).exists())
+            self.assertEqual(AttendanceBitmap.objects.filter(year=2025).count(), 3)
+            out = StringIO()
+            call_command("rebuild_attendance_bitmaps", "--check", stdout=out)
+        self.assertIn("0 bitmap(s) out of step", out.getvalue())
@@ -1,7 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import AttendanceViewSet
-from .views_analytics import AttendanceAnalyticsView
+from .views_analytics import AttendanceAnalyticsView, CompletionRiskView
 
 router = DefaultRouter()
 router.register(r"records", AttendanceViewSet, basename="attendance")
@@ -9,4 +9,5 @@ router.register(r"records", AttendanceViewSet, basename="attendance")
 urlpatterns = [
     path("", include(router.urls)),
     path("analytics/summary/", AttendanceAnalyticsView.as_view(), name="attendance-analytics"),
+    path("analytics/completion-risk/", CompletionRiskView.as_view(), name="attendance-completion-risk"),
 ]
\ No newline at end of file
@@ -1,22 +1,65 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from .models import Attendance, AttendanceEntry
-from .serializers import AttendanceSerializer, StudentAttendanceEntrySerializer
+from django.db import IntegrityError
+from django.utils import timezone
+from django.utils.http import parse_etags, quote_etag
+from .models import Attendance, AttendanceEntry, with_summary
+from .serializers import (
+    AttendanceSerializer, AttendanceSummarySerializer, CompactAttendanceSerializer, StudentAttendanceEntrySerializer,
+    SyncBatchSerializer,
+)
+from .bitmaps import year_view
+from .services import build_roster
+from .sync import apply_sync_batch
 from api.permissions import IsAdmin, IsStudent
+from datetime import date
+import hashlib
+import json
+
+# Years the calendar views accept
+CALENDAR_YEARS = range(1900, 2101)
+
 
 class AttendanceViewSet(viewsets.ModelViewSet):
-    queryset = Attendance.objects.prefetch_related("entries__student__user").all()
+    queryset = with_summary(Attendance.objects.all())
     serializer_class = AttendanceSerializer
     filterset_fields = ["date"]
     ordering_fields = ["date"]
     search_fields = ["remarks"]
 
+    def _summary_only(self):
+        return self.action in ("list", "records_by_date") and self.request.query_params.get("view") == "summary"
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self._summary_only():
+            return queryset
+        return queryset.prefetch_related("entries__student__user")
+
+    def get_serializer_class(self):
+        if self._summary_only():
+            return AttendanceSummarySerializer
+        return super().get_serializer_class()
+
     def get_permissions(self):
-        if self.action in ['my_attendance']:
+        if self.action in ['my_attendance', 'my_calendar']:
              return [IsStudent()]
         return [IsAdmin()]
 
+    def _reload(self, serializer):
+        # Re-read the saved sheet with its prefetches so the response costs
+        # a fixed number of queries however many entries it has
+        serializer.instance = self.get_queryset().get(pk=serializer.instance.pk)
+
+    def perform_create(self, serializer):
+        serializer.save()
+        self._reload(serializer)
+
+    def perform_update(self, serializer):
+        serializer.save()
+        self._reload(serializer)
+
     @action(detail=False, methods=["get"], url_path="records")
     def records_by_date(self, request):
         """
@@ -32,6 +75,106 @@ class AttendanceViewSet(viewsets.ModelViewSet):
             "results": serializer.data
         })
 
+    @action(detail=False, methods=["get"], url_path="roster")
+    def roster(self, request):
+        """
+        Active students for `date` (default today), optionally of one `course`,
+        as parallel arrays with their current status. Supports If-None-Match.
+        """
+        try:
+            day = date.fromisoformat(request.query_params["date"]) if request.query_params.get("date") else timezone.localdate()
+            course_id = int(request.query_params["course"]) if request.query_params.get("course") else None
+        except ValueError:
+            return Response(
+                {"success": False, "message": "date must be YYYY-MM-DD and course a whole number."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        roster = build_roster(day, course_id)
+        raw = json.dumps(roster, default=str, separators=(",", ":"))
+        etag = quote_etag(hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32])
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(roster)
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+    @action(detail=False, methods=["post"], url_path="compact")
+    def compact(self, request):
+        """Create or update a day's sheet from the roster's compact form."""
+        serializer = CompactAttendanceSerializer(data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        sheet, created, changes = serializer.submit()
+        return Response(
+            {"success": True, "id": sheet.pk, "date": sheet.date, "written": len(changes)},
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
+
+    @action(detail=False, methods=["post"], url_path="sync")
+    def sync(self, request):
+        """
+        Upload many offline sheets at once. Each sheet gets its own result:
+        applied, unchanged, duplicate (already synced), conflict or error.
+        """
+        serializer = SyncBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        try:
+            results = apply_sync_batch(
+                data["sheets"], user=request.user, device_id=data["device_id"], policy=data["conflict"]
+            )
+        except IntegrityError:
+            # Another upload of the same sheets committed first; a retry gets "duplicate"
+            return Response(
+                {"success": False, "message": "These sheets are being synced by another request. Retry shortly."},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return Response({"success": True, "results": results})
+
+    def _year(self, request):
+        """The ?year= parameter (default: this year), or None unless a whole number in CALENDAR_YEARS."""
+        try:
+            year = int(request.query_params.get("year") or timezone.localdate().year)
+        except ValueError:
+            return None
+        return year if year in CALENDAR_YEARS else None
+
+    @action(detail=False, methods=["get"], url_path="calendar")
+    def calendar(self, request):
+        """
+        One student's year (?student=<id>&year=YYYY): counts, rate, absence
+        streaks and a month-by-month string of status letters ("." unmarked).
+        """
+        year = self._year(request)
+        try:
+            student_id = int(request.query_params["student"])
+        except (KeyError, ValueError):
+            student_id = None
+        if student_id is None or year is None:
+            return Response(
+                {"success": False, "message": (
+                    "Give a student id and optionally a year, as whole numbers; "
+                    f"years run from {CALENDAR_YEARS.start} to {CALENDAR_YEARS.stop - 1}."
+                )},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(year_view(student_id, year))
+
+    @action(detail=False, methods=["get"], url_path="me/calendar")
+    def my_calendar(self, request):
+        """The calendar view of the logged-in student's own year (?year=YYYY)."""
+        year = self._year(request)
+        if year is None:
+            return Response(
+                {"success": False, "message": (
+                    f"year must be a whole number from {CALENDAR_YEARS.start} to {CALENDAR_YEARS.stop - 1}."
+                )},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(year_view(request.user.student.pk, year))
+
     @action(detail=False, methods=["get"], url_path="me")
     def my_attendance(self, request):
         """
@@ -1,67 +1,70 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework import status
 from api.permissions import IsAdmin
-from .models import AttendanceEntry
-from django.db.models import Count, Q
+from .analytics import attendance_report
+from .risk import get_projection
 from django.utils import timezone
 from datetime import timedelta
 
 class AttendanceAnalyticsView(APIView):
+    """
+    Attendance over the last `days` days (optionally one `course`): totals,
+    a daily trend and breakdowns by weekday, course and admission cohort.
+    Served from the daily statistics table (see attendance.analytics).
+    """
     permission_classes = [IsAdmin]
 
     def get(self, request):
-        days = int(request.query_params.get("days", 30))
-        start_date = timezone.now().date() - timedelta(days=days)
+        try:
+            days = int(request.query_params.get("days", 30))
+            course_id = int(request.query_params["course"]) if request.query_params.get("course") else None
+        except ValueError:
+            return Response(
+                {"success": False, "message": "days and course must be whole numbers."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if days < 1:
+            return Response(
+                {"success": False, "message": "days must be at least 1."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        # 1. Overall Stats (in range)
-        entries = AttendanceEntry.objects.filter(attendance__date__gte=start_date)
-        total_entries = entries.count()
-        
-        if total_entries == 0:
-            stats = {"present": 0, "absent": 0, "late": 0, "excused": 0, "rate": 0}
-        else:
-            present = entries.filter(status="P").count()
-            absent = entries.filter(status="A").count()
-            late = entries.filter(status="L").count()
-            excused = entries.filter(status="E").count()
-            
-            # 'Present' includes Late for calculation purposes often, but let's keep it strict P
-            # Calculate "Effective Presence"
-            effective_present = present + late
-            rate = round((effective_present / total_entries) * 100, 1)
+        end = timezone.now().date()
+        report = attendance_report(end - timedelta(days=days), end, course_id)
 
-            stats = {
-                "present": present,
-                "absent": absent,
-                "late": late,
-                "excused": excused,
-                "rate": rate
-            }
+        # `stats` and `chart_data` keep the shape the dashboard already reads
+        report["chart_data"] = [
+            {**row, "date": row["date"].strftime("%Y-%m-%d")} for row in report.pop("trend")
+        ]
+        return Response(report)
 
-        # 2. Daily Trends (Last 7 days)
-        week_start = timezone.now().date() - timedelta(days=7)
-        daily_data = (
-            AttendanceEntry.objects
-            .filter(attendance__date__gte=week_start)
-            .values("attendance__date")
-            .annotate(
-                present=Count("id", filter=Q(status="P")),
-                absent=Count("id", filter=Q(status="A")),
+
+class CompletionRiskView(APIView):
+    """
+    Active enrollments ranked per course by the risk of not reaching the
+    required present days before the course term ends, from each student's
+    recent attendance rate (last `window` class days). Cached until the next
+    attendance save; X-Cache says HIT or MISS.
+    """
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        try:
+            window = int(request.query_params.get("window", 20))
+            course_id = int(request.query_params["course"]) if request.query_params.get("course") else None
+        except ValueError:
+            return Response(
+                {"success": False, "message": "window and course must be whole numbers."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if not 1 <= window <= 120:
+            return Response(
+                {"success": False, "message": "window must be from 1 to 120 class days."},
+                status=status.HTTP_400_BAD_REQUEST,
             )
-            .order_by("attendance__date")
-        )
-        
-        chart_data = [
-            {
-                "date": entry["attendance__date"].strftime("%Y-%m-%d"),
-                "present": entry["present"],
-                "absent": entry["absent"]
-            }
-            for entry in daily_data
-        ]
 
-        return Response({
-            "stats": stats,
-            "chart_data": chart_data
-        })
\ No newline at end of file
+        payload, cache_status = get_projection(window, course_id)
+        response = Response(payload)
+        response["X-Cache"] = cache_status
+        return response
@@ -0,0 +1,37 @@
+from django.db import migrations
+
+
+def backfill_certificate_numbers(apps, schema_editor):
+    """Number certificates issued while the allocator was disabled, oldest first."""
+    Certificate = apps.get_model("certificates", "Certificate")
+    DocumentSequence = apps.get_model("documents", "DocumentSequence")
+
+    # Continue after any numbers that were assigned by hand
+    for number in Certificate.objects.filter(certificate_no__startswith="CERT-").values_list("certificate_no", flat=True):
+        try:
+            _, date_part, seq = number.split("-")
+            sequence, _ = DocumentSequence.objects.get_or_create(name=f"CERT-{date_part[:4]}")
+            if sequence.last_value < int(seq):
+                sequence.last_value = int(seq)
+                sequence.save(update_fields=["last_value"])
+        except ValueError:
+            continue
+
+    for cert in Certificate.objects.filter(certificate_no__isnull=True).order_by("issue_date", "id"):
+        sequence, _ = DocumentSequence.objects.get_or_create(name=f"CERT-{cert.issue_date:%Y}")
+        sequence.last_value += 1
+        sequence.save(update_fields=["last_value"])
+        cert.certificate_no = f"CERT-{cert.issue_date:%Y%m%d}-{sequence.last_value:04d}"
+        cert.save(update_fields=["certificate_no"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificates', '0002_remove_certificate_pdf_file'),
+        ('documents', '0002_documentsequence'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_certificate_numbers, migrations.RunPython.noop),
+    ]
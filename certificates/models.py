@@ -1,6 +1,8 @@
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from students.models import Student
 from courses.models import Course
+from documents.sequences import certificate_series, next_value, format_certificate_no
 import uuid
 
 class Certificate(models.Model):
@@ -20,18 +22,12 @@ class Certificate(models.Model):
     def __str__(self):
         return f"{self.certificate_no} - {self.student}"
 
-    # def save(self, *args, **kwargs):
-    #     is_new = self._state.adding
-    #     super().save(*args, **kwargs) # 1. Initial save to get ID
-        
-    #     if is_new and not self.certificate_no:
-    #         today = self.issue_date
-    #         today_str = today.strftime("%Y%m%d")
-    #         # 2. Generate Number
-    #         self.certificate_no = f"CERT-{today_str}-{self.id:04d}"
-    #         # 3. Update DB with number
-    #         super().save(update_fields=["certificate_no"])
-            
-    #         # 4. Generate PDF NOW (Data is fully ready)
-    #         from .utils import generate_certificate_pdf_sync
-    #         generate_certificate_pdf_sync(self.id)
\ No newline at end of file
+    def save(self, *args, **kwargs):
+        if not self.certificate_no:
+            today = self.issue_date or timezone.localdate()
+            with transaction.atomic():
+                number = next_value(certificate_series(today))
+                self.certificate_no = format_certificate_no(today, number)
+                super().save(*args, **kwargs)
+        else:
+            super().save(*args, **kwargs)
@@ -58,4 +58,10 @@ def generate_certificate_pdf(cert):
     except Exception as e:
         # Log the specific error for internal debugging
         logger.error(f"WeasyPrint Error for CERT {cert.certificate_no}: {e}", exc_info=True)
-        return None
\ No newline at end of file
+        return None
+
+
+def render_certificate_job(certificate_id):
+    """Render entry point for the background worker."""
+    cert = Certificate.objects.select_related("student__user", "course").get(pk=certificate_id)
+    return generate_certificate_pdf(cert), f"{cert.certificate_no}.pdf"
@@ -6,6 +6,8 @@ from api.permissions import IsAdmin, IsStudent
 from .models import Certificate
 from .serializers import CertificateSerializer
 from .utils import generate_certificate_pdf
+from documents.jobs import wants_async_render, enqueue_render, accepted_response
+from documents.models import RenderJob
 from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 import logging
@@ -67,6 +69,10 @@ class CertificateViewSet(viewsets.ModelViewSet):
                 {"success": False, "message": "You are not authorized to download this certificate."}, 
                 status=status.HTTP_403_FORBIDDEN
             )
+
+        if wants_async_render(request):
+            job = enqueue_render(RenderJob.Kind.CERTIFICATE, cert.pk, request.user)
+            return accepted_response(request, job)
             
         try:
             pdf_content = generate_certificate_pdf(cert)
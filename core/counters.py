@@ -0,0 +1,48 @@
+"""
+Counters shared by every process, kept in the database.
+
+The Django cache is per-process memory here, so a counter bumped by a
+management command or another gunicorn worker would never be seen by the
+web process. These live in core.Counter rows and are bumped with one
+atomic UPDATE, so concurrent increments are never lost.
+
+Cached payloads are versioned with a generation counter: readers key the
+payload by get_counter(), writers call increment_on_commit() so the bump
+lands only once their data is visible to everyone.
+
+lock() takes a row lock on a counter until the transaction commits, for
+writers that have no row of their own to lock.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from .models import Counter
+
+
+def get_counter(name):
+    return Counter.objects.filter(name=name).values_list("value", flat=True).first() or 0
+
+
+def increment(name, by=1):
+    if Counter.objects.filter(name=name).update(value=F("value") + by):
+        return
+    try:
+        with transaction.atomic():
+            Counter.objects.create(name=name, value=by)
+    except IntegrityError:
+        # Created by a concurrent increment
+        Counter.objects.filter(name=name).update(value=F("value") + by)
+
+
+def increment_on_commit(name):
+    """Increment `name` once the current transaction commits."""
+    transaction.on_commit(lambda: increment(name))
+
+
+def lock(name):
+    """Lock the `name` row (creating it if needed) until the current transaction ends."""
+    Counter.objects.bulk_create([Counter(name=name)], ignore_conflicts=True)
+    Counter.objects.select_for_update().filter(name=name).values_list("value", flat=True).first()
+
+
+def reset(*names):
+    Counter.objects.filter(name__in=names).delete()
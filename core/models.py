@@ -0,0 +1,18 @@
+from django.db import models
+
+
+class Counter(models.Model):
+    """
+    A named integer shared by every process (see core.counters): cache
+    generations and usage counters that must add up across workers and
+    management commands.
+    """
+    name = models.CharField(max_length=100, primary_key=True)
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Counter"
+        verbose_name_plural = "Counters"
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
@@ -25,6 +25,7 @@ INSTALLED_APPS = [
     "certificates",
     "api",
     "notifications",
+    "documents",
 
     # 3rd party
     "corsheaders",
@@ -158,6 +159,39 @@ SPECTACULAR_SETTINGS = {
     "SCHEMA_PATH_PREFIX": "/api/v1",
 }
 
+# --- Receipt PDF cache ---
+# Rendered receipts are kept on disk, keyed by a hash of their content.
+RECEIPT_PDF_CACHE_DIR = os.getenv("RECEIPT_PDF_CACHE_DIR", str(BASE_DIR / "var" / "receipt_pdfs"))
+RECEIPT_PDF_CACHE_MAX_BYTES = int(os.getenv("RECEIPT_PDF_CACHE_MAX_MB", "256")) * 1024 * 1024
+
+# --- Background PDF rendering ---
+# When enabled, download endpoints return 202 with a job id instead of the file.
+# Jobs are processed by `python manage.py run_render_worker`.
+PDF_RENDER_ASYNC = os.getenv("PDF_RENDER_ASYNC", "0").lower() in ("true", "1")
+RENDER_JOB_TTL_HOURS = int(os.getenv("RENDER_JOB_TTL_HOURS", "24"))
+# A merged PDF is assembled in memory before it is sent; larger exports must use ZIP.
+RECEIPT_EXPORT_MERGE_LIMIT = int(os.getenv("RECEIPT_EXPORT_MERGE_LIMIT", "500"))
+# Render processes each web process keeps for bulk exports, shared by concurrent requests.
+RENDER_POOL_PROCESSES = int(os.getenv("RENDER_POOL_PROCESSES", "2"))
+# "native" draws receipts directly with pydyf (finance/receipt_pdf.py);
+# WeasyPrint is still used whenever the receipt template has been customised.
+RECEIPT_PDF_ENGINE = os.getenv("RECEIPT_PDF_ENGINE", "weasyprint").lower()
+
+# --- Finance dashboard cache ---
+# Finance writes mark the cached payload stale; the TTL is only a backstop.
+FINANCE_DASHBOARD_CACHE_SECONDS = int(os.getenv("FINANCE_DASHBOARD_CACHE_SECONDS", "86400"))
+# Receipt, enrollment and fee writes drop the cached fee forecast; the TTL is only a backstop.
+FINANCE_FORECAST_CACHE_SECONDS = int(os.getenv("FINANCE_FORECAST_CACHE_SECONDS", "86400"))
+
+# --- Attendance risk projection cache ---
+# Attendance writes drop the cached projection; the TTL is only a backstop.
+ATTENDANCE_RISK_CACHE_SECONDS = int(os.getenv("ATTENDANCE_RISK_CACHE_SECONDS", "86400"))
+# Consecutive absent days (of the days a student was marked) that alert the office once per streak.
+ABSENCE_STREAK_THRESHOLD = int(os.getenv("ABSENCE_STREAK_THRESHOLD", "3"))
+# Keep packed per-student, per-year status bitmaps alongside the entries (attendance/bitmaps.py).
+# After turning this on, fill them with `manage.py rebuild_attendance_bitmaps`.
+ATTENDANCE_BITMAPS = os.getenv("ATTENDANCE_BITMAPS", "0").lower() in ("true", "1")
+
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "noreply@noorinstitute.com")
 SERVER_EMAIL = DEFAULT_FROM_EMAIL
 
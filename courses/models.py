@@ -1,3 +1,4 @@
+from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
 from django.core.validators import MinValueValidator
 from students.models import Student
@@ -58,7 +59,11 @@ class Enrollment(models.Model):
         return f"{self.student.user.get_full_name()} → {self.course.title}"
     
     def get_present_days_count(self):
-        return self.student.attendanceentry_set.filter(status="P").count()
+        # Kept up to date by attendance.tallies; select_related("student__attendance_tally") to avoid a query
+        try:
+            return self.student.attendance_tally.present_days
+        except ObjectDoesNotExist:
+            return 0
     
     def check_and_update_status(self):
         if self.status == self.Status.ACTIVE:
@@ -15,7 +15,7 @@ class CourseViewSet(viewsets.ModelViewSet):
 
 
 class EnrollmentViewSet(viewsets.ModelViewSet):
-    queryset = Enrollment.objects.select_related("student__user", "course")
+    queryset = Enrollment.objects.select_related("student__user", "student__attendance_tally", "course")
     serializer_class = EnrollmentSerializer
     filterset_fields = ["status", "course", "student"]
     search_fields = ["student__user__first_name", "student__user__last_name", "course__title"]
@@ -0,0 +1,16 @@
+from django.contrib import admin
+from .models import RenderJob, DocumentSequence
+
+@admin.register(RenderJob)
+class RenderJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "object_id", "status", "attempts", "created_at", "finished_at")
+    list_filter = ("status", "kind")
+    search_fields = ("id", "filename")
+    readonly_fields = ("created_at", "started_at", "finished_at", "error")
+    exclude = ("result",)
+
+@admin.register(DocumentSequence)
+class DocumentSequenceAdmin(admin.ModelAdmin):
+    list_display = ("name", "last_value", "updated_at")
+    search_fields = ("name",)
+    readonly_fields = ("updated_at",)
@@ -0,0 +1,149 @@
+"""
+Image renditions for uploaded photos.
+
+Uploads are stored untouched. A RenderJob then produces fixed-size WebP and
+JPEG copies with Pillow, on the render worker rather than in the request.
+Each copy is rotated upright from the EXIF orientation and saved without
+any metadata. The rendition paths are recorded in a JSON field next to
+the image field, together with the source name they were made from, so a
+re-upload is detected and re-processed.
+"""
+from django.apps import apps
+from django.core.files.base import ContentFile
+from django.db.models import Q
+from io import BytesIO
+import json
+import os
+
+# name -> longest edge in pixels
+RENDITION_SIZES = {
+    "thumb": 160,
+    "medium": 640,
+}
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+
+# RenderJob kind -> (model, image field, renditions field)
+IMAGE_TARGETS = {
+    "student_photo": ("students.Student", "photo", "photo_renditions"),
+    "expense_receipt": ("finance.Expense", "receipt_image", "receipt_image_renditions"),
+}
+
+
+def needs_renditions(instance, field_name, renditions_field):
+    image = getattr(instance, field_name)
+    record = getattr(instance, renditions_field) or {}
+    return bool(image) and record.get("source") != image.name
+
+
+def _encode(image, fmt, quality):
+    buffer = BytesIO()
+    if fmt == "JPEG":
+        if image.mode in ("RGBA", "LA", "P"):
+            from PIL import Image
+            rgba = image.convert("RGBA")
+            flattened = Image.new("RGB", rgba.size, (255, 255, 255))
+            flattened.paste(rgba, mask=rgba.getchannel("A"))
+            image = flattened
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+        image.save(buffer, "JPEG", quality=quality, optimize=True, progressive=True)
+    else:
+        image.save(buffer, "WEBP", quality=quality, method=4)
+    return buffer.getvalue()
+
+
+def build_renditions(field_file):
+    """
+    Write the renditions of `field_file` to its storage.
+    Returns the record to store: {"source": name, "<size>": {"webp", "jpeg", "width", "height"}}.
+    """
+    from PIL import Image, ImageOps
+
+    storage = field_file.storage
+    stem, _ = os.path.splitext(field_file.name)
+    folder, base = os.path.split(stem)
+
+    with field_file.open("rb") as fh, Image.open(fh) as original:
+        # draft() lets the JPEG decoder downscale while decoding large photos
+        original.draft("RGB", (max(RENDITION_SIZES.values()) * 2,) * 2)
+        upright = ImageOps.exif_transpose(original)
+        if upright.mode not in ("RGB", "RGBA"):
+            upright = upright.convert("RGBA" if "A" in upright.getbands() else "RGB")
+
+        record = {"source": field_file.name}
+        for size_name, edge in RENDITION_SIZES.items():
+            copy = upright.copy()
+            copy.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+            entry = {"width": copy.width, "height": copy.height}
+            for fmt, ext, quality in (("WEBP", "webp", WEBP_QUALITY), ("JPEG", "jpg", JPEG_QUALITY)):
+                path = os.path.join("renditions", folder, f"{base}-{size_name}.{ext}")
+                if storage.exists(path):
+                    storage.delete(path)
+                entry[ext if ext != "jpg" else "jpeg"] = storage.save(path, ContentFile(_encode(copy, fmt, quality)))
+            record[size_name] = entry
+    return record
+
+
+def _paths(record):
+    return {
+        path for size_name in RENDITION_SIZES
+        for path in (record or {}).get(size_name, {}).values() if isinstance(path, str)
+    }
+
+
+def delete_renditions(storage, record, keep=None):
+    for path in _paths(record) - _paths(keep):
+        if storage.exists(path):
+            storage.delete(path)
+
+
+def process_image(kind, object_id, force=False):
+    """
+    Build and record the renditions of one object. Returns the record
+    ({} when the object has no image).
+    """
+    model_label, field_name, renditions_field = IMAGE_TARGETS[kind]
+    model = apps.get_model(model_label)
+    instance = model.objects.get(pk=object_id)
+    image = getattr(instance, field_name)
+    previous = getattr(instance, renditions_field) or {}
+
+    if not image:
+        record = {}
+    elif not force and previous.get("source") == image.name:
+        return previous
+    else:
+        record = build_renditions(image)
+
+    # Conditional on the source so a concurrent re-upload is not overwritten
+    if image:
+        unchanged = Q(**{field_name: image.name})
+    else:
+        unchanged = Q(**{field_name: ""}) | Q(**{f"{field_name}__isnull": True})
+    updated = model.objects.filter(unchanged, pk=object_id).update(**{renditions_field: record})
+    if updated and previous.get("source") != record.get("source"):
+        delete_renditions(image.storage, previous, keep=record)
+    return record
+
+
+def rendition_job(kind):
+    """RenderJob renderer: object_id -> (summary bytes, filename)."""
+    def render(object_id):
+        record = process_image(kind, object_id)
+        return json.dumps(record).encode("utf-8"), f"{kind}-{object_id}.json"
+    return render
+
+
+render_student_photo_job = rendition_job("student_photo")
+render_expense_receipt_job = rendition_job("expense_receipt")
+
+
+def rendition_url(instance, field_name, renditions_field, size="thumb", fmt="webp"):
+    """Storage URL of a rendition, falling back to the original until it is processed."""
+    image = getattr(instance, field_name)
+    if not image:
+        return None
+    record = getattr(instance, renditions_field) or {}
+    path = record.get(size, {}).get(fmt) if record.get("source") == image.name else None
+    return image.storage.url(path) if path else image.url
@@ -0,0 +1,137 @@
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.response import Response
+from datetime import timedelta
+from .models import RenderJob
+import logging
+
+logger = logging.getLogger(__name__)
+
+# kind -> callable(object_id) returning (pdf_bytes, filename)
+RENDERERS = {
+    RenderJob.Kind.RECEIPT: "finance.utils.render_receipt_job",
+    RenderJob.Kind.CERTIFICATE: "certificates.utils.render_certificate_job",
+    RenderJob.Kind.STUDENT_PHOTO: "documents.images.render_student_photo_job",
+    RenderJob.Kind.EXPENSE_RECEIPT: "documents.images.render_expense_receipt_job",
+}
+
+CONTENT_TYPES = {
+    RenderJob.Kind.STUDENT_PHOTO: "application/json",
+    RenderJob.Kind.EXPENSE_RECEIPT: "application/json",
+}
+
+
+def wants_async_render(request):
+    """
+    `?async=1` / `?async=0` on a download request overrides the PDF_RENDER_ASYNC default.
+    """
+    flag = request.query_params.get("async")
+    if flag is None:
+        return settings.PDF_RENDER_ASYNC
+    return flag.lower() in ("1", "true", "yes")
+
+
+def enqueue_render(kind, object_id, user=None):
+    """
+    Queue a render, reusing a job that is already waiting for the same document.
+    """
+    active = RenderJob.objects.filter(
+        kind=kind, object_id=object_id,
+        status__in=[RenderJob.Status.PENDING, RenderJob.Status.RUNNING],
+    )
+    existing = active.first()
+    if existing:
+        return existing
+
+    try:
+        with transaction.atomic():
+            return RenderJob.objects.create(
+                kind=kind,
+                object_id=object_id,
+                content_type=CONTENT_TYPES.get(kind, "application/pdf"),
+                requested_by=user if user and user.is_authenticated else None,
+            )
+    except IntegrityError:
+        # A concurrent request queued the same document first (unique_active_render_job)
+        return active.first() or enqueue_render(kind, object_id, user)
+
+
+def accepted_response(request, job):
+    """202 response pointing the client at the poll endpoint."""
+    return Response(
+        {
+            "success": True,
+            "job_id": str(job.id),
+            "status": job.status,
+            "poll_url": request.build_absolute_uri(reverse("render-job", args=[job.id])),
+        },
+        status=status.HTTP_202_ACCEPTED,
+    )
+
+
+def execute_render(job_id, kind, object_id):
+    """
+    Runs in a worker process. Returns (job_id, data, filename, error).
+    """
+    try:
+        renderer = import_string(RENDERERS[kind])
+        data, filename = renderer(object_id)
+        if not data:
+            raise ValueError("Render returned empty bytes")
+        return job_id, data, filename, ""
+    except Exception as e:
+        logger.error(f"Render job {job_id} ({kind} #{object_id}) failed: {e}", exc_info=True)
+        return job_id, None, "", str(e) or e.__class__.__name__
+
+
+def claim_jobs(limit):
+    """
+    Atomically move up to `limit` pending jobs to RUNNING and return them.
+    SKIP LOCKED lets several workers share the queue on PostgreSQL.
+    """
+    with transaction.atomic():
+        ids = list(
+            RenderJob.objects.filter(status=RenderJob.Status.PENDING)
+            .select_for_update(skip_locked=True)
+            .order_by("created_at")
+            .values_list("id", flat=True)[:limit]
+        )
+        if not ids:
+            return []
+        RenderJob.objects.filter(id__in=ids).update(
+            status=RenderJob.Status.RUNNING,
+            started_at=timezone.now(),
+            attempts=F("attempts") + 1,
+        )
+    return list(RenderJob.objects.filter(id__in=ids).only("id", "kind", "object_id"))
+
+
+def complete_job(job_id, data, filename, error):
+    fields = {"finished_at": timezone.now()}
+    if error:
+        fields.update(status=RenderJob.Status.FAILED, error=error[:2000])
+    else:
+        fields.update(status=RenderJob.Status.DONE, result=data, filename=filename, error="")
+    RenderJob.objects.filter(id=job_id).update(**fields)
+
+
+def requeue_stale_jobs(older_than):
+    """Jobs left RUNNING by a crashed worker go back to the queue."""
+    cutoff = timezone.now() - older_than
+    return RenderJob.objects.filter(
+        status=RenderJob.Status.RUNNING, started_at__lt=cutoff
+    ).update(status=RenderJob.Status.PENDING)
+
+
+def purge_finished_jobs():
+    cutoff = timezone.now() - timedelta(hours=settings.RENDER_JOB_TTL_HOURS)
+    deleted, _ = RenderJob.objects.filter(
+        status__in=[RenderJob.Status.DONE, RenderJob.Status.FAILED],
+        finished_at__lt=cutoff,
+    ).delete()
+    return deleted
@@ -0,0 +1,77 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from documents.models import DocumentSequence
+from documents.sequences import allocate
+import threading
+import time
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure document-number allocation throughput with parallel writers "
+        "and check the result is duplicate- and gap-free."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", default="1,4,16",
+                            help="Comma-separated writer thread counts to benchmark.")
+        parser.add_argument("--allocations", type=int, default=500,
+                            help="Allocations per writer.")
+        parser.add_argument("--block", type=int, default=1,
+                            help="Numbers reserved per allocation (block allocation).")
+        parser.add_argument("--series", default="BENCH",
+                            help="Scratch series name; it is reset before each run.")
+
+    def _writer(self, series, allocations, block, results, errors):
+        numbers = []
+        try:
+            for _ in range(allocations):
+                with transaction.atomic():
+                    first = allocate(series, block)
+                numbers.extend(range(first, first + block))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            results.append(numbers)
+            connection.close()
+
+    def handle(self, *args, **options):
+        series = options["series"]
+        if series in ("REC",) or series.startswith("CERT-"):
+            raise CommandError("Refusing to benchmark against a live numbering series.")
+
+        writer_counts = [int(w) for w in options["writers"].split(",") if w.strip()]
+        allocations, block = options["allocations"], options["block"]
+
+        self.stdout.write(f"{'writers':>8} {'allocs':>8} {'numbers':>9} {'seconds':>9} {'allocs/s':>10}  check")
+        for writers in writer_counts:
+            DocumentSequence.objects.update_or_create(name=series, defaults={"last_value": 0})
+            results, errors = [], []
+            threads = [
+                threading.Thread(target=self._writer, args=(series, allocations, block, results, errors))
+                for _ in range(writers)
+            ]
+
+            started = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            elapsed = time.perf_counter() - started
+
+            numbers = sorted(n for chunk in results for n in chunk)
+            expected = list(range(1, len(numbers) + 1))
+            if errors:
+                check = f"{len(errors)} writer error(s): {errors[0]}"
+            elif numbers != expected:
+                check = "FAILED (duplicates or gaps)"
+            else:
+                check = "ok"
+
+            total_allocs = writers * allocations
+            self.stdout.write(
+                f"{writers:>8} {total_allocs:>8} {len(numbers):>9} {elapsed:>9.3f} "
+                f"{total_allocs / elapsed:>10.0f}  {check}"
+            )
+
+        DocumentSequence.objects.filter(name=series).delete()
@@ -0,0 +1,52 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from documents.images import IMAGE_TARGETS
+from documents.pool import default_pool_size, process_image_task, render_pool
+import time
+
+
+class Command(BaseCommand):
+    help = "Generate missing WebP/JPEG renditions for student photos and expense receipt images."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--kind", choices=IMAGE_TARGETS.keys(), action="append",
+                            help="Only this kind (repeatable). Default: all.")
+        parser.add_argument("--processes", type=int, default=default_pool_size(),
+                            help="Pool size (default: number of CPUs).")
+        parser.add_argument("--force", action="store_true",
+                            help="Rebuild renditions that are already up to date.")
+
+    def _pending(self, kind, force):
+        model_label, field_name, renditions_field = IMAGE_TARGETS[kind]
+        rows = (
+            apps.get_model(model_label).objects
+            .exclude(Q(**{field_name: ""}) | Q(**{f"{field_name}__isnull": True}))
+            .values_list("pk", field_name, renditions_field)
+            .order_by("pk")
+            .iterator(chunk_size=2000)
+        )
+        for pk, name, record in rows:
+            if force or (record or {}).get("source") != name:
+                yield kind, pk, force
+
+    def handle(self, *args, **options):
+        kinds = options["kind"] or list(IMAGE_TARGETS)
+        tasks = [task for kind in kinds for task in self._pending(kind, options["force"])]
+        if not tasks:
+            self.stdout.write(self.style.SUCCESS("All renditions are up to date."))
+            return
+
+        processes = max(1, options["processes"])
+        self.stdout.write(f"Processing {len(tasks)} image(s) with {processes} process(es)...")
+        started = time.perf_counter()
+        failed = 0
+        with render_pool(processes) as pool:
+            for kind, object_id, error in pool.imap_unordered(process_image_task, tasks, chunksize=4):
+                if error:
+                    failed += 1
+                    self.stderr.write(f"{kind} #{object_id}: {error}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {len(tasks) - failed} image(s) in {time.perf_counter() - started:.1f}s; {failed} failed."
+        ))
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from datetime import timedelta
+import time
+from documents.jobs import claim_jobs, complete_job, purge_finished_jobs, requeue_stale_jobs
+from documents.pool import _render_job, default_pool_size, render_pool
+
+
+class Command(BaseCommand):
+    help = "Render queued receipt/certificate PDFs in a process pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=default_pool_size(),
+                            help="Pool size (default: number of CPUs).")
+        parser.add_argument("--batch", type=int, default=0,
+                            help="Jobs claimed per cycle (default: 2x pool size).")
+        parser.add_argument("--poll-interval", type=float, default=2.0,
+                            help="Seconds to sleep when the queue is empty.")
+        parser.add_argument("--stale-after", type=int, default=10,
+                            help="Minutes before a RUNNING job is considered abandoned.")
+        parser.add_argument("--once", action="store_true",
+                            help="Drain the queue and exit instead of polling forever.")
+
+    def handle(self, *args, **options):
+        processes = max(1, options["processes"])
+        batch = options["batch"] or processes * 2
+
+        requeued = requeue_stale_jobs(timedelta(minutes=options["stale_after"]))
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} abandoned job(s).")
+
+        self.stdout.write(f"Render worker started with {processes} process(es).")
+
+        with render_pool(processes) as pool:
+            while True:
+                jobs = claim_jobs(batch)
+                if not jobs:
+                    purge_finished_jobs()
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll_interval"])
+                    continue
+
+                tasks = [(job.id, job.kind, job.object_id) for job in jobs]
+                for job_id, data, filename, error in pool.imap_unordered(_render_job, tasks):
+                    complete_job(job_id, data, filename, error)
+                    if error:
+                        self.stderr.write(f"Job {job_id} failed: {error}")
+
+                self.stdout.write(f"Processed {len(jobs)} job(s).")
+
+        self.stdout.write(self.style.SUCCESS("Render queue drained."))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 01:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0002_documentsequence'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='renderjob',
+            name='kind',
+            field=models.CharField(choices=[('receipt', 'Fee Receipt'), ('certificate', 'Certificate'), ('student_photo', 'Student Photo'), ('expense_receipt', 'Expense Receipt Image')], max_length=30),
+        ),
+    ]
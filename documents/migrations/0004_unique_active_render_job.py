@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fail_duplicate_jobs(apps, schema_editor):
+    """Keep the oldest active job of each document; later duplicates are marked failed."""
+    RenderJob = apps.get_model("documents", "RenderJob")
+    kept = set()
+    for job in RenderJob.objects.filter(status__in=["pending", "running"]).order_by("created_at"):
+        key = (job.kind, job.object_id)
+        if key in kept:
+            RenderJob.objects.filter(pk=job.pk).update(status="failed", error="Duplicate of an earlier queued render.")
+        kept.add(key)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0003_alter_renderjob_kind'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_duplicate_jobs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='renderjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['pending', 'running'])), fields=('kind', 'object_id'), name='unique_active_render_job'),
+        ),
+    ]
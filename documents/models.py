@@ -0,0 +1,73 @@
+from django.db import models
+from django.conf import settings
+import uuid
+
+class RenderJob(models.Model):
+    """
+    A document render queued for the background worker.
+    The finished file is stored on the row, so no broker or shared disk is needed.
+    Image jobs write their renditions to media storage and store a JSON summary.
+    """
+    class Kind(models.TextChoices):
+        RECEIPT = "receipt", "Fee Receipt"
+        CERTIFICATE = "certificate", "Certificate"
+        STUDENT_PHOTO = "student_photo", "Student Photo"
+        EXPENSE_RECEIPT = "expense_receipt", "Expense Receipt Image"
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        DONE = "done", "Done"
+        FAILED = "failed", "Failed"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=30, choices=Kind.choices)
+    object_id = models.PositiveBigIntegerField()
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    filename = models.CharField(max_length=150, blank=True)
+    content_type = models.CharField(max_length=100, default="application/pdf")
+    result = models.BinaryField(null=True, blank=True, editable=False)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    requested_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+            models.Index(fields=["kind", "object_id"]),
+        ]
+        constraints = [
+            # At most one queued or running render per document (see documents.jobs.enqueue_render)
+            models.UniqueConstraint(
+                fields=["kind", "object_id"], condition=models.Q(status__in=["pending", "running"]),
+                name="unique_active_render_job",
+            ),
+        ]
+        verbose_name = "Render Job"
+        verbose_name_plural = "Render Jobs"
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.object_id} ({self.status})"
+
+
+class DocumentSequence(models.Model):
+    """
+    One counter row per numbering series ("REC", "CERT-2025", ...).
+    Numbers are handed out by `documents.sequences`, never by scanning the
+    documents themselves.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    last_value = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["name"]
+        verbose_name = "Document Sequence"
+        verbose_name_plural = "Document Sequences"
+
+    def __str__(self):
+        return f"{self.name}: {self.last_value}"
@@ -0,0 +1,93 @@
+"""
+Process-pool helpers for PDF rendering and image processing.
+
+Pools use the "spawn" start method so children never inherit the parent's
+database sockets. This module must stay importable before Django is set up:
+spawned children unpickle these functions before running the initializer.
+"""
+from collections import deque
+from django.db import connections
+from django.conf import settings
+import atexit
+import django
+import itertools
+import multiprocessing
+import os
+import threading
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+
+def _init_process():
+    django.setup()
+
+
+def _render_job(args):
+    from .jobs import execute_render
+    return execute_render(*args)
+
+
+def default_pool_size():
+    return os.cpu_count() or 1
+
+
+def render_pool(processes=None):
+    """A spawn-context Pool whose workers have Django configured."""
+    # Nothing should be mid-transaction while children start up
+    connections.close_all()
+    ctx = multiprocessing.get_context("spawn")
+    return ctx.Pool(processes=processes or default_pool_size(), initializer=_init_process)
+
+
+def shared_render_pool():
+    """
+    The web process's one long-lived pool for renders made inside a request
+    (bulk exports), with RENDER_POOL_PROCESSES workers. Concurrent exports
+    queue their tasks on the same workers instead of each starting a pool,
+    so a web process never runs more render interpreters than that.
+    """
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            # Spawned children open their own connections; the request's stay open
+            ctx = multiprocessing.get_context("spawn")
+            _shared_pool = ctx.Pool(processes=settings.RENDER_POOL_PROCESSES, initializer=_init_process)
+            atexit.register(_shared_pool.terminate)
+        return _shared_pool
+
+
+def render_object(args):
+    """(kind, object_id) -> (object_id, data, filename, error), for bulk exports."""
+    kind, object_id = args
+    from .jobs import execute_render
+    return execute_render(object_id, kind, object_id)
+
+
+def process_image_task(args):
+    """(kind, object_id, force) -> (kind, object_id, error), for the image backfill."""
+    kind, object_id, force = args
+    from .images import process_image
+    try:
+        process_image(kind, object_id, force=force)
+        return kind, object_id, ""
+    except Exception as e:
+        return kind, object_id, str(e) or e.__class__.__name__
+
+
+def imap_bounded(pool, func, iterable, window):
+    """
+    Ordered imap that keeps at most `window` tasks in flight.
+    Unlike Pool.imap, finished results cannot pile up in memory when the
+    consumer (e.g. a slow HTTP client) falls behind.
+    """
+    items = iter(iterable)
+    in_flight = deque()
+    for item in itertools.islice(items, window):
+        in_flight.append(pool.apply_async(func, (item,)))
+
+    while in_flight:
+        result = in_flight.popleft().get()
+        for item in itertools.islice(items, 1):
+            in_flight.append(pool.apply_async(func, (item,)))
+        yield result
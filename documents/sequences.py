@@ -0,0 +1,71 @@
+"""
+Document number allocation backed by the DocumentSequence counter table.
+
+Every allocation is a single-row `UPDATE ... RETURNING`. When it runs inside
+the same transaction as the insert that uses the number, a rollback undoes
+both, so a series stays gap-free. The counter row stays locked until that
+transaction commits, which is the cost of a gap-free series. Only the
+counter row is locked; no scan of the documents table is needed.
+"""
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from .models import DocumentSequence
+
+RECEIPT_SERIES = "REC"
+
+
+def certificate_series(on_date):
+    return f"CERT-{on_date:%Y}"
+
+
+def _bump(name, count):
+    table = connection.ops.quote_name(DocumentSequence._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {table} SET last_value = last_value + %s, updated_at = %s "
+            f"WHERE name = %s RETURNING last_value",
+            [count, timezone.now(), name],
+        )
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def allocate(name, count=1):
+    """
+    Reserve `count` consecutive numbers from series `name` and return the first.
+    Call inside the transaction that stores the numbered rows to keep the
+    series gap-free.
+    """
+    if count < 1:
+        raise ValueError("count must be at least 1")
+
+    with transaction.atomic():
+        last = _bump(name, count)
+        if last is None:
+            # First use of this series. A concurrent creator may win the race;
+            # either way the row exists afterwards.
+            try:
+                with transaction.atomic():
+                    DocumentSequence.objects.create(name=name)
+            except IntegrityError:
+                pass
+            last = _bump(name, count)
+    return last - count + 1
+
+
+def next_value(name):
+    return allocate(name, 1)
+
+
+def allocate_block(name, count):
+    """Reserve a block of numbers for bulk inserts. Returns a range."""
+    first = allocate(name, count)
+    return range(first, first + count)
+
+
+def format_receipt_no(number):
+    return f"{RECEIPT_SERIES}-{number:06d}"
+
+
+def format_certificate_no(on_date, number):
+    return f"CERT-{on_date:%Y%m%d}-{number:04d}"
@@ -0,0 +1,26 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from students.models import Student
+from finance.models import Expense
+from .images import IMAGE_TARGETS, needs_renditions
+from .jobs import enqueue_render
+from .models import RenderJob
+
+MODEL_KINDS = {
+    Student: RenderJob.Kind.STUDENT_PHOTO,
+    Expense: RenderJob.Kind.EXPENSE_RECEIPT,
+}
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_save, sender=Expense)
+def queue_image_renditions(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    kind = MODEL_KINDS[sender]
+    _, field_name, renditions_field = IMAGE_TARGETS[kind]
+    image_removed = not getattr(instance, field_name) and getattr(instance, renditions_field)
+    if needs_renditions(instance, field_name, renditions_field) or image_removed:
+        # The worker must see the committed upload
+        transaction.on_commit(lambda: enqueue_render(kind, instance.pk))
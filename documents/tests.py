@@ -0,0 +1,119 @@
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.test import TestCase, override_settings
+from io import BytesIO
+import tempfile
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from finance.tests import make_course, make_receipt, make_student
+from .images import process_image
+from .jobs import claim_jobs, complete_job, enqueue_render, execute_render
+from .models import RenderJob
+from .sequences import allocate, allocate_block, next_value
+
+
+class RenderJobTests(TestCase):
+    def setUp(self):
+        self.receipt = make_receipt(make_student(), make_course())
+        self.client = APIClient()
+
+    def test_public_download_enqueues_and_poll_returns_file(self):
+        url = reverse("receipt-download-public", args=[self.receipt.public_id])
+        resp = self.client.get(url, {"async": "1"})
+        self.assertEqual(resp.status_code, 202)
+        job_id = resp.data["job_id"]
+
+        poll = self.client.get(reverse("render-job", args=[job_id]))
+        self.assertEqual(poll.status_code, 202)
+
+        # What the worker does for each claimed job
+        [job] = claim_jobs(10)
+        complete_job(*execute_render(job.id, job.kind, job.object_id))
+
+        poll = self.client.get(reverse("render-job", args=[job_id]))
+        self.assertEqual(poll.status_code, 200)
+        self.assertEqual(poll["Content-Type"], "application/pdf")
+        self.assertTrue(poll.content.startswith(b"%PDF"))
+
+    def test_pending_job_is_reused(self):
+        first = enqueue_render(RenderJob.Kind.RECEIPT, self.receipt.pk)
+        second = enqueue_render(RenderJob.Kind.RECEIPT, self.receipt.pk)
+        self.assertEqual(first.id, second.id)
+
+        # A request that found no active job loses the insert race and gets the winner's job
+        from unittest import mock
+        with mock.patch("django.db.models.query.QuerySet.first", autospec=True, side_effect=[None, first]):
+            third = enqueue_render(RenderJob.Kind.RECEIPT, self.receipt.pk)
+        self.assertEqual(third.id, first.id)
+        self.assertEqual(RenderJob.objects.filter(object_id=self.receipt.pk).count(), 1)
+
+    def test_failed_render_is_recorded(self):
+        job = enqueue_render(RenderJob.Kind.RECEIPT, 999999)
+        claim_jobs(10)
+        complete_job(*execute_render(job.id, job.kind, job.object_id))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, RenderJob.Status.FAILED)
+        self.assertTrue(job.error)
+
+
+class DocumentSequenceTests(TestCase):
+    def test_series_are_independent_and_consecutive(self):
+        self.assertEqual([next_value("A") for _ in range(3)], [1, 2, 3])
+        self.assertEqual(next_value("B"), 1)
+        self.assertEqual(allocate_block("A", 5), range(4, 9))
+        self.assertEqual(next_value("A"), 9)
+
+    def test_rolled_back_allocation_leaves_no_gap(self):
+        next_value("A")
+        try:
+            with transaction.atomic():
+                allocate("A")
+                raise RuntimeError("insert failed")
+        except RuntimeError:
+            pass
+        self.assertEqual(next_value("A"), 2)
+
+    def test_receipt_numbers_come_from_the_sequence(self):
+        student, course = make_student(), make_course()
+        first = make_receipt(student, course)
+        second = make_receipt(student, course)
+        self.assertEqual((first.receipt_no, second.receipt_no), ("REC-000001", "REC-000002"))
+
+
+class ImageRenditionTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_upload_is_queued_and_renditions_are_upright_and_stripped(self):
+        from PIL import Image
+
+        # A landscape-encoded photo that EXIF says to rotate a quarter turn
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        exif[0x010F] = "PhoneMaker"
+        buffer = BytesIO()
+        Image.new("RGB", (1200, 800), "red").save(buffer, "JPEG", exif=exif)
+
+        student = make_student()
+        with self.captureOnCommitCallbacks(execute=True):
+            student.photo.save("asha.jpg", ContentFile(buffer.getvalue()))
+        job = RenderJob.objects.get(kind=RenderJob.Kind.STUDENT_PHOTO, object_id=student.pk)
+        self.assertEqual(job.content_type, "application/json")
+
+        record = process_image(RenderJob.Kind.STUDENT_PHOTO, student.pk)
+        self.assertEqual((record["thumb"]["width"], record["thumb"]["height"]), (107, 160))
+        with default_storage.open(record["medium"]["jpeg"]) as fh, Image.open(fh) as rendition:
+            self.assertEqual(rendition.size, (427, 640))
+            self.assertEqual(len(rendition.getexif()), 0)
+
+        student.refresh_from_db()
+        resp = APIClient().get(f"/api/v1/students/{student.pk}/")
+        self.assertTrue(resp.data["thumbnail"].endswith(record["thumb"]["webp"]))
+
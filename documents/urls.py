@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import RenderJobView
+
+urlpatterns = [
+    path("jobs/<uuid:job_id>/", RenderJobView.as_view(), name="render-job"),
+]
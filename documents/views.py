@@ -0,0 +1,36 @@
+from rest_framework import status
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from .models import RenderJob
+
+class RenderJobView(APIView):
+    """
+    Poll a render job. Returns 202 while it is queued or running and the
+    finished file once it is done. The job UUID acts as the access token,
+    as with public receipt links.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request, job_id):
+        job = get_object_or_404(RenderJob.objects.defer("result"), id=job_id)
+
+        if job.status in (RenderJob.Status.PENDING, RenderJob.Status.RUNNING):
+            return Response(
+                {"success": True, "job_id": str(job.id), "status": job.status},
+                status=status.HTTP_202_ACCEPTED,
+            )
+
+        if job.status == RenderJob.Status.FAILED:
+            return Response(
+                {"success": False, "job_id": str(job.id), "status": job.status,
+                 "message": "Unable to generate PDF."},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+        data = RenderJob.objects.values_list("result", flat=True).get(id=job.id)
+        response = HttpResponse(bytes(data), content_type=job.content_type)
+        response['Content-Disposition'] = f'attachment; filename="{job.filename}"'
+        return response
@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import FeesReceipt, Expense
+from .models import (
+    FeesReceipt, Expense, FeeLedger, DailyRevenue, DailyExpense,
+    CourseInstallment, EnrollmentInstallment, FeeReminderLog, AccountingPeriod, PeriodTotal,
+)
 
 @admin.register(FeesReceipt)
 class FeesReceiptAdmin(admin.ModelAdmin):
@@ -13,4 +16,73 @@ class FeesReceiptAdmin(admin.ModelAdmin):
 class ExpenseAdmin(admin.ModelAdmin):
     list_display = ("title", "category", "amount", "date", "recorded_by")
     list_filter = ("category", "date")
-    search_fields = ("title", "description")
\ No newline at end of file
+    search_fields = ("title", "description")
+
+@admin.register(FeeLedger)
+class FeeLedgerAdmin(admin.ModelAdmin):
+    list_display = ("student", "course", "total_fee", "total_paid", "balance", "last_payment_date")
+    list_filter = ("course",)
+    search_fields = ("student__reg_no", "student__user__first_name")
+    readonly_fields = ("enrollment", "student", "course", "total_fee", "total_paid", "balance", "last_payment_date", "updated_at")
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(DailyRevenue)
+class DailyRevenueAdmin(admin.ModelAdmin):
+    list_display = ("date", "mode", "course", "total", "count")
+    list_filter = ("mode", "course")
+    date_hierarchy = "date"
+
+    def has_add_permission(self, request):
+        return False
+
+@admin.register(DailyExpense)
+class DailyExpenseAdmin(admin.ModelAdmin):
+    list_display = ("date", "category", "total", "count")
+    list_filter = ("category",)
+    date_hierarchy = "date"
+
+    def has_add_permission(self, request):
+        return False
+
+@admin.register(CourseInstallment)
+class CourseInstallmentAdmin(admin.ModelAdmin):
+    list_display = ("course", "due_after_days", "amount")
+    list_filter = ("course",)
+
+@admin.register(EnrollmentInstallment)
+class EnrollmentInstallmentAdmin(admin.ModelAdmin):
+    list_display = ("enrollment", "due_date", "amount")
+    list_filter = ("due_date",)
+    search_fields = ("enrollment__student__reg_no", "enrollment__student__user__first_name")
+    raw_id_fields = ("enrollment",)
+
+@admin.register(FeeReminderLog)
+class FeeReminderLogAdmin(admin.ModelAdmin):
+    list_display = ("enrollment", "sent_on", "overdue_amount")
+    list_filter = ("sent_on",)
+    raw_id_fields = ("enrollment",)
+
+class PeriodTotalInline(admin.TabularInline):
+    model = PeriodTotal
+    extra = 0
+    can_delete = False
+    readonly_fields = ("kind", "mode", "course", "category", "total", "count")
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+@admin.register(AccountingPeriod)
+class AccountingPeriodAdmin(admin.ModelAdmin):
+    list_display = ("start", "end", "closed_at", "closed_by", "receipts_locked")
+    readonly_fields = ("start", "end", "closed_at", "closed_by", "receipts_locked")
+    inlines = [PeriodTotalInline]
+
+    def has_add_permission(self, request):
+        # Periods are closed through finance.periods.close_period so receipts get locked
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,154 @@
+"""
+Cached finance dashboard.
+
+The payload is stored in the Django cache under a key that includes the
+current month, so month_revenue/month_expense roll over on their own.
+Receipt and expense writes call invalidate_dashboard(), which bumps a
+generation counter rather than deleting the entry: the next request still
+gets the previous payload immediately (STALE) while one background thread
+recomputes it. Only a missing entry is computed in the request (MISS).
+The generation is a core.Counter row, so a write made by an import
+command or another worker marks every process's copy stale.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from core.counters import get_counter, increment, increment_on_commit
+from .models import FeesReceipt, Expense, FeeLedger, DailyRevenue, DailyExpense
+from .periods import combined_totals
+from datetime import timedelta
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+PAYLOAD_KEY = "finance:dashboard:{:%Y-%m}"
+GENERATION_KEY = "finance:dashboard:generation"
+LOCK_KEY = "finance:dashboard:refreshing"
+RECOMPUTE_KEY = "finance:dashboard:recomputes"
+
+
+def build_dashboard(today):
+    month_start = today.replace(day=1)
+    next_month = (month_start + timedelta(days=32)).replace(day=1)
+
+    # 1. Summary Cards: closed periods from their snapshot, the rest from the daily rollups
+    totals = combined_totals()["totals"]
+    total_revenue = totals["revenue"]
+    total_expense = totals["expense"]
+
+    month_revenue = DailyRevenue.objects.filter(
+        date__gte=month_start, date__lt=next_month
+    ).aggregate(Sum('total'))['total__sum'] or 0
+
+    month_expense = DailyExpense.objects.filter(
+        date__gte=month_start, date__lt=next_month
+    ).aggregate(Sum('total'))['total__sum'] or 0
+
+    total_outstanding = FeeLedger.objects.filter(
+        enrollment__status='active', balance__gt=0
+    ).aggregate(Sum('balance'))['balance__sum'] or 0
+
+    # 2. Revenue Chart Data (Last 6 months)
+    revenue_by_month = (
+        DailyRevenue.objects.annotate(month=TruncMonth('date'))
+        .values('month')
+        .annotate(total=Sum('total'))
+        .order_by('-month')[:6]
+    )
+
+    chart_data = []
+    for entry in revenue_by_month:
+        chart_data.append({
+            "month": entry['month'].strftime("%b %Y"),
+            "revenue": entry['total']
+        })
+    chart_data.reverse()
+
+    # 3. Recent Transactions
+    recent_receipts = FeesReceipt.objects.select_related('student__user').order_by('-created_at')[:5]
+    recent_expenses = Expense.objects.order_by('-created_at')[:5]
+
+    transactions = []
+    for r in recent_receipts:
+        transactions.append({
+            "type": "credit",
+            "description": f"Fees: {r.student.user.get_full_name()}",
+            "amount": r.amount,
+            "date": r.date
+        })
+    for e in recent_expenses:
+        transactions.append({
+            "type": "debit",
+            "description": f"Exp: {e.title}",
+            "amount": e.amount,
+            "date": e.date
+        })
+
+    # Sort combined list by date desc
+    transactions.sort(key=lambda x: x['date'], reverse=True)
+
+    return {
+        "summary": {
+            "total_revenue": total_revenue,
+            "total_expense": total_expense,
+            "net_income": total_revenue - total_expense,
+            "month_revenue": month_revenue,
+            "month_expense": month_expense,
+            "total_outstanding": total_outstanding
+        },
+        "chart_data": chart_data,
+        "recent_transactions": transactions[:10]
+    }
+
+
+def invalidate_dashboard():
+    """Mark the cached dashboard stale. Called from finance write paths."""
+    # After commit, so a refresh can never cache the pre-write numbers as fresh
+    increment_on_commit(GENERATION_KEY)
+
+
+def recompute_count():
+    return get_counter(RECOMPUTE_KEY)
+
+
+def _recompute(today):
+    # Read the generation first: a write landing mid-build leaves the entry stale
+    generation = get_counter(GENERATION_KEY)
+    payload = build_dashboard(today)
+    cache.set(PAYLOAD_KEY.format(today), (generation, payload), timeout=settings.FINANCE_DASHBOARD_CACHE_SECONDS)
+    increment(RECOMPUTE_KEY)
+    return payload
+
+
+def _refresh_in_background(today):
+    def run():
+        try:
+            _recompute(today)
+        except Exception:
+            logger.exception("Finance dashboard refresh failed")
+        finally:
+            cache.delete(LOCK_KEY)
+            connections.close_all()
+
+    threading.Thread(target=run, name="finance-dashboard-refresh", daemon=True).start()
+
+
+def get_dashboard():
+    """Return (payload, cache_status) where cache_status is HIT, STALE or MISS."""
+    today = timezone.localdate()
+    cached = cache.get(PAYLOAD_KEY.format(today))
+    if cached is None:
+        return _recompute(today), "MISS"
+
+    generation, payload = cached
+    if generation == get_counter(GENERATION_KEY):
+        return payload, "HIT"
+
+    # Stale: serve it now and let a single thread rebuild it
+    if cache.add(LOCK_KEY, 1, timeout=60):
+        _refresh_in_background(today)
+    return payload, "STALE"
@@ -0,0 +1,81 @@
+from django.conf import settings
+from documents.models import RenderJob
+from documents.pool import imap_bounded, render_object, shared_render_pool
+from io import BytesIO
+import logging
+import zipfile
+
+logger = logging.getLogger(__name__)
+
+
+class _StreamSink:
+    """
+    Write-only file object for ZipFile. Bytes written by the archive are
+    handed back to the response generator via drain().
+    """
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _rendered_receipts(receipt_ids):
+    """
+    Yield (receipt_id, pdf_bytes, filename, error) in order, rendered in
+    parallel on the process's shared render pool.
+    """
+    tasks = ((RenderJob.Kind.RECEIPT, receipt_id) for receipt_id in receipt_ids)
+    yield from imap_bounded(shared_render_pool(), render_object, tasks, window=settings.RENDER_POOL_PROCESSES * 2)
+
+
+def stream_receipts_zip(receipt_ids):
+    """
+    Generator of ZIP archive bytes. Each receipt is written to the archive,
+    and flushed to the client, as soon as it has been rendered; only the
+    receipts in flight are held in memory.
+    """
+    sink = _StreamSink()
+    # PDFs are already compressed; storing them keeps the parent process cheap
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as archive:
+        for receipt_id, data, filename, error in _rendered_receipts(receipt_ids):
+            if error:
+                logger.error(f"Bulk export: receipt {receipt_id} failed to render: {error}")
+                archive.writestr(f"errors/receipt_{receipt_id}.txt", error)
+            else:
+                archive.writestr(filename, data)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def merge_receipts_pdf(receipt_ids):
+    """
+    One PDF containing every receipt, as bytes.
+
+    This is not streamed: a PDF's cross-reference table can only be written
+    once every object is known, so the document is assembled in memory after
+    the last render and memory grows with the batch. The view caps it at
+    RECEIPT_EXPORT_MERGE_LIMIT receipts; only the ZIP export streams.
+    """
+    from pypdf import PdfReader, PdfWriter
+
+    writer = PdfWriter()
+    for receipt_id, data, filename, error in _rendered_receipts(receipt_ids):
+        if error:
+            logger.error(f"Bulk export: receipt {receipt_id} failed to render: {error}")
+            continue
+        writer.append(PdfReader(BytesIO(data)))
+
+    buffer = BytesIO()
+    writer.write(buffer)
+    writer.close()
+    return buffer.getvalue()
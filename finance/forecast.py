@@ -0,0 +1,151 @@
+"""
+Fee collection forecast.
+
+Historic receipts give, per course, how a payment is spread over the
+weeks after enrollment (the payment-lag distribution, weighted by amount).
+Each active enrollment with a balance is then expected to pay that
+balance following its course's distribution, conditioned on the weeks
+already elapsed since it enrolled. Balances whose course has never been
+paid that late are reported as unscheduled.
+
+Everything is loaded with one query per input into NumPy arrays and
+computed without a per-enrollment loop. The result is cached until the
+next receipt, enrollment or fee change is committed, in any process (see
+invalidate_forecast() and core.counters).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.utils import timezone
+from core.counters import get_counter, increment_on_commit
+from courses.models import Course, Enrollment
+from .models import FeesReceipt, FeeLedger
+from datetime import timedelta
+import numpy as np
+
+FORECAST_KEY = "finance:forecast:{generation}:{today:%Y-%m-%d}:{months}"
+GENERATION_KEY = "finance:forecast:generation"
+MAX_MONTHS = 12
+
+
+def weeks_for_months(months):
+    return int(np.ceil(months * 365.25 / 12 / 7))
+
+
+def _load_history():
+    """
+    (course_id, lag_days, amount, receipt count) arrays of the receipts tied to
+    an enrollment, summed in SQL per course, payment date and enrollment date.
+    """
+    enrolled_on = Enrollment.objects.filter(
+        student=OuterRef("student"), course=OuterRef("course")
+    ).values("enrolled_on")[:1]
+    rows = list(
+        FeesReceipt.objects.filter(course__isnull=False)
+        .annotate(enrolled_on=Subquery(enrolled_on))
+        .exclude(enrolled_on=None)
+        .values("course_id", "date", "enrolled_on")
+        .annotate(total=Sum("amount"), count=Count("id"))
+        .values_list("course_id", "date", "enrolled_on", "total", "count")
+        .order_by()
+    )
+    if not rows:
+        return np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0), 0
+    course_id, paid_on, enrolled, amount, count = zip(*rows)
+    lag = (np.array(paid_on, dtype="datetime64[D]") - np.array(enrolled, dtype="datetime64[D]")).astype(np.int64)
+    return np.array(course_id, np.int64), np.maximum(lag, 0), np.array(amount, np.float64), sum(count)
+
+
+def _load_balances():
+    """(course_id, enrolled_on, balance) arrays for active enrollments that still owe fees."""
+    rows = list(
+        FeeLedger.objects.filter(enrollment__status=Enrollment.Status.ACTIVE, balance__gt=0)
+        .values_list("course_id", "enrollment__enrolled_on", "balance")
+        .order_by()
+    )
+    if not rows:
+        return np.empty(0, np.int64), np.empty(0, "datetime64[D]"), np.empty(0)
+    course_id, enrolled, balance = zip(*rows)
+    return np.array(course_id, np.int64), np.array(enrolled, dtype="datetime64[D]"), np.array(balance, np.float64)
+
+
+def build_forecast(today, months=3):
+    weeks = weeks_for_months(months)
+    hist_course, hist_lag, hist_amount, receipt_count = _load_history()
+    bal_course, bal_enrolled, balance = _load_balances()
+
+    course_ids = np.union1d(hist_course, bal_course)
+    n_courses = len(course_ids)
+    hist_idx = np.searchsorted(course_ids, hist_course)
+    bal_idx = np.searchsorted(course_ids, bal_course)
+
+    age = ((np.datetime64(today, "D") - bal_enrolled).astype(np.int64) // 7).clip(min=0)
+    max_lag = int(hist_lag.max()) // 7 + 1 if len(hist_lag) else 1
+    width = max(max_lag, int(age.max()) + 1 if len(age) else 0) + weeks
+
+    # Amount paid per course per lag week, with the all-course total as the
+    # last row for courses that have no payment history of their own
+    lag_hist = np.zeros((n_courses + 1, width))
+    np.add.at(lag_hist, (hist_idx, hist_lag // 7), hist_amount)
+    lag_hist[n_courses] = lag_hist[:n_courses].sum(axis=0)
+    has_history = lag_hist[:n_courses].sum(axis=1) > 0
+    row = np.where(has_history[bal_idx], bal_idx, n_courses) if n_courses else bal_idx
+
+    # Still-to-come mass from each lag week onwards
+    tail = np.cumsum(lag_hist[:, ::-1], axis=1)[:, ::-1]
+    remaining = tail[row, age]
+    scheduled = remaining > 0
+    scale = np.divide(balance, remaining, out=np.zeros_like(balance), where=scheduled)
+
+    # Expected payment of every enrollment in each forecast week
+    expected = lag_hist[row[:, None], age[:, None] + np.arange(weeks)] * scale[:, None]
+
+    per_course = np.zeros((n_courses, weeks))
+    np.add.at(per_course, bal_idx, expected)
+    weekly = per_course.sum(axis=0)
+    unscheduled = float(balance[~scheduled].sum())
+
+    titles = dict(Course.objects.filter(id__in=course_ids.tolist()).values_list("id", "title"))
+    by_course = [
+        {
+            "course_id": int(cid),
+            "course__title": titles.get(int(cid)),
+            "expected": round(float(per_course[i].sum()), 2),
+            "outstanding": round(float(balance[bal_idx == i].sum()), 2),
+        }
+        for i, cid in enumerate(course_ids)
+        if (bal_idx == i).any()
+    ]
+    by_course.sort(key=lambda r: r["expected"], reverse=True)
+
+    return {
+        "as_of": today,
+        "months": months,
+        "enrollments": int(len(balance)),
+        "receipts_used": receipt_count,
+        "outstanding": round(float(balance.sum()), 2),
+        "expected_total": round(float(weekly.sum()), 2),
+        "unscheduled": round(unscheduled, 2),
+        "weeks": [
+            {"week_start": today + timedelta(weeks=w), "expected": round(float(weekly[w]), 2)}
+            for w in range(weeks)
+        ],
+        "by_course": by_course,
+    }
+
+
+def invalidate_forecast():
+    """Drop the cached forecast once the current transaction commits."""
+    increment_on_commit(GENERATION_KEY)
+
+
+def get_forecast(months=3):
+    """Return (payload, cache_status) where cache_status is HIT or MISS."""
+    today = timezone.localdate()
+    key = FORECAST_KEY.format(generation=get_counter(GENERATION_KEY), today=today, months=months)
+    payload = cache.get(key)
+    if payload is not None:
+        return payload, "HIT"
+    payload = build_forecast(today, months)
+    cache.set(key, payload, timeout=settings.FINANCE_FORECAST_CACHE_SECONDS)
+    return payload, "MISS"
@@ -0,0 +1,225 @@
+"""
+Batched CSV import for fee receipts and expenses.
+
+Rows are read as a stream and processed in chunks. Each chunk costs a
+fixed number of queries: one lookup per referenced table, one set-based
+enrollment check and one bulk insert. Memory is bounded by the chunk
+size, not the file size. Bad rows are reported by line number and never
+stop the good rows from being imported.
+"""
+from django.db import transaction
+from documents.sequences import RECEIPT_SERIES, allocate_block, format_receipt_no
+from students.models import Student
+from courses.models import Course, Enrollment
+from .models import FeesReceipt, Expense
+from .ledger import refresh_ledgers
+from .rollups import refresh_expenses, refresh_revenue
+from .dashboard import invalidate_dashboard
+from .forecast import invalidate_forecast
+from .periods import closed_ranges, in_closed_range
+from datetime import date
+from decimal import Decimal, InvalidOperation
+import csv
+import itertools
+
+RECEIPT_COLUMNS = ["reg_no", "course_code", "amount", "date", "mode", "txn_id", "remarks"]
+EXPENSE_COLUMNS = ["category", "title", "amount", "date", "description"]
+# Receipt and expense amounts are both DecimalField(max_digits=10, decimal_places=2)
+_amount_field = FeesReceipt._meta.get_field("amount")
+AMOUNT_LIMIT = Decimal(10) ** (_amount_field.max_digits - _amount_field.decimal_places)
+
+
+class ImportReport:
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.total_rows = 0
+        self.created = 0
+        self.errors = []
+
+    def add_error(self, line, messages):
+        self.errors.append({"line": line, "errors": messages})
+
+    def as_dict(self):
+        return {
+            "dry_run": self.dry_run,
+            "total_rows": self.total_rows,
+            "created": self.created,
+            "failed": len(self.errors),
+            "errors": self.errors,
+        }
+
+
+def _choice_lookup(choices):
+    """Map lower-cased values and labels to the stored choice value."""
+    lookup = {}
+    for key, label in choices:
+        lookup[key.lower()] = key
+        lookup[label.lower()] = key
+    return lookup
+
+
+PAYMENT_MODES = _choice_lookup(FeesReceipt.PaymentMode.choices)
+EXPENSE_CATEGORIES = _choice_lookup(Expense.Category.choices)
+
+
+def _parse_common(row, errors, closed=()):
+    amount = None
+    try:
+        amount = Decimal((row.get("amount") or "").strip().replace(",", ""))
+        if not amount.is_finite():
+            raise InvalidOperation
+        if amount < 0:
+            errors.append("amount must not be negative.")
+        elif amount >= AMOUNT_LIMIT:
+            # Would otherwise fail the whole chunk's insert with a DataError
+            errors.append(f"amount must be less than {AMOUNT_LIMIT:,}.")
+        elif amount != amount.quantize(Decimal("0.01")):
+            errors.append("amount has more than 2 decimal places.")
+        else:
+            amount = amount.quantize(Decimal("0.01"))
+    except InvalidOperation:
+        errors.append("amount is not a number.")
+
+    parsed_date = None
+    try:
+        parsed_date = date.fromisoformat((row.get("date") or "").strip())
+    except ValueError:
+        errors.append("date must be YYYY-MM-DD.")
+    if parsed_date and in_closed_range(parsed_date, closed):
+        errors.append("date falls in a closed accounting period.")
+
+    return amount, parsed_date
+
+
+def _chunks(reader, size):
+    # csv line numbers start at 2: line 1 is the header
+    numbered = enumerate(reader, start=2)
+    while chunk := list(itertools.islice(numbered, size)):
+        yield chunk
+
+
+def _reader(stream, required):
+    reader = csv.DictReader(stream)
+    headers = [h.strip() for h in (reader.fieldnames or [])]
+    missing = [c for c in required if c not in headers]
+    if missing:
+        raise ValueError(f"CSV is missing required column(s): {', '.join(missing)}")
+    reader.fieldnames = headers
+    return reader
+
+
+def import_receipts(stream, user=None, chunk_size=1000, dry_run=False):
+    """Import fee receipts from a text stream of CSV rows (see RECEIPT_COLUMNS)."""
+    reader = _reader(stream, ["reg_no", "course_code", "amount", "date"])
+    report = ImportReport(dry_run=dry_run)
+    closed = closed_ranges()
+
+    for chunk in _chunks(reader, chunk_size):
+        report.total_rows += len(chunk)
+
+        reg_nos = {(row.get("reg_no") or "").strip() for _, row in chunk}
+        codes = {(row.get("course_code") or "").strip() for _, row in chunk}
+        students = dict(Student.objects.filter(reg_no__in=reg_nos).values_list("reg_no", "id"))
+        courses = dict(Course.objects.filter(code__in=codes).values_list("code", "id"))
+        enrolled = set(
+            Enrollment.objects.filter(
+                student_id__in=students.values(), course_id__in=courses.values()
+            ).values_list("student_id", "course_id")
+        )
+
+        receipts = []
+        for line, row in chunk:
+            errors = []
+            amount, paid_on = _parse_common(row, errors, closed)
+
+            student_id = students.get((row.get("reg_no") or "").strip())
+            course_id = courses.get((row.get("course_code") or "").strip())
+            if student_id is None:
+                errors.append(f"Unknown student reg_no '{row.get('reg_no')}'.")
+            if course_id is None:
+                errors.append(f"Unknown course code '{row.get('course_code')}'.")
+            if student_id and course_id and (student_id, course_id) not in enrolled:
+                errors.append("Student is not enrolled in this course.")
+
+            mode = FeesReceipt.PaymentMode.CASH
+            if (row.get("mode") or "").strip():
+                mode = PAYMENT_MODES.get(row["mode"].strip().lower())
+                if mode is None:
+                    errors.append(f"Unknown payment mode '{row['mode']}'.")
+
+            if errors:
+                report.add_error(line, errors)
+                continue
+
+            receipts.append(FeesReceipt(
+                student_id=student_id,
+                course_id=course_id,
+                amount=amount,
+                date=paid_on,
+                mode=mode,
+                txn_id=(row.get("txn_id") or "").strip()[:100],
+                remarks=(row.get("remarks") or "").strip(),
+                posted_by=user,
+            ))
+
+        if receipts and not dry_run:
+            with transaction.atomic():
+                # Numbers are reserved in the insert's transaction to keep REC gap-free
+                numbers = allocate_block(RECEIPT_SERIES, len(receipts))
+                for receipt, number in zip(receipts, numbers):
+                    receipt.receipt_no = format_receipt_no(number)
+                FeesReceipt.objects.bulk_create(receipts, batch_size=chunk_size)
+                # bulk_create skips post_save, so bring the ledger up to date here
+                refresh_ledgers({(r.student_id, r.course_id) for r in receipts})
+                refresh_revenue({r.date for r in receipts})
+        report.created += len(receipts)
+
+    if report.created and not dry_run:
+        invalidate_dashboard()
+        invalidate_forecast()
+    return report
+
+
+def import_expenses(stream, user=None, chunk_size=1000, dry_run=False):
+    """Import expenses from a text stream of CSV rows (see EXPENSE_COLUMNS)."""
+    reader = _reader(stream, ["category", "title", "amount", "date"])
+    report = ImportReport(dry_run=dry_run)
+    closed = closed_ranges()
+
+    for chunk in _chunks(reader, chunk_size):
+        report.total_rows += len(chunk)
+
+        expenses = []
+        for line, row in chunk:
+            errors = []
+            amount, spent_on = _parse_common(row, errors, closed)
+
+            category = EXPENSE_CATEGORIES.get((row.get("category") or "").strip().lower())
+            if category is None:
+                errors.append(f"Unknown category '{row.get('category')}'.")
+            title = (row.get("title") or "").strip()
+            if not title:
+                errors.append("title is required.")
+
+            if errors:
+                report.add_error(line, errors)
+                continue
+
+            expenses.append(Expense(
+                category=category,
+                title=title[:200],
+                amount=amount,
+                date=spent_on,
+                description=(row.get("description") or "").strip(),
+                recorded_by=user,
+            ))
+
+        if expenses and not dry_run:
+            with transaction.atomic():
+                Expense.objects.bulk_create(expenses, batch_size=chunk_size)
+                refresh_expenses({e.date for e in expenses})
+        report.created += len(expenses)
+
+    if report.created and not dry_run:
+        invalidate_dashboard()
+    return report
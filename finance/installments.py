@@ -0,0 +1,130 @@
+"""
+Installment schedules and overdue detection.
+
+A course's CourseInstallment rows are a template. They are copied into
+EnrollmentInstallment rows, with absolute due dates, when a student
+enrolls. overdue_enrollments() then finds every enrollment behind on its
+schedule in one query: a window function gives each installment the
+cumulative amount due up to it. That total is compared with the cumulative
+amount paid, which FeeLedger.total_paid keeps in step with the receipts.
+"""
+from django.db import transaction
+from django.db.models import DecimalField, Exists, F, OuterRef, Sum, Value, Window
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from courses.models import Enrollment
+from notifications.models import Notification
+from .models import CourseInstallment, EnrollmentInstallment, FeeReminderLog
+from datetime import timedelta
+from decimal import Decimal
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def materialize_installments(enrollments):
+    """
+    Copy the course schedule onto enrollments that have none yet.
+    `enrollments` is an Enrollment queryset; returns the rows created.
+    """
+    pending = enrollments.exclude(
+        Exists(EnrollmentInstallment.objects.filter(enrollment=OuterRef("pk")))
+    ).filter(
+        Exists(CourseInstallment.objects.filter(course=OuterRef("course")))
+    ).values("id", "course_id", "enrolled_on")
+
+    templates = {}
+    for row in CourseInstallment.objects.filter(course_id__in=pending.values("course_id")).values(
+        "course_id", "due_after_days", "amount"
+    ):
+        templates.setdefault(row["course_id"], []).append(row)
+
+    rows = [
+        EnrollmentInstallment(
+            enrollment_id=e["id"],
+            due_date=e["enrolled_on"] + timedelta(days=t["due_after_days"]),
+            amount=t["amount"],
+        )
+        for e in pending.iterator(chunk_size=2000)
+        for t in templates.get(e["course_id"], [])
+    ]
+    EnrollmentInstallment.objects.bulk_create(rows, batch_size=2000)
+    return len(rows)
+
+
+def overdue_enrollments(today=None):
+    """
+    {enrollment_id: {"overdue": amount, "since": first missed due date}} for
+    active enrollments whose payments trail the amount due by `today`.
+    """
+    today = today or timezone.localdate()
+    due = (
+        EnrollmentInstallment.objects.filter(enrollment__status=Enrollment.Status.ACTIVE)
+        .annotate(
+            due_to_date=Window(
+                Sum("amount"),
+                partition_by=[F("enrollment_id")],
+                order_by=[F("due_date").asc(), F("id").asc()],
+            ),
+            paid=Coalesce(
+                F("enrollment__fee_ledger__total_paid"), Value(Decimal("0")), output_field=DecimalField()
+            ),
+        )
+        .filter(due_date__lte=today, due_to_date__gt=F("paid"))
+        .values_list("enrollment_id", "due_date", "due_to_date", "paid")
+        .order_by()
+    )
+
+    overdue = {}
+    for enrollment_id, due_date, due_to_date, paid in due:
+        entry = overdue.setdefault(enrollment_id, {"overdue": Decimal("0"), "since": due_date})
+        # Rows of one enrollment share `paid`; the latest cumulative total wins
+        entry["overdue"] = max(entry["overdue"], due_to_date - paid)
+        entry["since"] = min(entry["since"], due_date)
+    for entry in overdue.values():
+        entry["overdue"] = Decimal(entry["overdue"]).quantize(Decimal("0.01"))
+    return overdue
+
+
+def send_overdue_reminders(today=None, min_interval_days=7, dry_run=False):
+    """
+    Notify every student with an overdue installment, at most once per
+    `min_interval_days` (and never twice on the same day).
+    Returns (overdue_count, reminded_count).
+    """
+    today = today or timezone.localdate()
+    overdue = overdue_enrollments(today)
+    if not overdue:
+        return 0, 0
+
+    recently_reminded = set(
+        FeeReminderLog.objects.filter(
+            enrollment_id__in=overdue.keys(),
+            sent_on__gt=today - timedelta(days=max(min_interval_days, 1)),
+        ).values_list("enrollment_id", flat=True)
+    )
+    due_now = [eid for eid in overdue if eid not in recently_reminded]
+    if dry_run or not due_now:
+        return len(overdue), len(due_now)
+
+    enrollments = Enrollment.objects.filter(id__in=due_now).values("id", "student__user_id", "course__title")
+    notifications, logs = [], []
+    for e in enrollments.iterator(chunk_size=2000):
+        info = overdue[e["id"]]
+        notifications.append(Notification(
+            recipient_id=e["student__user_id"],
+            title="Fee installment overdue",
+            message=(
+                f"₹{info['overdue']} of your {e['course__title']} fees has been due since "
+                f"{info['since']:%d %b %Y}. Please pay at the office or online."
+            ),
+        ))
+        logs.append(FeeReminderLog(enrollment_id=e["id"], sent_on=today, overdue_amount=info["overdue"]))
+
+    with transaction.atomic():
+        # The unique (enrollment, sent_on) constraint stops a concurrent run double-sending
+        FeeReminderLog.objects.bulk_create(logs, batch_size=2000)
+        Notification.objects.bulk_create(notifications, batch_size=2000)
+
+    logger.info("Sent %d overdue fee reminder(s); %d enrollment(s) overdue", len(logs), len(overdue))
+    return len(overdue), len(logs)
@@ -0,0 +1,123 @@
+"""
+Maintenance of the FeeLedger table.
+
+Every write path calls refresh_ledgers() with the (student_id, course_id)
+pairs it touched. A refresh is set-based: one grouped aggregate over the
+receipts of those pairs and one upsert, whatever the number of pairs.
+rebuild_ledgers() runs the same computation over every enrollment for
+reconciliation.
+
+A refresh locks the enrollments' ledger rows before summing, so two
+receipts saved at once for the same enrollment take turns and the second
+sums with the first one's amount (see attendance.tallies).
+"""
+from django.db import transaction
+from django.db.models import F, Max, Sum
+from courses.models import Enrollment
+from .models import FeesReceipt, FeeLedger
+from decimal import Decimal
+
+LEDGER_UPDATE_FIELDS = ["student", "course", "total_fee", "total_paid", "balance", "last_payment_date", "updated_at"]
+
+
+def _compute(enrollments, receipts):
+    """Build FeeLedger rows from enrollment dicts and a receipts queryset."""
+    paid = {
+        (row["student_id"], row["course_id"]): (row["total"], row["last"])
+        for row in receipts.values("student_id", "course_id").annotate(total=Sum("amount"), last=Max("date"))
+    }
+    rows = []
+    for e in enrollments:
+        total_paid, last_date = paid.get((e["student_id"], e["course_id"]), (Decimal("0"), None))
+        rows.append(FeeLedger(
+            enrollment_id=e["id"],
+            student_id=e["student_id"],
+            course_id=e["course_id"],
+            total_fee=e["course__total_fees"],
+            total_paid=total_paid,
+            balance=e["course__total_fees"] - total_paid,
+            last_payment_date=last_date,
+        ))
+    return rows
+
+
+def _upsert(rows, batch_size=1000):
+    FeeLedger.objects.bulk_create(
+        rows,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=["enrollment"],
+        update_fields=LEDGER_UPDATE_FIELDS,
+    )
+
+
+def _lock(enrollments):
+    """Create missing ledger rows, then lock all of them (in key order) until commit."""
+    FeeLedger.objects.bulk_create(
+        [FeeLedger(enrollment_id=e["id"], student_id=e["student_id"], course_id=e["course_id"])
+         for e in enrollments],
+        ignore_conflicts=True,
+    )
+    list(
+        FeeLedger.objects.select_for_update()
+        .filter(enrollment_id__in=[e["id"] for e in enrollments])
+        .order_by("enrollment_id").values_list("enrollment_id", flat=True)
+    )
+
+
+def refresh_ledgers(pairs):
+    """Recompute the ledger rows for the given (student_id, course_id) pairs."""
+    pairs = {(s, c) for s, c in pairs if s and c}
+    if not pairs:
+        return
+
+    student_ids = {s for s, _ in pairs}
+    course_ids = {c for _, c in pairs}
+    enrollments = [
+        e for e in Enrollment.objects.filter(student_id__in=student_ids, course_id__in=course_ids)
+        .values("id", "student_id", "course_id", "course__total_fees")
+        if (e["student_id"], e["course_id"]) in pairs
+    ]
+    if not enrollments:
+        return
+
+    receipts = FeesReceipt.objects.filter(student_id__in=student_ids, course_id__in=course_ids)
+    with transaction.atomic():
+        _lock(enrollments)
+        _upsert(_compute(enrollments, receipts))
+
+
+def apply_course_fee(course):
+    """Re-price every ledger row of a course after Course.total_fees changes."""
+    return FeeLedger.objects.filter(course=course).exclude(total_fee=course.total_fees).update(
+        total_fee=course.total_fees,
+        balance=course.total_fees - F("total_paid"),
+    )
+
+
+def expected_ledgers():
+    enrollments = Enrollment.objects.values("id", "student_id", "course_id", "course__total_fees").order_by("id")
+    return _compute(enrollments.iterator(chunk_size=2000), FeesReceipt.objects.all())
+
+
+def rebuild_ledgers():
+    """Rebuild the whole table from receipts. Returns the number of rows written."""
+    # Rows of deleted enrollments go with them (CASCADE), so an upsert is enough
+    rows = expected_ledgers()
+    with transaction.atomic():
+        _upsert(rows)
+    return len(rows)
+
+
+def find_mismatches():
+    """Ledger rows that disagree with the receipts, as (expected, stored) pairs."""
+    stored = {row.enrollment_id: row for row in FeeLedger.objects.all()}
+    mismatches = []
+    for expected in expected_ledgers():
+        current = stored.pop(expected.enrollment_id, None)
+        if current is None or (
+            current.total_fee, current.total_paid, current.balance, current.last_payment_date
+        ) != (expected.total_fee, expected.total_paid, expected.balance, expected.last_payment_date):
+            mismatches.append((expected, current))
+    mismatches.extend((None, orphan) for orphan in stored.values())
+    return mismatches
@@ -0,0 +1,82 @@
+from django.core.management.base import BaseCommand, CommandError
+from documents.pool import render_pool
+import time
+
+ENGINES = ("weasyprint", "native")
+
+
+def _benchmark_engine(args):
+    """Runs in a fresh spawned process, so ru_maxrss is this engine's peak alone."""
+    engine, receipt_ids = args
+    from finance.models import FeesReceipt
+    from finance.receipt_pdf import Unsupported, render_receipt
+    from finance.utils import INSTITUTE_CONTEXT, _generate_weasyprint_pdf
+    import resource
+
+    # The native engine is called directly: generate_receipt_pdf() would quietly
+    # time WeasyPrint for the receipts it hands over
+    render = (lambda r: render_receipt(r, INSTITUTE_CONTEXT)) if engine == "native" else _generate_weasyprint_pdf
+    receipts = list(FeesReceipt.objects.select_related("student__user", "course").filter(id__in=receipt_ids))
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    size = failed = unsupported = 0
+    for receipt in receipts:
+        try:
+            data = render(receipt)
+        except Unsupported:
+            unsupported += 1
+            continue
+        except Exception:
+            data = None
+        if data:
+            size += len(data)
+        else:
+            failed += 1
+    elapsed = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux
+    return engine, len(receipts), elapsed, baseline / 1024, peak / 1024, size, failed, unsupported
+
+
+class Command(BaseCommand):
+    help = "Compare receipt PDF engines: renders per second and peak memory of the rendering process."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--receipts", type=int, default=200,
+                            help="Number of receipts (the most recent) to render per engine.")
+        parser.add_argument("--engines", default=",".join(ENGINES),
+                            help="Comma-separated engines to benchmark.")
+
+    def handle(self, *args, **options):
+        from finance.models import FeesReceipt
+
+        engines = [e.strip() for e in options["engines"].split(",") if e.strip()]
+        unknown = set(engines) - set(ENGINES)
+        if unknown:
+            raise CommandError(f"Unknown engine(s): {', '.join(sorted(unknown))}")
+        receipt_ids = list(FeesReceipt.objects.order_by("-id").values_list("id", flat=True)[:options["receipts"]])
+        if not receipt_ids:
+            raise CommandError("There are no receipts to render.")
+
+        self.stdout.write(
+            f"{'engine':>10} {'renders':>8} {'seconds':>9} {'renders/s':>10} "
+            f"{'base MB':>8} {'peak MB':>8} {'avg KB':>7}  failed  unsupported"
+        )
+        for engine in engines:
+            # One single-process pool per engine keeps their memory apart
+            with render_pool(1) as pool:
+                name, count, elapsed, base_mb, peak_mb, size, failed, unsupported = pool.apply(
+                    _benchmark_engine, ((engine, receipt_ids),)
+                )
+            # Renders per second counts the receipts this engine actually drew
+            rendered = count - failed - unsupported
+            self.stdout.write(
+                f"{name:>10} {rendered:>8} {elapsed:>9.2f} {rendered / elapsed if elapsed else 0:>10.1f} "
+                f"{base_mb:>8.1f} {peak_mb:>8.1f} {size / 1024 / max(rendered, 1):>7.1f}  "
+                f"{failed:>6}  {unsupported:>11}"
+            )
+        if "native" in engines:
+            self.stdout.write(
+                "Unsupported receipts are rendered with WeasyPrint in production; "
+                "see finance.receipt_pdf for the scope."
+            )
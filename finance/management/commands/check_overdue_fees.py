@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from courses.models import Enrollment
+from finance.installments import materialize_installments, send_overdue_reminders
+from datetime import date
+import time
+
+
+class Command(BaseCommand):
+    help = (
+        "Find enrollments behind on their installment schedule and notify the students. "
+        "Safe to run more than once a day."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", help="Evaluate as of this day (YYYY-MM-DD). Defaults to today.")
+        parser.add_argument("--interval", type=int, default=7,
+                            help="Minimum days between reminders to the same enrollment.")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Report what would be sent without writing anything.")
+
+    def handle(self, *args, **options):
+        try:
+            today = date.fromisoformat(options["date"]) if options["date"] else None
+        except ValueError:
+            raise CommandError("--date must be YYYY-MM-DD.")
+
+        started = time.perf_counter()
+        if not options["dry_run"]:
+            # Enrollments that predate their course's schedule get it now
+            created = materialize_installments(Enrollment.objects.filter(status=Enrollment.Status.ACTIVE))
+            if created:
+                self.stdout.write(f"Scheduled {created} installment(s) for existing enrollments.")
+
+        overdue, reminded = send_overdue_reminders(
+            today=today, min_interval_days=options["interval"], dry_run=options["dry_run"]
+        )
+        verb = "would be reminded" if options["dry_run"] else "reminded"
+        self.stdout.write(self.style.SUCCESS(
+            f"{overdue} enrollment(s) overdue, {reminded} {verb} "
+            f"({time.perf_counter() - started:.2f}s)."
+        ))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from finance.dashboard import invalidate_dashboard
+from finance.periods import close_period
+from datetime import date
+
+
+class Command(BaseCommand):
+    help = "Close an accounting period: lock its receipts and freeze its totals."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", required=True, help="First day of the period (YYYY-MM-DD).")
+        parser.add_argument("--end", required=True, help="Last day of the period (YYYY-MM-DD).")
+        parser.add_argument("--user", help="Username recorded as closed_by.")
+        parser.add_argument("--notes", default="")
+
+    def handle(self, *args, **options):
+        try:
+            start = date.fromisoformat(options["start"])
+            end = date.fromisoformat(options["end"])
+        except ValueError:
+            raise CommandError("Dates must be YYYY-MM-DD.")
+
+        user = None
+        if options["user"]:
+            User = get_user_model()
+            try:
+                user = User.objects.get(username=options["user"])
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['user']}' does not exist.")
+
+        try:
+            period = close_period(start, end, user=user, notes=options["notes"])
+        except ValueError as e:
+            raise CommandError(str(e))
+        invalidate_dashboard()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Closed {period}: {period.receipts_locked} receipt(s) locked, "
+            f"{period.totals.count()} total row(s) frozen."
+        ))
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from finance.importers import import_receipts, import_expenses
+import csv
+import time
+
+IMPORTERS = {
+    "receipts": import_receipts,
+    "expenses": import_expenses,
+}
+
+
+class Command(BaseCommand):
+    help = "Bulk import fee receipts or expenses from a CSV file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=IMPORTERS.keys())
+        parser.add_argument("path", help="CSV file with a header row.")
+        parser.add_argument("--user", help="Username recorded as posted_by / recorded_by.")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--dry-run", action="store_true", help="Validate only; save nothing.")
+        parser.add_argument("--errors-out", help="Write the per-row error report to this CSV file.")
+
+    def handle(self, *args, **options):
+        user = None
+        if options["user"]:
+            User = get_user_model()
+            try:
+                user = User.objects.get(username=options["user"])
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['user']}' does not exist.")
+
+        started = time.perf_counter()
+        try:
+            with open(options["path"], newline="", encoding="utf-8-sig") as fh:
+                report = IMPORTERS[options["kind"]](
+                    fh, user=user, chunk_size=options["chunk_size"], dry_run=options["dry_run"]
+                )
+        except (OSError, ValueError, csv.Error) as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - started
+
+        if options["errors_out"]:
+            with open(options["errors_out"], "w", newline="") as fh:
+                writer = csv.writer(fh)
+                writer.writerow(["line", "errors"])
+                for error in report.errors:
+                    writer.writerow([error["line"], "; ".join(error["errors"])])
+        else:
+            for error in report.errors:
+                self.stderr.write(f"line {error['line']}: {'; '.join(error['errors'])}")
+
+        verb = "Validated" if options["dry_run"] else "Imported"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {report.created} of {report.total_rows} row(s) in {elapsed:.2f}s; "
+            f"{len(report.errors)} row(s) rejected."
+        ))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from finance.ledger import find_mismatches, rebuild_ledgers
+
+
+class Command(BaseCommand):
+    help = "Reconcile the fee ledger against the receipts table and rebuild it."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--check", action="store_true",
+                            help="Only report rows that disagree with the receipts; change nothing.")
+
+    def handle(self, *args, **options):
+        mismatches = find_mismatches()
+        for expected, stored in mismatches:
+            if expected is None:
+                self.stdout.write(f"orphan ledger row for enrollment {stored.enrollment_id}")
+            elif stored is None:
+                self.stdout.write(f"missing ledger row for enrollment {expected.enrollment_id}")
+            else:
+                self.stdout.write(
+                    f"enrollment {expected.enrollment_id}: paid {stored.total_paid} -> {expected.total_paid}, "
+                    f"balance {stored.balance} -> {expected.balance}"
+                )
+
+        if options["check"]:
+            style = self.style.SUCCESS if not mismatches else self.style.WARNING
+            self.stdout.write(style(f"{len(mismatches)} ledger row(s) out of step."))
+            return
+
+        written = rebuild_ledgers()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {written} ledger row(s); {len(mismatches)} were out of step."
+        ))
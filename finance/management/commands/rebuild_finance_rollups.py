@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from finance.rollups import rebuild_rollups
+from datetime import date
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily revenue and expense rollups from receipts and expenses."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", help="First day to rebuild (YYYY-MM-DD). Defaults to the earliest record.")
+        parser.add_argument("--end", help="Last day to rebuild (YYYY-MM-DD). Defaults to the latest record.")
+
+    def handle(self, *args, **options):
+        try:
+            start = date.fromisoformat(options["start"]) if options["start"] else None
+            end = date.fromisoformat(options["end"]) if options["end"] else None
+        except ValueError:
+            raise CommandError("Dates must be YYYY-MM-DD.")
+        if start and end and start > end:
+            raise CommandError("--start must not be after --end.")
+
+        revenue_rows, expense_rows = rebuild_rollups(start, end)
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {revenue_rows} revenue and {expense_rows} expense rollup row(s)."
+        ))
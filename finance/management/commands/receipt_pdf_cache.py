@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from finance.pdf_cache import receipt_pdf_cache
+
+
+class Command(BaseCommand):
+    help = "Show receipt PDF cache statistics, evict down to the size limit, or clear the cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clear", action="store_true", help="Delete every cached PDF and reset counters.")
+        parser.add_argument("--evict", action="store_true",
+                            help="Evict the least recently served PDFs until the directory fits the limit "
+                                 "(meant to run on a schedule).")
+
+    def handle(self, *args, **options):
+        if options["clear"]:
+            receipt_pdf_cache.clear()
+            self.stdout.write(self.style.SUCCESS("Receipt PDF cache cleared."))
+            return
+        if options["evict"]:
+            size = receipt_pdf_cache.evict()
+            receipt_pdf_cache.flush_counters()
+            self.stdout.write(self.style.SUCCESS(f"Receipt PDF cache is {size / 1024:.1f} KB after eviction."))
+            return
+
+        stats = receipt_pdf_cache.stats()
+        lookups = stats["hits"] + stats["misses"]
+        hit_rate = (stats["hits"] / lookups * 100) if lookups else 0
+        self.stdout.write(f"Entries:   {stats['entries']}")
+        self.stdout.write(f"Size:      {stats['bytes'] / 1024:.1f} KB / {stats['max_bytes'] / 1024 / 1024:.0f} MB")
+        self.stdout.write(f"Hits:      {stats['hits']}")
+        self.stdout.write(f"Misses:    {stats['misses']}")
+        self.stdout.write(f"Evictions: {stats['evictions']}")
+        self.stdout.write(f"Hit rate:  {hit_rate:.1f}%")
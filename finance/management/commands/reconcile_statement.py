@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from finance.reconciliation import reconcile_statement
+import csv
+import json
+import time
+
+
+class Command(BaseCommand):
+    help = "Match a bank/UPI statement CSV (date, amount, txn_id, description) against fee receipts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Statement CSV file with a header row.")
+        parser.add_argument("--window-days", type=int, default=3,
+                            help="How far apart dates may be for an amount-only match.")
+        parser.add_argument("--out", help="Write the full report to this JSON file.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            with open(options["path"], newline="", encoding="utf-8-sig") as fh:
+                report = reconcile_statement(fh, window_days=options["window_days"])
+        except (OSError, ValueError, csv.Error) as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - started
+
+        result = report.as_dict()
+        if options["out"]:
+            with open(options["out"], "w") as fh:
+                json.dump(result, fh, cls=DjangoJSONEncoder, indent=2)
+        else:
+            for line in report.unmatched_lines:
+                self.stdout.write(f"unmatched line {line['line']}: {line['date']} {line['amount']} {line['txn_id']}")
+            for error in report.errors:
+                self.stderr.write(f"line {error['line']}: {'; '.join(error['errors'])}")
+
+        summary = result["summary"]
+        self.stdout.write(self.style.SUCCESS(
+            f"Reconciled {report.total_lines} line(s) in {elapsed:.2f}s: {summary['matched']} matched "
+            f"({summary['matched_by_txn_id']} by txn_id), {summary['unmatched_lines']} unmatched, "
+            f"{summary['unmatched_receipts']} receipt(s) not on the statement, "
+            f"{summary['duplicates']} duplicate(s)."
+        ))
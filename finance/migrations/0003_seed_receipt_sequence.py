@@ -0,0 +1,31 @@
+from django.db import migrations
+
+
+def seed_receipt_sequence(apps, schema_editor):
+    """Start the REC series after the highest receipt number already issued."""
+    FeesReceipt = apps.get_model("finance", "FeesReceipt")
+    DocumentSequence = apps.get_model("documents", "DocumentSequence")
+
+    highest = 0
+    for receipt_no in FeesReceipt.objects.filter(receipt_no__startswith="REC-").values_list("receipt_no", flat=True).iterator():
+        try:
+            highest = max(highest, int(receipt_no.split("-")[1]))
+        except (IndexError, ValueError):
+            continue
+
+    sequence, _ = DocumentSequence.objects.get_or_create(name="REC")
+    if sequence.last_value < highest:
+        sequence.last_value = highest
+        sequence.save(update_fields=["last_value"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0002_remove_feesreceipt_pdf_file'),
+        ('documents', '0002_documentsequence'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_receipt_sequence, migrations.RunPython.noop),
+    ]
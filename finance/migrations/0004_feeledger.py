@@ -0,0 +1,57 @@
+# Generated by Django 5.2.8 on 2026-10-18 01:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Max, Sum
+
+
+def build_ledgers(apps, schema_editor):
+    Enrollment = apps.get_model("courses", "Enrollment")
+    FeesReceipt = apps.get_model("finance", "FeesReceipt")
+    FeeLedger = apps.get_model("finance", "FeeLedger")
+
+    paid = {
+        (row["student_id"], row["course_id"]): (row["total"], row["last"])
+        for row in FeesReceipt.objects.values("student_id", "course_id").annotate(total=Sum("amount"), last=Max("date"))
+    }
+    rows = []
+    for e in Enrollment.objects.values("id", "student_id", "course_id", "course__total_fees").iterator():
+        total_paid, last_date = paid.get((e["student_id"], e["course_id"]), (0, None))
+        rows.append(FeeLedger(
+            enrollment_id=e["id"], student_id=e["student_id"], course_id=e["course_id"],
+            total_fee=e["course__total_fees"], total_paid=total_paid,
+            balance=e["course__total_fees"] - total_paid, last_payment_date=last_date,
+        ))
+    FeeLedger.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0002_delete_coursematerial'),
+        ('finance', '0003_seed_receipt_sequence'),
+        ('students', '0002_delete_studentmeasurement'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeeLedger',
+            fields=[
+                ('enrollment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='fee_ledger', serialize=False, to='courses.enrollment')),
+                ('total_fee', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total_paid', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('last_payment_date', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fee_ledgers', to='courses.course')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fee_ledgers', to='students.student')),
+            ],
+            options={
+                'verbose_name': 'Fee Ledger',
+                'verbose_name_plural': 'Fee Ledgers',
+                'ordering': ['-balance'],
+                'indexes': [models.Index(fields=['balance'], name='finance_fee_balance_ae63ff_idx'), models.Index(fields=['student', 'course'], name='finance_fee_student_762af8_idx')],
+            },
+        ),
+        migrations.RunPython(build_ledgers, migrations.RunPython.noop),
+    ]
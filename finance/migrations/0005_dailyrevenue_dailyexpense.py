@@ -0,0 +1,75 @@
+# Generated by Django 5.2.8 on 2026-10-18 01:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def build_rollups(apps, schema_editor):
+    FeesReceipt = apps.get_model("finance", "FeesReceipt")
+    Expense = apps.get_model("finance", "Expense")
+    DailyRevenue = apps.get_model("finance", "DailyRevenue")
+    DailyExpense = apps.get_model("finance", "DailyExpense")
+
+    DailyRevenue.objects.bulk_create(
+        [
+            DailyRevenue(date=row["date"], mode=row["mode"], course_id=row["course_id"],
+                         total=row["total"], count=row["count"])
+            for row in FeesReceipt.objects.values("date", "mode", "course_id")
+            .annotate(total=Sum("amount"), count=Count("id")).order_by()
+        ],
+        batch_size=1000,
+    )
+    DailyExpense.objects.bulk_create(
+        [
+            DailyExpense(date=row["date"], category=row["category"], total=row["total"], count=row["count"])
+            for row in Expense.objects.values("date", "category")
+            .annotate(total=Sum("amount"), count=Count("id")).order_by()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0002_delete_coursematerial'),
+        ('finance', '0004_feeledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyExpense',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('category', models.CharField(choices=[('rent', 'Rent'), ('electricity', 'Electricity'), ('salary', 'Staff Salary'), ('materials', 'Materials/Supplies'), ('maintenance', 'Maintenance'), ('marketing', 'Marketing'), ('other', 'Other')], max_length=50)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Daily Expense',
+                'verbose_name_plural': 'Daily Expenses',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['date'], name='finance_dai_date_3f6ca7_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyRevenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('mode', models.CharField(choices=[('cash', 'Cash'), ('upi', 'UPI'), ('bank_transfer', 'Bank Transfer'), ('cheque', 'Cheque')], max_length=20)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('course', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='courses.course')),
+            ],
+            options={
+                'verbose_name': 'Daily Revenue',
+                'verbose_name_plural': 'Daily Revenue',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['date'], name='finance_dai_date_2bdd6a_idx')],
+            },
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.8 on 2026-10-18 01:37
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0002_delete_coursematerial'),
+        ('finance', '0005_dailyrevenue_dailyexpense'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseInstallment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('due_after_days', models.PositiveIntegerField(help_text='Days after enrollment the installment falls due')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(0)])),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='installments', to='courses.course')),
+            ],
+            options={
+                'verbose_name': 'Course Installment',
+                'verbose_name_plural': 'Course Installments',
+                'ordering': ['course', 'due_after_days'],
+            },
+        ),
+        migrations.CreateModel(
+            name='EnrollmentInstallment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('due_date', models.DateField()),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(0)])),
+                ('enrollment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='installments', to='courses.enrollment')),
+            ],
+            options={
+                'verbose_name': 'Enrollment Installment',
+                'verbose_name_plural': 'Enrollment Installments',
+                'ordering': ['enrollment', 'due_date'],
+                'indexes': [models.Index(fields=['enrollment', 'due_date'], name='finance_enr_enrollm_c6f686_idx'), models.Index(fields=['due_date'], name='finance_enr_due_dat_5385a7_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='FeeReminderLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sent_on', models.DateField()),
+                ('overdue_amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('enrollment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fee_reminders', to='courses.enrollment')),
+            ],
+            options={
+                'verbose_name': 'Fee Reminder Log',
+                'verbose_name_plural': 'Fee Reminder Logs',
+                'ordering': ['-sent_on'],
+                'constraints': [models.UniqueConstraint(fields=('enrollment', 'sent_on'), name='unique_fee_reminder_per_day')],
+            },
+        ),
+    ]
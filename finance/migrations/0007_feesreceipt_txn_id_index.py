@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-18 01:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0002_delete_coursematerial'),
+        ('finance', '0006_installments'),
+        ('students', '0002_delete_studentmeasurement'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='feesreceipt',
+            index=models.Index(fields=['txn_id'], name='finance_fee_txn_id_252cce_idx'),
+        ),
+    ]
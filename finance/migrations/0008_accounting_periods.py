@@ -0,0 +1,56 @@
+# Generated by Django 5.2.8 on 2026-10-18 01:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0002_delete_coursematerial'),
+        ('finance', '0007_feesreceipt_txn_id_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountingPeriod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start', models.DateField()),
+                ('end', models.DateField()),
+                ('closed_at', models.DateTimeField(auto_now_add=True)),
+                ('receipts_locked', models.PositiveIntegerField(default=0)),
+                ('notes', models.TextField(blank=True)),
+                ('closed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Accounting Period',
+                'verbose_name_plural': 'Accounting Periods',
+                'ordering': ['-start'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PeriodTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('revenue', 'Revenue'), ('expense', 'Expense')], max_length=10)),
+                ('mode', models.CharField(blank=True, choices=[('cash', 'Cash'), ('upi', 'UPI'), ('bank_transfer', 'Bank Transfer'), ('cheque', 'Cheque')], max_length=20)),
+                ('category', models.CharField(blank=True, choices=[('rent', 'Rent'), ('electricity', 'Electricity'), ('salary', 'Staff Salary'), ('materials', 'Materials/Supplies'), ('maintenance', 'Maintenance'), ('marketing', 'Marketing'), ('other', 'Other')], max_length=50)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('course', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='courses.course')),
+                ('period', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='totals', to='finance.accountingperiod')),
+            ],
+            options={
+                'verbose_name': 'Period Total',
+                'verbose_name_plural': 'Period Totals',
+                'ordering': ['period', 'kind'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='accountingperiod',
+            index=models.Index(fields=['start', 'end'], name='finance_acc_start_615804_idx'),
+        ),
+    ]
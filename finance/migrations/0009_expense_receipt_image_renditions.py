@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 01:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0008_accounting_periods'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expense',
+            name='receipt_image_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:42
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def drop_duplicate_rollups(apps, schema_editor):
+    """Keep the newest row of each day and dimension value; rebuild_finance_rollups fixes the totals."""
+    for model, keys in (("DailyRevenue", ("date", "mode", "course")), ("DailyExpense", ("date", "category"))):
+        Rollup = apps.get_model("finance", model)
+        keep = Rollup.objects.values(*keys).annotate(last=Max("id")).order_by().values_list("last", flat=True)
+        Rollup.objects.exclude(id__in=list(keep)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0002_delete_coursematerial'),
+        ('finance', '0009_expense_receipt_image_renditions'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_rollups, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='dailyexpense',
+            constraint=models.UniqueConstraint(fields=('date', 'category'), name='unique_daily_expense'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyrevenue',
+            constraint=models.UniqueConstraint(condition=models.Q(('course__isnull', False)), fields=('date', 'mode', 'course'), name='unique_daily_revenue'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyrevenue',
+            constraint=models.UniqueConstraint(condition=models.Q(('course__isnull', True)), fields=('date', 'mode'), name='unique_daily_revenue_no_course'),
+        ),
+    ]
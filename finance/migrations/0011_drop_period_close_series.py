@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+def drop_period_close_series(apps, schema_editor):
+    """Period closes now lock a core.Counter row; the number series they used as a mutex goes."""
+    DocumentSequence = apps.get_model("documents", "DocumentSequence")
+    DocumentSequence.objects.filter(name="PERIOD-CLOSE").delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0010_daily_rollups_unique'),
+        ('documents', '0003_alter_renderjob_kind'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_period_close_series, migrations.RunPython.noop),
+    ]
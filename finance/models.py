@@ -1,8 +1,10 @@
 from django.db import models, transaction
+from django.db.models import Q
 from django.conf import settings
 from django.core.validators import MinValueValidator
 from students.models import Student
-from courses.models import Course
+from courses.models import Course, Enrollment
+from documents.sequences import RECEIPT_SERIES, next_value, format_receipt_no
 import uuid
 
 class FeesReceipt(models.Model):
@@ -35,29 +37,26 @@ class FeesReceipt(models.Model):
             models.Index(fields=["receipt_no"]),
             models.Index(fields=["date"]),
             models.Index(fields=["public_id"]),
+            models.Index(fields=["txn_id"]),
         ]
         verbose_name = "Fees Receipt"
         verbose_name_plural = "Fees Receipts"
 
     def __str__(self):
         return f"{self.receipt_no} - {self.student.user.get_full_name()}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored values so signal handlers can tell what moved on update
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
     
     def save(self, *args, **kwargs):
         if not self.receipt_no:
+            # Number and row are written in one transaction so the series stays gap-free
             with transaction.atomic():
-                # Lock the table rows to prevent race conditions during high concurrency
-                last_receipt = FeesReceipt.objects.select_for_update().order_by('-id').first()
-                
-                if last_receipt and last_receipt.receipt_no.startswith('REC'):
-                    try:
-                        last_num = int(last_receipt.receipt_no.split('-')[1])
-                        new_num = last_num + 1
-                    except ValueError:
-                        new_num = 1
-                else:
-                    new_num = 1
-                
-                self.receipt_no = f"REC-{new_num:06d}"
+                self.receipt_no = format_receipt_no(next_value(RECEIPT_SERIES))
                 super().save(*args, **kwargs)
         else:
             super().save(*args, **kwargs)
@@ -79,6 +78,7 @@ class Expense(models.Model):
     date = models.DateField()
     description = models.TextField(blank=True)
     receipt_image = models.ImageField(upload_to="expenses/", blank=True, null=True)
+    receipt_image_renditions = models.JSONField(default=dict, blank=True, editable=False)
     recorded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -88,4 +88,195 @@ class Expense(models.Model):
         verbose_name_plural = "Expenses"
 
     def __str__(self):
-        return f"{self.title} ({self.amount})"
\ No newline at end of file
+        return f"{self.title} ({self.amount})"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+
+class FeeLedger(models.Model):
+    """
+    Running fee position of one enrollment, kept in step with its receipts
+    by `finance.ledger`. Reports read balances from here instead of summing
+    the receipts history.
+    """
+    enrollment = models.OneToOneField(Enrollment, on_delete=models.CASCADE, primary_key=True, related_name="fee_ledger")
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name="fee_ledgers")
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="fee_ledgers")
+    total_fee = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total_paid = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    balance = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    last_payment_date = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-balance"]
+        indexes = [
+            models.Index(fields=["balance"]),
+            models.Index(fields=["student", "course"]),
+        ]
+        verbose_name = "Fee Ledger"
+        verbose_name_plural = "Fee Ledgers"
+
+    def __str__(self):
+        return f"{self.student_id}/{self.course_id}: balance {self.balance}"
+
+
+class DailyRevenue(models.Model):
+    """Receipts rolled up per day, payment mode and course (see finance.rollups)."""
+    date = models.DateField()
+    mode = models.CharField(max_length=20, choices=FeesReceipt.PaymentMode.choices)
+    course = models.ForeignKey(Course, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-date"]
+        indexes = [
+            models.Index(fields=["date"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "mode", "course"], condition=Q(course__isnull=False), name="unique_daily_revenue"
+            ),
+            models.UniqueConstraint(
+                fields=["date", "mode"], condition=Q(course__isnull=True), name="unique_daily_revenue_no_course"
+            ),
+        ]
+        verbose_name = "Daily Revenue"
+        verbose_name_plural = "Daily Revenue"
+
+    def __str__(self):
+        return f"{self.date} {self.mode}: {self.total}"
+
+
+class DailyExpense(models.Model):
+    """Expenses rolled up per day and category (see finance.rollups)."""
+    date = models.DateField()
+    category = models.CharField(max_length=50, choices=Expense.Category.choices)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-date"]
+        indexes = [
+            models.Index(fields=["date"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["date", "category"], name="unique_daily_expense"),
+        ]
+        verbose_name = "Daily Expense"
+        verbose_name_plural = "Daily Expenses"
+
+    def __str__(self):
+        return f"{self.date} {self.category}: {self.total}"
+
+
+class CourseInstallment(models.Model):
+    """
+    Default installment schedule of a course, relative to the enrollment
+    date. Copied into EnrollmentInstallment rows when a student enrolls.
+    """
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="installments")
+    due_after_days = models.PositiveIntegerField(help_text="Days after enrollment the installment falls due")
+    amount = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(0)])
+
+    class Meta:
+        ordering = ["course", "due_after_days"]
+        verbose_name = "Course Installment"
+        verbose_name_plural = "Course Installments"
+
+    def __str__(self):
+        return f"{self.course} +{self.due_after_days}d: {self.amount}"
+
+
+class EnrollmentInstallment(models.Model):
+    """An installment one enrollment owes by `due_date`. Editable per student."""
+    enrollment = models.ForeignKey(Enrollment, on_delete=models.CASCADE, related_name="installments")
+    due_date = models.DateField()
+    amount = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(0)])
+
+    class Meta:
+        ordering = ["enrollment", "due_date"]
+        indexes = [
+            models.Index(fields=["enrollment", "due_date"]),
+            models.Index(fields=["due_date"]),
+        ]
+        verbose_name = "Enrollment Installment"
+        verbose_name_plural = "Enrollment Installments"
+
+    def __str__(self):
+        return f"{self.enrollment_id} due {self.due_date}: {self.amount}"
+
+
+class FeeReminderLog(models.Model):
+    """One row per overdue reminder sent; makes check_overdue_fees idempotent per day."""
+    enrollment = models.ForeignKey(Enrollment, on_delete=models.CASCADE, related_name="fee_reminders")
+    sent_on = models.DateField()
+    overdue_amount = models.DecimalField(max_digits=12, decimal_places=2)
+
+    class Meta:
+        ordering = ["-sent_on"]
+        constraints = [
+            models.UniqueConstraint(fields=["enrollment", "sent_on"], name="unique_fee_reminder_per_day"),
+        ]
+        verbose_name = "Fee Reminder Log"
+        verbose_name_plural = "Fee Reminder Logs"
+
+    def __str__(self):
+        return f"{self.enrollment_id} reminded {self.sent_on}"
+
+
+class AccountingPeriod(models.Model):
+    """
+    A closed date range. Its receipts are locked, no receipt or expense may
+    be written into it, and its totals are frozen in PeriodTotal.
+    """
+    start = models.DateField()
+    end = models.DateField()
+    closed_at = models.DateTimeField(auto_now_add=True)
+    closed_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    receipts_locked = models.PositiveIntegerField(default=0)
+    notes = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["-start"]
+        indexes = [
+            models.Index(fields=["start", "end"]),
+        ]
+        verbose_name = "Accounting Period"
+        verbose_name_plural = "Accounting Periods"
+
+    def __str__(self):
+        return f"{self.start} – {self.end}"
+
+
+class PeriodTotal(models.Model):
+    """Frozen revenue/expense totals of a closed period. Never updated."""
+    class Kind(models.TextChoices):
+        REVENUE = "revenue", "Revenue"
+        EXPENSE = "expense", "Expense"
+
+    period = models.ForeignKey(AccountingPeriod, on_delete=models.PROTECT, related_name="totals")
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    mode = models.CharField(max_length=20, choices=FeesReceipt.PaymentMode.choices, blank=True)
+    course = models.ForeignKey(Course, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    category = models.CharField(max_length=50, choices=Expense.Category.choices, blank=True)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["period", "kind"]
+        verbose_name = "Period Total"
+        verbose_name_plural = "Period Totals"
+
+    def __str__(self):
+        return f"{self.period}: {self.kind} {self.mode or self.category} {self.total}"
+
+    def save(self, *args, **kwargs):
+        if self.pk:
+            raise ValueError("Period totals are frozen and cannot be modified.")
+        super().save(*args, **kwargs)
@@ -0,0 +1,243 @@
+from django.conf import settings
+from django.template.loader import get_template
+from core.counters import get_counter, increment, reset
+from functools import lru_cache
+from pathlib import Path
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+RECEIPT_TEMPLATE = "finance/receipt_template.html"
+COUNTER_KEY = "finance:receipt_pdf_cache:{}"
+
+
+@lru_cache(maxsize=None)
+def template_version(template_name=RECEIPT_TEMPLATE):
+    """
+    Short hash of the template source. Editing the template changes every
+    cache key, so old renders are never served after a deploy.
+    """
+    source = get_template(template_name).template.source
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
+
+
+def receipt_fingerprint(receipt, extra_context=None):
+    """
+    Content hash of everything the receipt template renders.
+    A change to the receipt, the student's name or the course title
+    produces a different key.
+    """
+    student = receipt.student
+    payload = {
+        "template": template_version(),
+        "receipt_no": receipt.receipt_no,
+        "date": receipt.date.isoformat(),
+        "amount": str(receipt.amount),
+        "mode": receipt.mode,
+        "txn_id": receipt.txn_id,
+        "student_name": student.user.get_full_name(),
+        "reg_no": student.reg_no,
+        "course_title": receipt.course.title if receipt.course else None,
+        "context": extra_context or {},
+    }
+    raw = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ReceiptPDFCache:
+    """
+    On-disk cache of rendered receipt PDFs.
+
+    Files are named `<shard>/<receipt pk>-<fingerprint>.pdf`, with 256 shard
+    directories by receipt pk, so a lookup is a single stat() and stale
+    renders of the same receipt are found by a name glob over one shard.
+    The directory is bounded by RECEIPT_PDF_CACHE_MAX_BYTES; the least
+    recently served files are evicted first.
+
+    Lookups and writes never scan the directory with a stat() per file. Each
+    process keeps a running estimate of the directory size (one scan when
+    it first writes, then the size of every write) and evicts only when the
+    estimate passes the limit. Files written by other processes are picked
+    up by their own estimates, or by `receipt_pdf_cache --evict` on a schedule.
+
+    Hit/miss/eviction counts are added up in memory and written to the
+    shared counters every FLUSH_EVERY counts or FLUSH_SECONDS, so a lookup
+    costs no database round trip; stats() flushes first.
+    """
+    FLUSH_EVERY = 100
+    FLUSH_SECONDS = 30
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._last_flush = time.monotonic()
+        self._approx_bytes = None
+
+    @property
+    def directory(self):
+        return Path(settings.RECEIPT_PDF_CACHE_DIR)
+
+    @property
+    def max_bytes(self):
+        return settings.RECEIPT_PDF_CACHE_MAX_BYTES
+
+    def _shard(self, receipt_id):
+        return self.directory / f"{int(receipt_id) % 256:02x}"
+
+    def _path(self, receipt_id, digest):
+        return self._shard(receipt_id) / f"{receipt_id}-{digest}.pdf"
+
+    def _entries(self):
+        """Every cached file, for eviction and statistics (never on the lookup path)."""
+        try:
+            top = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return []
+        entries = []
+        for entry in top:
+            if entry.is_dir():
+                entries.extend(e for e in os.scandir(entry.path) if e.name.endswith(".pdf"))
+            elif entry.name.endswith(".pdf"):
+                # Written before the cache was sharded; evicted like the rest
+                entries.append(entry)
+        return entries
+
+    def _incr(self, name, by=1):
+        with self._lock:
+            self._pending[name] = self._pending.get(name, 0) + by
+            due = (sum(self._pending.values()) >= self.FLUSH_EVERY
+                   or time.monotonic() - self._last_flush >= self.FLUSH_SECONDS)
+        if due:
+            self.flush_counters()
+
+    def flush_counters(self):
+        """Add this process's pending counts to the shared counters."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        for name, count in pending.items():
+            # Shared counters, so the numbers add up across workers and commands
+            increment(COUNTER_KEY.format(name), count)
+
+    def get(self, receipt, digest):
+        path = self._path(receipt.pk, digest)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            self._incr("misses")
+            return None
+        # Bump mtime so eviction treats this entry as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self._incr("hits")
+        return data
+
+    def put(self, receipt, digest, data):
+        path = self._path(receipt.pk, digest)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write-then-rename so concurrent readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            logger.warning(f"Could not write receipt PDF cache entry {path.name}", exc_info=True)
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            return
+
+        freed = self.invalidate(receipt.pk, keep=path.name)
+        with self._lock:
+            if self._approx_bytes is not None:
+                self._approx_bytes += len(data) - freed
+            # A process's first write measures the directory; later ones scan only past the limit
+            due = self._approx_bytes is None or self._approx_bytes > self.max_bytes
+        if due:
+            self.evict()
+
+    def invalidate(self, receipt_id, keep=None):
+        """Remove cached renders of a receipt (except `keep`). Returns the bytes freed."""
+        freed = 0
+        for path in self._shard(receipt_id).glob(f"{receipt_id}-*.pdf"):
+            if path.name == keep:
+                continue
+            try:
+                size = path.stat().st_size
+                path.unlink()
+                freed += size
+            except FileNotFoundError:
+                pass
+        return freed
+
+    def evict(self):
+        """Drop the least recently served files until the directory fits. Returns its size."""
+        entries = []
+        total = 0
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+        if total > self.max_bytes:
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.unlink(path)
+                    total -= size
+                    self._incr("evictions")
+                except FileNotFoundError:
+                    pass
+        with self._lock:
+            self._approx_bytes = total
+        return total
+
+    def clear(self):
+        for entry in self._entries():
+            try:
+                os.unlink(entry.path)
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            self._pending, self._approx_bytes = {}, 0
+        reset(*(COUNTER_KEY.format(name) for name in ("hits", "misses", "evictions")))
+
+    def stats(self):
+        self.flush_counters()
+        entries = self._entries()
+        return {
+            "hits": get_counter(COUNTER_KEY.format("hits")),
+            "misses": get_counter(COUNTER_KEY.format("misses")),
+            "evictions": get_counter(COUNTER_KEY.format("evictions")),
+            "entries": len(entries),
+            "bytes": sum(e.stat().st_size for e in entries),
+            "max_bytes": self.max_bytes,
+        }
+
+    def get_or_render(self, receipt, render, extra_context=None):
+        digest = receipt_fingerprint(receipt, extra_context)
+        data = self.get(receipt, digest)
+        if data is not None:
+            return data
+
+        data = render(receipt)
+        if data:
+            self.put(receipt, digest, data)
+        return data
+
+
+receipt_pdf_cache = ReceiptPDFCache()
@@ -0,0 +1,137 @@
+"""
+Accounting period close.
+
+close_period() locks every receipt of a date range with one UPDATE and
+freezes the range's revenue and expense totals into PeriodTotal rows.
+After that, totals for closed periods are read from the snapshot. Only
+days outside closed periods (normally the current month) are aggregated,
+from the daily rollups. Receipts and expenses dated inside a closed period
+are rejected by the serializers and the CSV importers.
+"""
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from core.counters import lock
+from .models import FeesReceipt, Expense, DailyRevenue, DailyExpense, AccountingPeriod, PeriodTotal
+from decimal import Decimal
+
+PERIOD_CLOSE_LOCK = "finance:period_close"
+
+
+def closed_period_containing(day):
+    if day is None:
+        return None
+    return AccountingPeriod.objects.filter(start__lte=day, end__gte=day).first()
+
+
+def closed_ranges():
+    """(start, end) of every closed period, for checking many dates in Python."""
+    return list(AccountingPeriod.objects.values_list("start", "end"))
+
+
+def in_closed_range(day, ranges):
+    return any(start <= day <= end for start, end in ranges)
+
+
+def close_period(start, end, user=None, notes=""):
+    """Close [start, end]. Raises ValueError if the range is invalid or overlaps a closed period."""
+    if start > end:
+        raise ValueError("start must not be after end.")
+    if end >= timezone.localdate():
+        raise ValueError("Only periods that ended before today can be closed.")
+
+    with transaction.atomic():
+        # The lock row is held until commit, so concurrent closes run one at a time
+        lock(PERIOD_CLOSE_LOCK)
+        if AccountingPeriod.objects.filter(start__lte=end, end__gte=start).exists():
+            raise ValueError("The range overlaps a period that is already closed.")
+
+        period = AccountingPeriod.objects.create(start=start, end=end, closed_by=user, notes=notes)
+        period.receipts_locked = FeesReceipt.objects.filter(
+            date__range=(start, end), locked=False
+        ).update(locked=True)
+        period.save(update_fields=["receipts_locked"])
+
+        revenue = FeesReceipt.objects.filter(date__range=(start, end)).values("mode", "course_id").annotate(
+            total=Sum("amount"), count=Count("id")
+        )
+        expenses = Expense.objects.filter(date__range=(start, end)).values("category").annotate(
+            total=Sum("amount"), count=Count("id")
+        )
+        PeriodTotal.objects.bulk_create(
+            [
+                PeriodTotal(period=period, kind=PeriodTotal.Kind.REVENUE, mode=row["mode"],
+                            course_id=row["course_id"], total=row["total"], count=row["count"])
+                for row in revenue
+            ] + [
+                PeriodTotal(period=period, kind=PeriodTotal.Kind.EXPENSE, category=row["category"],
+                            total=row["total"], count=row["count"])
+                for row in expenses
+            ]
+        )
+    return period
+
+
+def _merge(key_fields, *row_sets):
+    merged = {}
+    for rows in row_sets:
+        for row in rows:
+            key = tuple(row[f] for f in key_fields)
+            entry = merged.setdefault(key, {**{f: row[f] for f in key_fields}, "total": Decimal("0"), "count": 0})
+            entry["total"] += row["total"] or 0
+            entry["count"] += row["count"] or 0
+    return sorted(merged.values(), key=lambda r: r["total"], reverse=True)
+
+
+def combined_totals(start=None, end=None):
+    """
+    Revenue/expense totals and breakdowns for [start, end] (open-ended when
+    None). Closed periods lying wholly inside the range come from their
+    snapshot; every other day comes from the daily rollups.
+    """
+    periods = AccountingPeriod.objects.all()
+    revenue = DailyRevenue.objects.all()
+    expenses = DailyExpense.objects.all()
+    if start:
+        periods = periods.filter(start__gte=start)
+        revenue = revenue.filter(date__gte=start)
+        expenses = expenses.filter(date__gte=start)
+    if end:
+        periods = periods.filter(end__lte=end)
+        revenue = revenue.filter(date__lte=end)
+        expenses = expenses.filter(date__lte=end)
+
+    closed = list(periods.values_list("id", "start", "end"))
+    if closed:
+        in_closed = Q()
+        for _, p_start, p_end in closed:
+            in_closed |= Q(date__range=(p_start, p_end))
+        revenue = revenue.exclude(in_closed)
+        expenses = expenses.exclude(in_closed)
+    frozen = PeriodTotal.objects.filter(period_id__in=[pk for pk, _, _ in closed])
+    frozen_revenue = frozen.filter(kind=PeriodTotal.Kind.REVENUE)
+    frozen_expenses = frozen.filter(kind=PeriodTotal.Kind.EXPENSE)
+
+    def grouped(qs, *fields):
+        return qs.values(*fields).annotate(total=Sum("total"), count=Sum("count")).order_by()
+
+    by_mode = _merge(["mode"], grouped(revenue, "mode"), grouped(frozen_revenue, "mode"))
+    by_course = _merge(
+        ["course_id", "course__title"],
+        grouped(revenue, "course_id", "course__title"),
+        grouped(frozen_revenue, "course_id", "course__title"),
+    )
+    by_category = _merge(["category"], grouped(expenses, "category"), grouped(frozen_expenses, "category"))
+
+    total_revenue = sum((r["total"] for r in by_mode), Decimal("0"))
+    total_expense = sum((r["total"] for r in by_category), Decimal("0"))
+    return {
+        "totals": {
+            "revenue": total_revenue,
+            "expense": total_expense,
+            "net": total_revenue - total_expense,
+        },
+        "revenue_by_mode": by_mode,
+        "revenue_by_course": by_course,
+        "expense_by_category": by_category,
+    }
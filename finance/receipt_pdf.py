@@ -0,0 +1,323 @@
+"""
+Native PDF engine for fee receipts.
+
+Draws the layout of finance/receipt_template.html straight into a PDF with
+pydyf, which WeasyPrint already depends on. There is no HTML parsing or CSS
+layout: positions come from the stylesheet's box model, precomputed below
+in CSS px (1px = 0.75pt).
+
+Fonts: text is set in the PDF standard Helvetica faces the template asks
+for, referenced by name and not embedded; their widths are tabled below.
+WeasyPrint embeds a subset of the face fontconfig resolves for Helvetica
+instead. The Dockerfile installs fonts-liberation so that face is
+Liberation Sans, which has Helvetica's widths and the ascent and descent
+used below: line breaks and alignment match, glyph shapes are the
+viewer's Helvetica. Deployments that need the font embedded keep
+RECEIPT_PDF_ENGINE=weasyprint.
+
+Scope: render_receipt() raises Unsupported, and generate_receipt_pdf()
+renders with WeasyPrint instead (logging the reason), when
+- the template source no longer hashes to LAYOUT_TEMPLATE_VERSION (it was
+  edited or overridden), or
+- any text is outside Windows-1252. That covers every name in Malayalam,
+  Arabic, Devanagari or another script needing shaping, which only
+  WeasyPrint (through Pango/HarfBuzz) can set; Latin names with accents
+  render natively.
+"""
+from django.template.defaultfilters import floatformat
+from django.utils.dateformat import format as format_date
+from io import BytesIO
+import pydyf
+
+# template_version() of the receipt template this layout reproduces
+LAYOUT_TEMPLATE_VERSION = "c93364732c52239d"
+
+PX = 0.75
+PAGE_W = 210 / 25.4 * 96  # A5 landscape, in CSS px
+PAGE_H = 148 / 25.4 * 96
+PAD = 40
+CONTENT_W = PAGE_W - 2 * PAD
+
+# Line box metrics of the sans-serif face WeasyPrint picks for Helvetica
+ASCENT = 0.905
+DESCENT = 0.212
+
+# Helvetica advance widths (1/1000 em) for U+0020..U+007E, from the Adobe AFMs
+_REGULAR = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+]
+_BOLD = [
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+    975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+    333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+    611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+]
+WIDTHS = {
+    "regular": dict(zip(range(32, 127), _REGULAR)),
+    "bold": dict(zip(range(32, 127), _BOLD)),
+    "italic": dict(zip(range(32, 127), _REGULAR)),
+}
+BASE_FONTS = {"regular": "Helvetica", "bold": "Helvetica-Bold", "italic": "Helvetica-Oblique"}
+RESOURCE_NAMES = {"regular": "F1", "bold": "F2", "italic": "F3"}
+
+BRAND = "#f43f5e"
+BORDER = "#e5e7eb"
+
+
+class Unsupported(ValueError):
+    """A receipt this engine cannot reproduce; the caller should use WeasyPrint."""
+
+
+class UnsupportedText(Unsupported):
+    """Text the standard fonts cannot show."""
+
+
+def _encode(text):
+    try:
+        return text.encode("cp1252")
+    except UnicodeEncodeError:
+        raise UnsupportedText(f"text outside Windows-1252: {text!r}")
+
+
+def text_width(text, size, face="regular", letter_spacing=0):
+    widths = WIDTHS[face]
+    em = sum(widths.get(b, 556) for b in _encode(text))
+    return em * size / 1000 + letter_spacing * len(text)
+
+
+def baseline(top, size, line_height=1.5):
+    """Baseline of a single line box starting at `top` (CSS px)."""
+    return top + (size * line_height - size * (ASCENT + DESCENT)) / 2 + size * ASCENT
+
+
+def wrap(text, size, max_width, face="regular"):
+    lines, current = [], ""
+    for word in text.split():
+        candidate = f"{current} {word}" if current else word
+        if current and text_width(candidate, size, face) > max_width:
+            lines.append(current)
+            current = word
+        else:
+            current = candidate
+    return lines + [current] if current else lines or [""]
+
+
+def capitalize(text):
+    """CSS text-transform: capitalize."""
+    words = []
+    for word in text.split(" "):
+        for i, ch in enumerate(word):
+            if ch.isalpha():
+                word = word[:i] + ch.upper() + word[i + 1:]
+                break
+        words.append(word)
+    return " ".join(words)
+
+
+def _rgb(hex_color):
+    hex_color = hex_color.lstrip("#")
+    return tuple(int(hex_color[i:i + 2], 16) / 255 for i in (0, 2, 4))
+
+
+class _Canvas:
+    """pydyf content stream addressed in CSS px from the top-left corner."""
+
+    def __init__(self):
+        self.stream = pydyf.Stream(compress=True)
+
+    def _y(self, top):
+        return (PAGE_H - top) * PX
+
+    def fill_rect(self, x, top, width, height, color):
+        self.stream.set_color_rgb(*_rgb(color))
+        self.stream.rectangle(x * PX, self._y(top + height), width * PX, height * PX)
+        self.stream.fill()
+
+    def rounded_rect_path(self, x, top, width, height, radius):
+        # Four Bezier quarter circles; k is the usual circle approximation constant
+        k = 0.5523 * radius * PX
+        x0, x1 = x * PX, (x + width) * PX
+        y0, y1 = self._y(top + height), self._y(top)
+        r = radius * PX
+        s = self.stream
+        s.move_to(x0 + r, y0)
+        s.line_to(x1 - r, y0)
+        s.curve_to(x1 - r + k, y0, x1, y0 + r - k, x1, y0 + r)
+        s.line_to(x1, y1 - r)
+        s.curve_to(x1, y1 - r + k, x1 - r + k, y1, x1 - r, y1)
+        s.line_to(x0 + r, y1)
+        s.curve_to(x0 + r - k, y1, x0, y1 - r + k, x0, y1 - r)
+        s.line_to(x0, y0 + r)
+        s.curve_to(x0, y0 + r - k, x0 + r - k, y0, x0 + r, y0)
+
+    def text(self, x, base, text, size, face="regular", color="#1f2937", align="left", letter_spacing=0):
+        if not text:
+            return
+        if align != "left":
+            width = text_width(text, size, face, letter_spacing)
+            x -= width if align == "right" else width / 2
+        s = self.stream
+        s.set_color_rgb(*_rgb(color))
+        s.begin_text()
+        s.set_font_size(RESOURCE_NAMES[face], size * PX)
+        if letter_spacing:
+            s.stream.append(f"{letter_spacing * PX:.3f} Tc".encode())
+        s.set_text_matrix(1, 0, 0, 1, round(x * PX, 3), round(self._y(base), 3))
+        s.show_text_string(_encode(text))
+        s.end_text()
+
+
+def _value(obj, *path):
+    """Resolve like a template variable: missing links render as ''."""
+    for attr in path:
+        if obj is None:
+            return ""
+        obj = getattr(obj, attr, None)
+        if callable(obj):
+            obj = obj()
+    return "" if obj is None and path else str(obj)
+
+
+def draw_receipt(receipt, context):
+    canvas = _Canvas()
+    right = PAD + CONTENT_W
+
+    # Header: institute block on the left, badge on the right
+    y = PAD
+    canvas.text(PAD, baseline(y, 24), context["institute_name"].upper(), 24, "bold", "#1a3a69", letter_spacing=1)
+    y += 36
+    for paragraph in (context["institute_address"], f"Phone: {context['institute_phone']}"):
+        y += 5
+        for line in wrap(paragraph, 11, 300):
+            canvas.text(PAD, baseline(y, 11), line, 11, color="#6b7280")
+            y += 16.5
+
+    badge_text = "FEE RECEIPT"
+    badge_w = text_width(badge_text, 14, "bold") + 24
+    canvas.stream.set_color_rgb(*_rgb(BRAND))
+    canvas.rounded_rect_path(right - badge_w, PAD, badge_w, 33, 4)
+    canvas.stream.fill()
+    canvas.text(right - 12, baseline(PAD + 6, 14), badge_text, 14, "bold", "#ffffff", align="right")
+
+    y = max(y, PAD + 33) + 20
+    canvas.fill_rect(PAD, y, CONTENT_W, 2, BRAND)
+    y += 2 + 30
+
+    # Info grid: label over value, three rows per column
+    mode = capitalize(receipt.get_mode_display())
+    left_items = [
+        ("STUDENT NAME", _value(receipt, "student", "user", "get_full_name")),
+        ("REGISTRATION NO", _value(receipt, "student", "reg_no")),
+        ("COURSE", _value(receipt, "course", "title")),
+    ]
+    right_items = [
+        ("RECEIPT NO", receipt.receipt_no),
+        ("DATE PAID", format_date(receipt.date, "F d, Y")),
+        ("PAYMENT MODE", mode),
+    ]
+    for i, (label, value) in enumerate(left_items):
+        top = y + i * 45.5
+        canvas.text(PAD, baseline(top, 11), label, 11, "bold", "#6b7280")
+        canvas.text(PAD, baseline(top + 16.5, 14), value, 14, "bold", "#111827")
+    for i, (label, value) in enumerate(right_items):
+        top = y + i * 45.5
+        canvas.text(right, baseline(top, 11), label, 11, "bold", "#6b7280", align="right")
+        value_base = baseline(top + 16.5, 14)
+        if label == "PAYMENT MODE" and receipt.txn_id:
+            txn = capitalize(f"(#{receipt.txn_id})")
+            canvas.text(right - text_width(txn, 11), value_base, f"{value} ", 14, "bold", "#111827", align="right")
+            canvas.text(right, value_base, txn, 11, "regular", "#666666", align="right")
+        else:
+            canvas.text(right, value_base, value, 14, "bold", "#111827", align="right")
+    y += 3 * 45.5 + 30
+
+    # Amount table inside a rounded, clipped border
+    amount = f"{context['currency_symbol']} {floatformat(receipt.amount, 2)}"
+    inner_x, inner_w = PAD + 1, CONTENT_W - 2
+    desc_w = inner_w * 0.7
+    description = wrap(f"Tuition Fee for {_value(receipt, 'course', 'title')}", 13, desc_w - 32)
+    header_h, body_h, total_h = 40.5, 24 + 19.5 * len(description), 48
+    table_h = 1 + header_h + 1 + body_h + 2 + total_h + 1
+
+    s = canvas.stream
+    s.push_state()
+    canvas.rounded_rect_path(PAD, y, CONTENT_W, table_h, 8)
+    s.clip()
+    s.end()
+    canvas.fill_rect(PAD, y, CONTENT_W, table_h, BORDER)
+    top = y + 1
+    canvas.fill_rect(inner_x, top, inner_w, header_h, "#f9fafb")
+    canvas.text(inner_x + 16, baseline(top + 12, 11), "DESCRIPTION", 11, "bold", "#374151")
+    canvas.text(inner_x + inner_w - 16, baseline(top + 12, 11), "AMOUNT", 11, "bold", "#374151", align="right")
+
+    top += header_h + 1
+    canvas.fill_rect(inner_x, top, inner_w, body_h, "#ffffff")
+    for n, line in enumerate(description):
+        canvas.text(inner_x + 16, baseline(top + 12 + 19.5 * n, 13), line, 13)
+    canvas.text(inner_x + inner_w - 16, baseline(top + 12, 13), amount, 13, align="right")
+
+    top += body_h
+    canvas.fill_rect(inner_x, top, inner_w, 2, BRAND)
+    top += 2
+    canvas.fill_rect(inner_x, top, inner_w, total_h, "#fdf2f4")
+    canvas.text(inner_x + desc_w - 20, baseline(top + 12, 16), "TOTAL PAID", 16, "bold", "#be123c", align="right")
+    canvas.text(inner_x + inner_w - 16, baseline(top + 12, 16), amount, 16, "bold", "#be123c", align="right")
+    s.pop_state()
+
+    # Footer, bottom-aligned 40px above the page edge
+    bottom = PAGE_H - PAD
+    thanks_top = bottom - 36
+    canvas.text(PAD, thanks_top + 13.16, "Thank you for your payment!", 12, "italic", "#6b7280")
+    canvas.text(PAD, thanks_top + 18 + 13.16, "This is a computer generated receipt.", 10, "italic", "#9ca3af")
+
+    sign_text = "AUTHORIZED SIGNATORY"
+    sign_w = max(180, text_width(sign_text, 11, "bold"))
+    sign_top = bottom - 22.5
+    canvas.fill_rect(right - sign_w, sign_top, 180, 1, "#1f2937")
+    canvas.text(right - sign_w / 2, baseline(sign_top + 6, 11), sign_text, 11, "bold", "#1f2937", align="center")
+
+    return canvas.stream
+
+
+def render_receipt(receipt, context):
+    """
+    PDF bytes for `receipt`. Raises Unsupported when this engine cannot
+    reproduce it (see module docstring).
+    """
+    from .pdf_cache import template_version
+    if template_version() != LAYOUT_TEMPLATE_VERSION:
+        raise Unsupported("receipt template changed since the native layout was drawn")
+    stream = draw_receipt(receipt, context)
+
+    pdf = pydyf.PDF()
+    fonts = pydyf.Dictionary()
+    for face, base_font in BASE_FONTS.items():
+        font = pydyf.Dictionary({
+            "Type": "/Font",
+            "Subtype": "/Type1",
+            "BaseFont": f"/{base_font}",
+            "Encoding": "/WinAnsiEncoding",
+        })
+        pdf.add_object(font)
+        fonts[RESOURCE_NAMES[face]] = font.reference
+    pdf.add_object(stream)
+    pdf.add_page(pydyf.Dictionary({
+        "Type": "/Page",
+        "Parent": pdf.pages.reference,
+        "MediaBox": pydyf.Array([0, 0, round(PAGE_W * PX, 2), round(PAGE_H * PX, 2)]),
+        "Contents": stream.reference,
+        "Resources": pydyf.Dictionary({"Font": fonts}),
+    }))
+    pdf.info["Title"] = pydyf.String("Fee Receipt")
+    pdf.info["Producer"] = pydyf.String("Noor Institute receipt engine")
+
+    output = BytesIO()
+    pdf.write(output)
+    return output.getvalue()
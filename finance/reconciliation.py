@@ -0,0 +1,195 @@
+"""
+Bank/UPI statement reconciliation.
+
+The statement CSV is read once and each line is parsed into a small tuple.
+The receipts for the statement's date range, padded by the match window,
+are then loaded in a single query and indexed in dicts: by transaction id
+and by (amount, date). Every line is resolved with dict lookups, so the
+cost is one query whatever the number of lines:
+
+1. exact match on txn_id (case- and whitespace-insensitive);
+2. otherwise the unmatched receipt with the same amount whose date is
+   closest to the line's, within `window_days`.
+"""
+from .importers import _reader
+from .models import FeesReceipt
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+STATEMENT_COLUMNS = ["date", "amount", "txn_id", "description"]
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y")
+
+
+class ReconciliationReport:
+    def __init__(self, window_days):
+        self.window_days = window_days
+        self.total_lines = 0
+        self.matched = []
+        self.unmatched_lines = []
+        self.unmatched_receipts = []
+        self.duplicates = []
+        self.errors = []
+
+    def as_dict(self):
+        return {
+            "window_days": self.window_days,
+            "total_lines": self.total_lines,
+            "summary": {
+                "matched": len(self.matched),
+                "matched_by_txn_id": sum(1 for m in self.matched if m["method"] == "txn_id"),
+                "unmatched_lines": len(self.unmatched_lines),
+                "unmatched_receipts": len(self.unmatched_receipts),
+                "duplicates": len(self.duplicates),
+                "errors": len(self.errors),
+            },
+            "matched": self.matched,
+            "unmatched_lines": self.unmatched_lines,
+            "unmatched_receipts": self.unmatched_receipts,
+            "duplicates": self.duplicates,
+            "errors": self.errors,
+        }
+
+
+def _txn_key(value):
+    return "".join((value or "").split()).upper()
+
+
+def _parse_date(value):
+    value = (value or "").strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _parse_line(row):
+    errors = []
+    try:
+        amount = Decimal((row.get("amount") or "").strip().replace(",", ""))
+    except InvalidOperation:
+        amount = None
+        errors.append("amount is not a number.")
+    paid_on = _parse_date(row.get("date"))
+    if paid_on is None:
+        errors.append("date must be YYYY-MM-DD or DD/MM/YYYY.")
+    return amount, paid_on, errors
+
+
+def reconcile_statement(stream, window_days=3):
+    """Match the lines of a statement CSV (see STATEMENT_COLUMNS) against receipts."""
+    reader = _reader(stream, ["date", "amount"])
+    report = ReconciliationReport(window_days)
+
+    lines = []
+    first_seen = {}
+    for line, row in enumerate(reader, start=2):
+        report.total_lines += 1
+        amount, paid_on, errors = _parse_line(row)
+        if errors:
+            report.errors.append({"line": line, "errors": errors})
+            continue
+
+        txn_id = (row.get("txn_id") or "").strip()
+        key = _txn_key(txn_id)
+        if key and key in first_seen:
+            report.duplicates.append({
+                "kind": "statement_line", "line": line, "txn_id": txn_id, "first_line": first_seen[key],
+            })
+            continue
+        if key:
+            first_seen[key] = line
+        lines.append((line, paid_on, amount, key, txn_id))
+
+    if not lines:
+        return report
+
+    window = timedelta(days=window_days)
+    start = min(l[1] for l in lines)
+    end = max(l[1] for l in lines)
+    receipts = list(
+        FeesReceipt.objects.filter(date__range=(start - window, end + window))
+        .values_list("id", "receipt_no", "date", "amount", "txn_id", "mode")
+        .order_by("date", "id")
+    )
+
+    by_txn = defaultdict(list)
+    # Receipts without a txn_id are tried before ones recorded with some other id
+    untagged = defaultdict(deque)
+    tagged = defaultdict(deque)
+    for receipt in receipts:
+        key = _txn_key(receipt[4])
+        if key:
+            by_txn[key].append(receipt)
+            tagged[(receipt[3], receipt[2])].append(receipt)
+        else:
+            untagged[(receipt[3], receipt[2])].append(receipt)
+
+    for key, shared in by_txn.items():
+        if len(shared) > 1:
+            report.duplicates.append({
+                "kind": "receipts", "txn_id": shared[0][4], "receipt_nos": [r[1] for r in shared],
+            })
+
+    used = set()
+
+    def match(line, receipt, method):
+        used.add(receipt[0])
+        report.matched.append({
+            "line": line[0],
+            "method": method,
+            "receipt_id": receipt[0],
+            "receipt_no": receipt[1],
+            "statement_amount": line[2],
+            "receipt_amount": receipt[3],
+            "amount_differs": line[2] != receipt[3],
+            "statement_date": line[1],
+            "receipt_date": receipt[2],
+        })
+
+    # Pass 1: exact transaction id. Among receipts sharing an id, prefer the same amount
+    pending = []
+    for line in lines:
+        candidates = [r for r in by_txn.get(line[3], ()) if r[0] not in used] if line[3] else []
+        if candidates:
+            same_amount = [r for r in candidates if r[3] == line[2]]
+            match(line, (same_amount or candidates)[0], "txn_id")
+        else:
+            pending.append(line)
+
+    def take(buckets, bucket_key):
+        bucket = buckets.get(bucket_key)
+        # Drop receipts already matched; each is popped at most once overall
+        while bucket and bucket[0][0] in used:
+            bucket.popleft()
+        return bucket[0] if bucket else None
+
+    # Pass 2: same amount, nearest date first (0, -1, +1, -2, +2, ...).
+    # A line carrying a txn_id never takes a receipt recorded with another id.
+    offsets = [0] + [sign * d for d in range(1, window_days + 1) for sign in (-1, 1)]
+    for line in pending:
+        found = None
+        for offset in offsets:
+            bucket_key = (line[2], line[1] + timedelta(days=offset))
+            found = take(untagged, bucket_key) or (None if line[3] else take(tagged, bucket_key))
+            if found:
+                break
+        if found:
+            match(line, found, "amount_date")
+        else:
+            report.unmatched_lines.append({
+                "line": line[0], "date": line[1], "amount": line[2], "txn_id": line[4],
+            })
+
+    # Digital receipts inside the statement period that nothing on the statement paid
+    for receipt in receipts:
+        if (receipt[0] not in used and start <= receipt[2] <= end
+                and receipt[5] != FeesReceipt.PaymentMode.CASH):
+            report.unmatched_receipts.append({
+                "receipt_id": receipt[0], "receipt_no": receipt[1], "date": receipt[2],
+                "amount": receipt[3], "txn_id": receipt[4], "mode": receipt[5],
+            })
+
+    return report
@@ -0,0 +1,127 @@
+"""
+Daily finance rollups.
+
+DailyRevenue and DailyExpense hold one row per day and dimension. Writes
+call refresh_revenue() or refresh_expenses() with the dates they touched, and each of those days
+is re-aggregated from its raw rows in one grouped query per table. Reports
+then scan O(days in range) rollup rows instead of every transaction.
+
+Refreshes take the ROLLUP_LOCK counter row first, so concurrent writes
+re-aggregate one after the other and each sees the rows committed before
+it; the tables are unique per day and dimension value.
+"""
+from django.db import transaction
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek, TruncYear
+from core.counters import lock
+from .models import FeesReceipt, Expense, DailyRevenue, DailyExpense
+from .periods import combined_totals
+from datetime import timedelta
+from decimal import Decimal
+
+ROLLUP_LOCK = "finance:rollups"
+GRANULARITIES = {
+    "day": TruncDay,
+    "week": TruncWeek,
+    "month": TruncMonth,
+    "year": TruncYear,
+}
+
+
+def _revenue_rows(receipts):
+    return [
+        DailyRevenue(date=row["date"], mode=row["mode"], course_id=row["course_id"],
+                     total=row["total"], count=row["count"])
+        for row in receipts.values("date", "mode", "course_id").annotate(total=Sum("amount"), count=Count("id"))
+    ]
+
+
+def _expense_rows(expenses):
+    return [
+        DailyExpense(date=row["date"], category=row["category"], total=row["total"], count=row["count"])
+        for row in expenses.values("date", "category").annotate(total=Sum("amount"), count=Count("id"))
+    ]
+
+
+def refresh_revenue(dates):
+    dates = {d for d in dates if d}
+    if not dates:
+        return
+    with transaction.atomic():
+        lock(ROLLUP_LOCK)
+        DailyRevenue.objects.filter(date__in=dates).delete()
+        DailyRevenue.objects.bulk_create(_revenue_rows(FeesReceipt.objects.filter(date__in=dates)))
+
+
+def refresh_expenses(dates):
+    dates = {d for d in dates if d}
+    if not dates:
+        return
+    with transaction.atomic():
+        lock(ROLLUP_LOCK)
+        DailyExpense.objects.filter(date__in=dates).delete()
+        DailyExpense.objects.bulk_create(_expense_rows(Expense.objects.filter(date__in=dates)))
+
+
+def rebuild_rollups(start=None, end=None, step_days=31):
+    """
+    Recompute both rollup tables for [start, end] (default: all history),
+    one window of `step_days` at a time. Returns (revenue_rows, expense_rows).
+    """
+    spans = [
+        FeesReceipt.objects.aggregate(first=Min("date"), last=Max("date")),
+        Expense.objects.aggregate(first=Min("date"), last=Max("date")),
+    ]
+    start = start or min((s["first"] for s in spans if s["first"]), default=None)
+    end = end or max((s["last"] for s in spans if s["last"]), default=None)
+    if not start or not end:
+        return 0, 0
+
+    revenue_rows = expense_rows = 0
+    window_start = start
+    while window_start <= end:
+        window_end = min(window_start + timedelta(days=step_days - 1), end)
+        with transaction.atomic():
+            lock(ROLLUP_LOCK)
+            DailyRevenue.objects.filter(date__range=(window_start, window_end)).delete()
+            DailyExpense.objects.filter(date__range=(window_start, window_end)).delete()
+            revenue = DailyRevenue.objects.bulk_create(
+                _revenue_rows(FeesReceipt.objects.filter(date__range=(window_start, window_end)))
+            )
+            expenses = DailyExpense.objects.bulk_create(
+                _expense_rows(Expense.objects.filter(date__range=(window_start, window_end)))
+            )
+        revenue_rows += len(revenue)
+        expense_rows += len(expenses)
+        window_start = window_end + timedelta(days=1)
+    return revenue_rows, expense_rows
+
+
+def period_report(start, end, granularity="month"):
+    """
+    Revenue, expense and net for [start, end] bucketed by `granularity`,
+    plus breakdowns by payment mode, course and expense category.
+    """
+    trunc = GRANULARITIES[granularity]
+    revenue = DailyRevenue.objects.filter(date__range=(start, end))
+    expenses = DailyExpense.objects.filter(date__range=(start, end))
+
+    buckets = {}
+    for row in revenue.annotate(period=trunc("date")).values("period").annotate(total=Sum("total")):
+        buckets.setdefault(row["period"], {"revenue": Decimal("0"), "expense": Decimal("0")})["revenue"] = row["total"]
+    for row in expenses.annotate(period=trunc("date")).values("period").annotate(total=Sum("total")):
+        buckets.setdefault(row["period"], {"revenue": Decimal("0"), "expense": Decimal("0")})["expense"] = row["total"]
+
+    periods = [
+        {"period": period, "revenue": v["revenue"], "expense": v["expense"], "net": v["revenue"] - v["expense"]}
+        for period, v in sorted(buckets.items())
+    ]
+
+    # Totals and breakdowns read closed periods from their frozen snapshot
+    return {
+        "start": start,
+        "end": end,
+        "granularity": granularity,
+        "periods": periods,
+        **combined_totals(start, end),
+    }
@@ -1,6 +1,16 @@
 from rest_framework import serializers
-from .models import FeesReceipt, Expense
+from .models import FeesReceipt, Expense, FeeLedger, AccountingPeriod, PeriodTotal
+from .periods import closed_period_containing
 from courses.models import Enrollment
+from documents.images import rendition_url
+
+
+def validate_open_date(day):
+    period = closed_period_containing(day)
+    if period:
+        raise serializers.ValidationError(
+            {"date": f"{day} falls in the closed accounting period {period}."}
+        )
 
 class FeesReceiptSerializer(serializers.ModelSerializer):
     student_name = serializers.ReadOnlyField(source="student.user.get_full_name")
@@ -24,6 +34,8 @@ class FeesReceiptSerializer(serializers.ModelSerializer):
     def validate(self, attrs):
         if self.instance and self.instance.locked:
             raise serializers.ValidationError("This receipt is locked and cannot be modified.")
+        if "date" in attrs:
+            validate_open_date(attrs["date"])
 
         course = attrs.get("course") or (self.instance.course if self.instance else None)
         student = attrs.get("student") or (self.instance.student if self.instance else None)
@@ -41,15 +53,80 @@ class FeesReceiptSerializer(serializers.ModelSerializer):
 
 class ExpenseSerializer(serializers.ModelSerializer):
     recorded_by_name = serializers.ReadOnlyField(source="recorded_by.get_full_name")
+    thumbnail = serializers.SerializerMethodField()
 
     class Meta:
         model = Expense
         fields = [
             "id", "category", "title", "amount", "date", 
-            "description", "receipt_image", "recorded_by", "recorded_by_name"
+            "description", "receipt_image", "thumbnail", "recorded_by", "recorded_by_name"
         ]
         read_only_fields = ["id", "recorded_by"]
 
+    def get_thumbnail(self, obj):
+        url = rendition_url(obj, "receipt_image", "receipt_image_renditions")
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if url and request else url
+
+    def validate(self, attrs):
+        if self.instance:
+            validate_open_date(self.instance.date)
+        if "date" in attrs:
+            validate_open_date(attrs["date"])
+        return attrs
+
     def create(self, validated_data):
         validated_data['recorded_by'] = self.context['request'].user
-        return super().create(validated_data)
\ No newline at end of file
+        return super().create(validated_data)
+
+class FeeLedgerSerializer(serializers.ModelSerializer):
+    student_name = serializers.ReadOnlyField(source="student.user.get_full_name")
+    reg_no = serializers.ReadOnlyField(source="student.reg_no")
+    course_title = serializers.ReadOnlyField(source="course.title")
+    status = serializers.ReadOnlyField(source="enrollment.status")
+
+    class Meta:
+        model = FeeLedger
+        fields = [
+            "enrollment", "student", "student_name", "reg_no", "course", "course_title",
+            "status", "total_fee", "total_paid", "balance", "last_payment_date",
+        ]
+        read_only_fields = fields
+
+
+class OutstandingFeeSerializer(serializers.ModelSerializer):
+    student_id = serializers.ReadOnlyField()
+    student_name = serializers.ReadOnlyField()
+    reg_no = serializers.ReadOnlyField(source="student.reg_no")
+    guardian_phone = serializers.ReadOnlyField(source="student.guardian_phone")
+    student_phone = serializers.ReadOnlyField(source="student.user.phone")
+    course_title = serializers.ReadOnlyField(source="course.title")
+    paid_amount = serializers.DecimalField(source="total_paid", max_digits=12, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = FeeLedger
+        fields = [
+            "student_id", "student_name", "reg_no", "guardian_phone", "student_phone",
+            "course_title", "total_fee", "paid_amount", "balance", "last_payment_date",
+        ]
+        read_only_fields = fields
+
+
+class PeriodTotalSerializer(serializers.ModelSerializer):
+    course_title = serializers.ReadOnlyField(source="course.title")
+
+    class Meta:
+        model = PeriodTotal
+        fields = ["kind", "mode", "course", "course_title", "category", "total", "count"]
+        read_only_fields = fields
+
+
+class AccountingPeriodSerializer(serializers.ModelSerializer):
+    closed_by_name = serializers.ReadOnlyField(source="closed_by.get_full_name")
+    totals = PeriodTotalSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = AccountingPeriod
+        fields = ["id", "start", "end", "closed_at", "closed_by", "closed_by_name", "receipts_locked", "notes", "totals"]
+        read_only_fields = ["id", "closed_at", "closed_by", "receipts_locked", "totals"]
+
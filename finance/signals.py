@@ -0,0 +1,98 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from courses.models import Course, Enrollment
+from .models import FeesReceipt, Expense
+from .ledger import apply_course_fee, refresh_ledgers
+from .rollups import refresh_expenses, refresh_revenue
+from .pdf_cache import receipt_pdf_cache
+from .dashboard import invalidate_dashboard
+from .forecast import invalidate_forecast
+from .installments import materialize_installments
+
+
+def _ledger_keys(receipt):
+    keys = {(receipt.student_id, receipt.course_id)}
+    loaded = getattr(receipt, "_loaded_values", None)
+    if loaded and "student_id" in loaded and "course_id" in loaded:
+        # An edit may have moved the receipt to another student/course
+        keys.add((loaded["student_id"], loaded["course_id"]))
+    return keys
+
+
+def _rollup_dates(instance):
+    dates = {instance.date}
+    loaded = getattr(instance, "_loaded_values", None)
+    if loaded and "date" in loaded:
+        dates.add(loaded["date"])
+    return dates
+
+
+@receiver(post_save, sender=FeesReceipt)
+def update_ledger_on_receipt_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    refresh_ledgers(_ledger_keys(instance))
+
+
+@receiver(post_delete, sender=FeesReceipt)
+def update_ledger_on_receipt_delete(sender, instance, **kwargs):
+    refresh_ledgers(_ledger_keys(instance))
+
+
+@receiver(post_save, sender=FeesReceipt)
+@receiver(post_delete, sender=FeesReceipt)
+def update_revenue_rollup(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    refresh_revenue(_rollup_dates(instance))
+
+
+@receiver(post_save, sender=Expense)
+@receiver(post_delete, sender=Expense)
+def update_expense_rollup(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    refresh_expenses(_rollup_dates(instance))
+
+
+@receiver(post_save, sender=FeesReceipt)
+@receiver(post_delete, sender=FeesReceipt)
+@receiver(post_save, sender=Expense)
+@receiver(post_delete, sender=Expense)
+def mark_dashboard_stale(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_dashboard()
+
+
+@receiver(post_save, sender=FeesReceipt)
+@receiver(post_delete, sender=FeesReceipt)
+def mark_forecast_stale(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_forecast()
+
+
+@receiver(post_delete, sender=FeesReceipt)
+def drop_cached_receipt_pdf(sender, instance, **kwargs):
+    receipt_pdf_cache.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=Enrollment)
+def open_ledger_on_enrollment(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    refresh_ledgers({(instance.student_id, instance.course_id)})
+    invalidate_dashboard()
+    invalidate_forecast()
+    if created:
+        materialize_installments(Enrollment.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Course)
+def reprice_ledgers_on_fee_change(sender, instance, created=False, raw=False, **kwargs):
+    if raw or created:
+        return
+    if apply_course_fee(instance):
+        invalidate_dashboard()
+        invalidate_forecast()
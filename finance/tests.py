@@ -1 +1,498 @@
-from django.test import TestCase
\ No newline at end of file
+from datetime import date, timedelta
+from decimal import Decimal
+import tempfile
+
+from django.test import TestCase, override_settings
+
+from accounts.models import User
+from courses.models import Course, Enrollment
+from students.models import Student
+from .ledger import find_mismatches
+from .models import FeesReceipt, FeeLedger, Expense, DailyRevenue, CourseInstallment
+from .installments import send_overdue_reminders
+from .reconciliation import reconcile_statement
+from .periods import close_period
+from .rollups import period_report
+from .pdf_cache import ReceiptPDFCache
+
+
+def make_student(username="asha", first_name="Asha"):
+    user = User.objects.create_user(username=username, password="x", first_name=first_name, last_name="K")
+    return Student.objects.create(user=user, reg_no=f"STU-{username}", guardian_name="G", guardian_phone="9999999999")
+
+
+def make_course(code="TAIL-1", total_fees="6000.00"):
+    return Course.objects.create(code=code, title="Tailoring Basics", duration_weeks=12, total_fees=Decimal(total_fees))
+
+
+def make_receipt(student, course, amount="1500.00", **kwargs):
+    Enrollment.objects.get_or_create(student=student, course=course)
+    kwargs.setdefault("date", date(2025, 6, 1))
+    return FeesReceipt.objects.create(student=student, course=course, amount=Decimal(amount), **kwargs)
+
+
+class ReceiptPDFCacheTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.settings_override = override_settings(
+            RECEIPT_PDF_CACHE_DIR=self.tmp.name, RECEIPT_PDF_CACHE_MAX_BYTES=10_000
+        )
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+        self.cache = ReceiptPDFCache()
+        self.cache.clear()
+        self.renders = 0
+        self.receipt = make_receipt(make_student(), make_course())
+
+    def render(self, receipt):
+        self.renders += 1
+        return b"%PDF-" + receipt.receipt_no.encode() + b"-" + str(self.renders).encode()
+
+    def test_repeat_download_is_served_from_cache(self):
+        first = self.cache.get_or_render(self.receipt, self.render)
+        second = self.cache.get_or_render(self.receipt, self.render)
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.renders, 1)
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (1, 1, 1))
+
+        # The command reads the shared counters, not its own process's cache
+        from core.models import Counter
+        from django.core.management import call_command
+        from io import StringIO
+        self.assertEqual(Counter.objects.get(name="finance:receipt_pdf_cache:hits").value, 1)
+        out = StringIO()
+        call_command("receipt_pdf_cache", stdout=out)
+        self.assertIn("Hit rate:  50.0%", out.getvalue())
+
+        # Lookups are counted in memory and written to the counters in batches
+        with self.assertNumQueries(0):
+            self.cache.get_or_render(self.receipt, self.render)
+        self.assertEqual(self.cache.stats()["hits"], 2)
+
+    def test_student_name_change_invalidates_entry(self):
+        self.cache.get_or_render(self.receipt, self.render)
+
+        user = self.receipt.student.user
+        user.first_name = "Ayesha"
+        user.save()
+        receipt = FeesReceipt.objects.select_related("student__user", "course").get(pk=self.receipt.pk)
+        self.cache.get_or_render(receipt, self.render)
+
+        self.assertEqual(self.renders, 2)
+        # The superseded render is dropped, not left behind
+        self.assertEqual(self.cache.stats()["entries"], 1)
+
+    def test_eviction_keeps_directory_under_limit(self):
+        big = b"x" * 4_000
+        student = self.receipt.student
+        course = self.receipt.course
+        for _ in range(4):
+            receipt = make_receipt(student, course)
+            self.cache.get_or_render(receipt, lambda r: big)
+
+        stats = self.cache.stats()
+        self.assertLessEqual(stats["bytes"], 10_000)
+        self.assertGreater(stats["evictions"], 0)
+
+    def test_deleting_receipt_drops_cached_pdf(self):
+        self.cache.get_or_render(self.receipt, self.render)
+        self.receipt.delete()
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+
+class CSVImportTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username="admin", password="x", is_staff=True)
+        self.student = make_student()
+        self.course = make_course()
+        Enrollment.objects.create(student=self.student, course=self.course)
+
+    def test_good_rows_are_imported_and_bad_rows_reported(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from rest_framework.test import APIClient
+
+        body = (
+            "reg_no,course_code,amount,date,mode,txn_id\n"
+            f"{self.student.reg_no},{self.course.code},1500.00,2025-06-01,UPI,T1\n"
+            f"{self.student.reg_no},{self.course.code},abc,2025-06-01,cash,\n"
+            f"UNKNOWN,{self.course.code},100,2025-06-01,cash,\n"
+            f"{self.student.reg_no},{self.course.code},500,2025-06-02,,\n"
+            f"{self.student.reg_no},{self.course.code},123456789012.50,2025-06-03,cash,\n"
+            f"{self.student.reg_no},{self.course.code},NaN,2025-06-03,cash,\n"
+        )
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        resp = client.post(
+            "/api/v1/finance/receipts/import/",
+            {"file": SimpleUploadedFile("receipts.csv", body.encode(), content_type="text/csv")},
+            format="multipart",
+        )
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual((resp.data["created"], resp.data["failed"]), (2, 4))
+        self.assertEqual([e["line"] for e in resp.data["errors"]], [3, 4, 6, 7])
+        self.assertEqual(resp.data["errors"][2]["errors"], ["amount must be less than 100,000,000."])
+        self.assertEqual(
+            sorted(FeesReceipt.objects.values_list("receipt_no", flat=True)),
+            ["REC-000001", "REC-000002"],
+        )
+
+
+class FeeLedgerTests(TestCase):
+    def setUp(self):
+        self.student = make_student()
+        self.course = make_course(total_fees="6000.00")
+
+    def ledger(self):
+        return FeeLedger.objects.get(student=self.student, course=self.course)
+
+    def test_ledger_follows_receipt_writes_and_fee_changes(self):
+        receipt = make_receipt(self.student, self.course, amount="1500.00", date=date(2025, 6, 1))
+        make_receipt(self.student, self.course, amount="500.00", date=date(2025, 7, 1))
+        self.assertEqual((self.ledger().total_paid, self.ledger().balance), (Decimal("2000"), Decimal("4000")))
+        self.assertEqual(self.ledger().last_payment_date, date(2025, 7, 1))
+
+        receipt = FeesReceipt.objects.get(pk=receipt.pk)
+        receipt.amount = Decimal("1000.00")
+        receipt.save()
+        self.assertEqual(self.ledger().balance, Decimal("4500"))
+
+        self.course.total_fees = Decimal("7000.00")
+        self.course.save()
+        self.assertEqual(self.ledger().balance, Decimal("5500"))
+
+        receipt.delete()
+        self.assertEqual(self.ledger().total_paid, Decimal("500"))
+        self.assertEqual(find_mismatches(), [])
+
+    def test_moving_a_receipt_updates_both_ledgers(self):
+        other = make_course(code="EMB-1")
+        Enrollment.objects.create(student=self.student, course=other)
+        receipt = make_receipt(self.student, self.course, amount="1500.00")
+
+        receipt = FeesReceipt.objects.get(pk=receipt.pk)
+        receipt.course = other
+        receipt.save()
+
+        self.assertEqual(self.ledger().total_paid, Decimal("0"))
+        self.assertEqual(FeeLedger.objects.get(course=other).total_paid, Decimal("1500"))
+
+
+class OutstandingFeesTests(TestCase):
+    def setUp(self):
+        from rest_framework.test import APIClient
+
+        admin = User.objects.create_user(username="admin", password="x", is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+        course = make_course(total_fees="6000.00")
+        for i, paid in enumerate(["1000.00", "2000.00", "3000.00", "6000.00"]):
+            make_receipt(make_student(username=f"s{i}", first_name=f"S{i}"), course, amount=paid)
+
+    def test_pages_follow_the_cursor(self):
+        resp = self.client.get("/api/v1/finance/fees/outstanding/", {"page_size": 2, "min_balance": "3500"})
+        self.assertEqual([r["balance"] for r in resp.data["results"]], ["5000.00", "4000.00"])
+        self.assertIsNone(resp.data["next"])
+
+        resp = self.client.get("/api/v1/finance/fees/outstanding/", {"page_size": 2, "ordering": "student_name"})
+        self.assertEqual([r["student_name"] for r in resp.data["results"]], ["S0 K", "S1 K"])
+        resp = self.client.get(resp.data["next"])
+        self.assertEqual([r["student_name"] for r in resp.data["results"]], ["S2 K"])
+
+    def test_pages_through_equal_balances_and_names(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        course = make_course(code="EMB-1", total_fees="6000.00")
+        for i in range(5):
+            make_receipt(make_student(username=f"t{i}", first_name="T"), course, amount="1000.00")
+
+        for ordering in ("-balance", "balance", "student_name", "-student_name"):
+            seen, url = [], "/api/v1/finance/fees/outstanding/"
+            params = {"page_size": 2, "ordering": ordering}
+            while url:
+                with CaptureQueriesContext(connection) as ctx:
+                    resp = self.client.get(url, params)
+                page_query = next(q["sql"] for q in ctx.captured_queries if "LIMIT" in q["sql"])
+                # Ties keep their order from page to page only with the key in the ORDER BY
+                self.assertIn('"enrollment_id"', page_query.split("ORDER BY")[-1])
+                seen += [(r["student_id"], r["course_title"]) for r in resp.data["results"]]
+                url, params = resp.data["next"], None
+            self.assertEqual(len(seen), 8, ordering)
+            self.assertEqual(len(set(seen)), 8, ordering)
+
+    def test_csv_streams_every_row(self):
+        resp = self.client.get("/api/v1/finance/fees/outstanding/", {"format": "csv"})
+        self.assertEqual(resp["Content-Type"], "text/csv")
+        lines = b"".join(resp.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[0].startswith("student_id,student_name"))
+
+
+class FinanceRollupTests(TestCase):
+    def test_rollups_follow_writes_and_back_the_report(self):
+        student, course = make_student(), make_course()
+        receipt = make_receipt(student, course, amount="1500.00", date=date(2025, 6, 1))
+        make_receipt(student, course, amount="500.00", date=date(2025, 7, 3), mode=FeesReceipt.PaymentMode.UPI)
+        Expense.objects.create(category=Expense.Category.RENT, title="June rent", amount=Decimal("800.00"), date=date(2025, 6, 5))
+
+        receipt = FeesReceipt.objects.get(pk=receipt.pk)
+        receipt.date = date(2025, 7, 1)
+        receipt.save()
+        self.assertFalse(DailyRevenue.objects.filter(date=date(2025, 6, 1)).exists())
+
+        report = period_report(date(2025, 6, 1), date(2025, 7, 31), "month")
+        self.assertEqual(report["totals"], {"revenue": Decimal("2000"), "expense": Decimal("800"), "net": Decimal("1200")})
+        self.assertEqual(
+            [(p["period"], p["revenue"], p["expense"]) for p in report["periods"]],
+            [(date(2025, 6, 1), Decimal("0"), Decimal("800")), (date(2025, 7, 1), Decimal("2000"), Decimal("0"))],
+        )
+        self.assertEqual(len(report["revenue_by_mode"]), 2)
+
+
+class FinanceDashboardCacheTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from rest_framework.test import APIClient
+
+        cache.clear()
+        admin = User.objects.create_user(username="admin", password="x", is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+
+    def test_writes_mark_the_cached_payload_stale(self):
+        from unittest import mock
+
+        url = "/api/v1/finance/dashboard/summary/"
+        self.assertEqual(self.client.get(url)["X-Cache"], "MISS")
+        self.assertEqual(self.client.get(url)["X-Cache"], "HIT")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make_receipt(make_student(), make_course(), amount="1500.00")
+
+        with mock.patch("finance.dashboard._refresh_in_background") as refresh:
+            resp = self.client.get(url)
+        self.assertEqual(resp["X-Cache"], "STALE")
+        self.assertEqual(resp.data["summary"]["total_revenue"], 0)
+        refresh.assert_called_once()
+
+    def test_writes_from_another_process_mark_the_payload_stale(self):
+        from django.core.cache.backends.locmem import LocMemCache
+        from unittest import mock
+
+        url = "/api/v1/finance/dashboard/summary/"
+        self.assertEqual(self.client.get(url)["X-Cache"], "MISS")
+
+        # An import command or a second worker has a cache of its own
+        other_process = LocMemCache("other-process", {})
+        with mock.patch("finance.dashboard.cache", other_process), \
+                self.captureOnCommitCallbacks(execute=True):
+            make_receipt(make_student(), make_course(), amount="1500.00")
+
+        with mock.patch("finance.dashboard._refresh_in_background"):
+            self.assertEqual(self.client.get(url)["X-Cache"], "STALE")
+
+
+class FeeForecastTests(TestCase):
+    def test_balances_follow_course_payment_timing(self):
+        from django.core.cache import cache
+        from django.utils import timezone
+        from rest_framework.test import APIClient
+
+        cache.clear()
+        today = timezone.localdate()
+        course = make_course()
+        # A past student paid half on enrolling and half two weeks later
+        veteran = make_student("veteran", "Vera")
+        make_receipt(veteran, course, amount="3000.00", date=today - timedelta(days=70))
+        make_receipt(veteran, course, amount="3000.00", date=today - timedelta(days=56))
+        Enrollment.objects.filter(student=veteran).update(enrolled_on=today - timedelta(days=70))
+        Enrollment.objects.create(student=make_student(), course=course)
+
+        admin = User.objects.create_user(username="admin", password="x", is_staff=True)
+        client = APIClient()
+        client.force_authenticate(admin)
+        url = "/api/v1/finance/reports/forecast/?months=1"
+        resp = client.get(url)
+        self.assertEqual(resp["X-Cache"], "MISS")
+        weekly = [w["expected"] for w in resp.data["weeks"]]
+        self.assertEqual(weekly[:3], [3000, 0, 3000])
+        self.assertEqual(resp.data["expected_total"], 6000)
+
+        self.assertEqual(client.get(url)["X-Cache"], "HIT")
+        with self.captureOnCommitCallbacks(execute=True):
+            make_receipt(veteran, course, amount="10.00", date=today)
+        self.assertEqual(client.get(url)["X-Cache"], "MISS")
+
+class OverdueFeesTests(TestCase):
+    def test_reminds_students_behind_their_schedule_once(self):
+        from notifications.models import Notification
+
+        course = make_course(total_fees="6000.00")
+        CourseInstallment.objects.create(course=course, due_after_days=0, amount=Decimal("2000.00"))
+        CourseInstallment.objects.create(course=course, due_after_days=30, amount=Decimal("2000.00"))
+        behind, paid_up = make_student(), make_student(username="ravi", first_name="Ravi")
+        make_receipt(behind, course, amount="1000.00")
+        make_receipt(paid_up, course, amount="4000.00")
+
+        enrolled_on = behind.enrollments.get().enrolled_on
+        today = enrolled_on + timedelta(days=31)
+        self.assertEqual(send_overdue_reminders(today=today), (1, 1))
+        self.assertEqual(send_overdue_reminders(today=today), (1, 0))
+
+        notice = Notification.objects.get()
+        self.assertEqual(notice.recipient, behind.user)
+        self.assertIn("3000.00", notice.message)
+
+
+class ReconciliationTests(TestCase):
+    def test_matches_by_txn_id_then_amount_and_date(self):
+        import io
+
+        student, course = make_student(), make_course()
+        by_txn = make_receipt(student, course, amount="1500.00", mode="upi", txn_id="UPI123")
+        by_amount = make_receipt(student, course, amount="700.00", date=date(2025, 6, 3), mode="bank_transfer")
+        missing = make_receipt(student, course, amount="900.00", mode="upi", txn_id="UPI999")
+
+        statement = io.StringIO(
+            "date,amount,txn_id,description\n"
+            "01/06/2025,1500.00, upi123 ,fees\n"
+            "2025-06-01,700.00,,fees\n"
+            "2025-06-02,250.00,,unknown\n"
+            "2025-06-02,250.00,UPI123,repeat\n"
+            "not-a-date,1,,\n"
+        )
+        report = reconcile_statement(statement, window_days=3).as_dict()
+
+        self.assertEqual(
+            [(m["line"], m["receipt_id"], m["method"]) for m in report["matched"]],
+            [(2, by_txn.pk, "txn_id"), (3, by_amount.pk, "amount_date")],
+        )
+        self.assertEqual([l["line"] for l in report["unmatched_lines"]], [4])
+        self.assertEqual([r["receipt_id"] for r in report["unmatched_receipts"]], [missing.pk])
+        self.assertEqual([(d["kind"], d["line"]) for d in report["duplicates"]], [("statement_line", 5)])
+        self.assertEqual([e["line"] for e in report["errors"]], [6])
+
+
+class AccountingPeriodTests(TestCase):
+    def test_close_locks_freezes_and_rejects_writes(self):
+        from rest_framework.test import APIClient
+
+        student, course = make_student(), make_course()
+        make_receipt(student, course, amount="1500.00", date=date(2025, 6, 1))
+        make_receipt(student, course, amount="500.00", date=date(2025, 7, 1))
+        Expense.objects.create(category=Expense.Category.RENT, title="Rent", amount=Decimal("800.00"), date=date(2025, 6, 5))
+
+        period = close_period(date(2025, 6, 1), date(2025, 6, 30))
+        self.assertEqual(period.receipts_locked, 1)
+        # Closing takes a lock row; it does not use up a document number series
+        from documents.models import DocumentSequence
+        self.assertEqual(list(DocumentSequence.objects.values_list("name", flat=True)), ["REC"])
+        with self.assertRaises(ValueError):
+            close_period(date(2025, 6, 15), date(2025, 7, 15))
+
+        # The report reads June from the snapshot, so changing June's rollups changes nothing
+        DailyRevenue.objects.filter(date=date(2025, 6, 1)).update(total=Decimal("1"))
+        report = period_report(date(2025, 6, 1), date(2025, 7, 31))
+        self.assertEqual(report["totals"], {"revenue": Decimal("2000"), "expense": Decimal("800"), "net": Decimal("1200")})
+
+        admin = User.objects.create_user(username="admin", password="x", is_staff=True)
+        client = APIClient()
+        client.force_authenticate(admin)
+        resp = client.post("/api/v1/finance/expenses/", {
+            "category": "rent", "title": "Late rent", "amount": "100.00", "date": "2025-06-20",
+        })
+        self.assertEqual(resp.status_code, 400)
+
+
+
+class NativeReceiptPDFTests(TestCase):
+    def test_native_engine_draws_receipt(self):
+        from io import BytesIO
+        from pypdf import PdfReader
+        from .receipt_pdf import render_receipt
+        from .utils import INSTITUTE_CONTEXT
+
+        receipt = make_receipt(make_student(), make_course(), mode=FeesReceipt.PaymentMode.UPI, txn_id="abc123")
+        page_text = PdfReader(BytesIO(render_receipt(receipt, INSTITUTE_CONTEXT))).pages[0].extract_text()
+        for text in (receipt.receipt_no, "Asha K", "June 01, 2025", "Rs. 1500.00", "(#Abc123)"):
+            self.assertIn(text, page_text)
+
+    def test_fallback_scope(self):
+        from unittest import mock
+        from .receipt_pdf import Unsupported, UnsupportedText, render_receipt
+        from .utils import INSTITUTE_CONTEXT, generate_receipt_pdf
+
+        receipt = make_receipt(make_student(), make_course())
+        # Accented Latin names are drawn natively
+        receipt.student.user.first_name = "José Ñúñez"
+        self.assertTrue(render_receipt(receipt, INSTITUTE_CONTEXT).startswith(b"%PDF"))
+
+        # Scripts outside Windows-1252 and an edited template are left to WeasyPrint
+        for name in ("ആശ", "عائشة"):
+            receipt.student.user.first_name = name
+            with self.assertRaises(UnsupportedText):
+                render_receipt(receipt, INSTITUTE_CONTEXT)
+        receipt.student.user.first_name = "Asha"
+        with mock.patch("finance.pdf_cache.template_version", return_value="edited"):
+            with self.assertRaises(Unsupported):
+                render_receipt(receipt, INSTITUTE_CONTEXT)
+
+        receipt.student.user.first_name = "ആശ"
+        with mock.patch("finance.utils._generate_weasyprint_pdf", return_value=b"%PDF-weasy") as weasyprint, \
+                self.assertLogs("finance.utils", "INFO") as logs:
+            self.assertEqual(generate_receipt_pdf(receipt, engine="native"), b"%PDF-weasy")
+        weasyprint.assert_called_once_with(receipt)
+        self.assertIn("Windows-1252", logs.output[0])
+
+
+class ReceiptExportTests(TestCase):
+    def setUp(self):
+        from rest_framework.test import APIClient
+        from unittest import mock
+
+        class InlinePool:
+            """Renders in the test process, which is the only one that sees the test database."""
+            def apply_async(self, func, args):
+                result = func(*args)
+                return mock.Mock(get=lambda: result)
+
+        patcher = mock.patch("finance.exports.shared_render_pool", return_value=InlinePool())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        overrides = override_settings(RECEIPT_PDF_ENGINE="native", RECEIPT_PDF_CACHE_DIR=self.tmp.name)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        student, course = make_student(), make_course()
+        self.receipts = [make_receipt(student, course, amount=amount) for amount in ("1000.00", "500.00")]
+        admin = User.objects.create_user(username="admin", password="x", is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+
+    def test_zip_and_merged_pdf_outputs(self):
+        from io import BytesIO
+        from pypdf import PdfReader
+        import zipfile
+
+        resp = self.client.get("/api/v1/finance/receipts/export/")
+        self.assertEqual(resp.status_code, 200)
+        archive = zipfile.ZipFile(BytesIO(b"".join(resp.streaming_content)))
+        self.assertEqual(len(archive.namelist()), 2)
+        self.assertTrue(all(archive.read(name).startswith(b"%PDF") for name in archive.namelist()))
+
+        resp = self.client.get("/api/v1/finance/receipts/export/?output=pdf")
+        self.assertEqual(resp["Content-Type"], "application/pdf")
+        self.assertEqual(len(PdfReader(BytesIO(resp.content)).pages), 2)
+
+    def test_merged_pdf_over_the_limit_is_refused(self):
+        with override_settings(RECEIPT_EXPORT_MERGE_LIMIT=1):
+            resp = self.client.get("/api/v1/finance/receipts/export/?output=pdf")
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("output=zip", resp.data["message"])
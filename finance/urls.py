@@ -1,15 +1,19 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import FeesReceiptViewSet, ExpenseViewSet
-from .views_analytics import FinanceDashboardView
+from .views_analytics import FinanceDashboardView, FinanceReportView, FeeForecastView
 from .views_outstanding import OutstandingFeesViewSet
+from .views_periods import AccountingPeriodViewSet
 
 router = DefaultRouter()
 router.register(r"receipts", FeesReceiptViewSet, basename="receipt")
 router.register(r"expenses", ExpenseViewSet, basename="expense")
+router.register(r"periods", AccountingPeriodViewSet, basename="accounting-period")
 
 urlpatterns = [
     path("", include(router.urls)),
     path("dashboard/summary/", FinanceDashboardView.as_view(), name="finance-dashboard"),
+    path("reports/period/", FinanceReportView.as_view(), name="finance-period-report"),
+    path("reports/forecast/", FeeForecastView.as_view(), name="finance-fee-forecast"),
     path("fees/outstanding/", OutstandingFeesViewSet.as_view({'get': 'list'}), name="outstanding-fees"),
 ]
\ No newline at end of file
@@ -1,31 +1,56 @@
 from django.template.loader import render_to_string
 from django.conf import settings
-import weasyprint
+from .pdf_cache import receipt_pdf_cache, RECEIPT_TEMPLATE
 import logging
 
 logger = logging.getLogger(__name__)
 
-def generate_receipt_pdf(receipt):
+# Static part of the receipt context; also hashed into the PDF cache key.
+INSTITUTE_CONTEXT = {
+    "institute_name": "Noor Stitching Institute",
+    "institute_address": "Madrassa Building, Kacheriparamba, PO Munderi, Kannur, Kerala - 670591",
+    "institute_phone": "+91 9526978708",
+    "currency_symbol": "Rs.",
+}
+
+def receipt_pdf_engine():
+    return getattr(settings, "RECEIPT_PDF_ENGINE", "weasyprint")
+
+
+def generate_receipt_pdf(receipt, engine=None):
     """
-    Generates a PDF for the given receipt object using WeasyPrint.
-    Returns the raw PDF bytes or None if generation fails.
+    Generates a PDF for the given receipt object with the configured engine.
+    The native engine hands over to WeasyPrint when it cannot reproduce the
+    receipt (see finance.receipt_pdf for the scope). Returns the raw PDF bytes or None if generation fails.
     """
     if not receipt:
         return None
 
+    if (engine or receipt_pdf_engine()) == "native":
+        from .receipt_pdf import Unsupported, render_receipt
+        try:
+            return render_receipt(receipt, INSTITUTE_CONTEXT)
+        except Unsupported as e:
+            logger.info("Receipt %s rendered with WeasyPrint: %s", receipt.receipt_no, e)
+        except Exception as e:
+            logger.error(f"Native PDF Error for Receipt {receipt.receipt_no}: {e}", exc_info=True)
+
+    return _generate_weasyprint_pdf(receipt)
+
+
+def _generate_weasyprint_pdf(receipt):
+    import weasyprint
+
     try:
         context = {
             "receipt": receipt,
             "student": receipt.student,
             "user": receipt.student.user,
             "course": receipt.course,
-            "institute_name": "Noor Stitching Institute",
-            "institute_address": "Madrassa Building, Kacheriparamba, PO Munderi, Kannur, Kerala - 670591",
-            "institute_phone": "+91 9526978708",
-            "currency_symbol": "Rs.", 
+            **INSTITUTE_CONTEXT,
         }
 
-        html_string = render_to_string("finance/receipt_template.html", context)
+        html_string = render_to_string(RECEIPT_TEMPLATE, context)
         
         # base_url is required to load local images/styles
         pdf_bytes = weasyprint.HTML(
@@ -37,4 +62,23 @@ def generate_receipt_pdf(receipt):
 
     except Exception as e:
         logger.error(f"PDF Generation Error for Receipt {receipt.receipt_no}: {e}", exc_info=True)
-        return None
\ No newline at end of file
+        return None
+
+
+def get_receipt_pdf(receipt):
+    """
+    Returns the receipt PDF, serving a cached render when the receipt,
+    student name, course title and template are unchanged.
+    """
+    if not receipt:
+        return None
+    # The engine is part of the key so switching engines re-renders
+    extra_context = {**INSTITUTE_CONTEXT, "engine": receipt_pdf_engine()}
+    return receipt_pdf_cache.get_or_render(receipt, generate_receipt_pdf, extra_context=extra_context)
+
+
+def render_receipt_job(receipt_id):
+    """Render entry point for the background worker."""
+    from .models import FeesReceipt
+    receipt = FeesReceipt.objects.select_related("student__user", "course").get(pk=receipt_id)
+    return get_receipt_pdf(receipt), f"Receipt_{receipt.receipt_no}.pdf"
@@ -1,28 +1,69 @@
-from rest_framework import viewsets, status
+from rest_framework import viewsets, status, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
-from .models import FeesReceipt, Expense
-from .serializers import FeesReceiptSerializer, ExpenseSerializer
+from rest_framework.parsers import MultiPartParser, FormParser
+from .models import FeesReceipt, Expense, FeeLedger
+from .serializers import FeesReceiptSerializer, ExpenseSerializer, FeeLedgerSerializer, validate_open_date
 from api.permissions import IsAdmin, IsStudent
-from django.http import HttpResponse
-from .utils import generate_receipt_pdf
+from django.http import HttpResponse, StreamingHttpResponse
+from django.conf import settings
+from django.utils import timezone
+from .utils import get_receipt_pdf
+from .exports import stream_receipts_zip, merge_receipts_pdf
+from .importers import import_receipts, import_expenses
+from .reconciliation import reconcile_statement
+from documents.jobs import wants_async_render, enqueue_render, accepted_response
+from documents.models import RenderJob
 from django.shortcuts import get_object_or_404
+import csv
+import io
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+def run_csv_import(request, importer):
+    """
+    Shared handler for the CSV import actions.
+    Expects a multipart `file`; `?dry_run=1` validates without saving.
+    """
+    upload = request.FILES.get("file")
+    if not upload:
+        return Response(
+            {"success": False, "message": "A CSV file is required in the 'file' field."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    dry_run = request.query_params.get("dry_run", "").lower() in ("1", "true", "yes")
+    # Large uploads live in a temp file; wrapping it keeps the parse streaming
+    stream = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+    try:
+        report = importer(stream, user=request.user, dry_run=dry_run)
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        return Response(
+            {"success": False, "message": f"Could not read CSV: {e}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    return Response({"success": True, **report.as_dict()})
+
 class FeesReceiptViewSet(viewsets.ModelViewSet):
     queryset = FeesReceipt.objects.select_related("student__user", "course").all()
     serializer_class = FeesReceiptSerializer
-    filterset_fields = ["student", "course", "date", "mode"]
+    filterset_fields = {
+        "student": ["exact"],
+        "course": ["exact"],
+        "date": ["exact", "gte", "lte"],
+        "mode": ["exact"],
+    }
     search_fields = ["receipt_no", "student__user__first_name", "student__reg_no"]
     ordering_fields = ["date", "amount"]
 
     def get_permissions(self):
         if self.action == 'download_public':
              return [AllowAny()]
-        if self.action in ['list', 'retrieve', 'download_pdf']:
+        if self.action in ['list', 'retrieve', 'download_pdf', 'balances']:
             return [(IsAdmin | IsStudent)()] 
         return [IsAdmin()]
 
@@ -37,11 +78,40 @@ class FeesReceiptViewSet(viewsets.ModelViewSet):
             return super().get_queryset().filter(student=user.student)
         return FeesReceipt.objects.none()
 
+    def perform_destroy(self, instance):
+        if instance.locked:
+            raise serializers.ValidationError("This receipt is locked and cannot be deleted.")
+        instance.delete()
+
+    @action(detail=False, methods=['get'])
+    def balances(self, request):
+        """
+        Fee position per enrollment from the fee ledger.
+        Students see their own courses; admins may filter with ?student=<id>.
+        """
+        ledgers = FeeLedger.objects.select_related("student__user", "course", "enrollment")
+        user = request.user
+        if user.is_staff:
+            student_id = request.query_params.get("student")
+            if student_id:
+                ledgers = ledgers.filter(student_id=student_id)
+        else:
+            ledgers = ledgers.filter(student=user.student)
+
+        page = self.paginate_queryset(ledgers)
+        if page is not None:
+            return self.get_paginated_response(FeeLedgerSerializer(page, many=True).data)
+        return Response(FeeLedgerSerializer(ledgers, many=True).data)
+
     @action(detail=True, methods=['get'], url_path='download')
     def download_pdf(self, request, pk=None):
         receipt = self.get_object()
+        if wants_async_render(request):
+            job = enqueue_render(RenderJob.Kind.RECEIPT, receipt.pk, request.user)
+            return accepted_response(request, job)
+
         try:
-            pdf_content = generate_receipt_pdf(receipt)
+            pdf_content = get_receipt_pdf(receipt)
             if not pdf_content:
                 raise ValueError("PDF Generation returned empty bytes")
         except Exception as e:
@@ -54,13 +124,101 @@ class FeesReceiptViewSet(viewsets.ModelViewSet):
         response = HttpResponse(pdf_content, content_type='application/pdf')
         response['Content-Disposition'] = f'attachment; filename="Receipt_{receipt.receipt_no}.pdf"'
         return response
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request):
+        """
+        Bulk download of every receipt matching the list filters
+        (student, course, date / date__gte / date__lte, mode).
+        `?output=zip` (default) streams a ZIP of individual PDFs;
+        `?output=pdf` returns one merged PDF, sent once every receipt
+        has rendered (at most RECEIPT_EXPORT_MERGE_LIMIT receipts).
+        """
+        output = request.query_params.get("output", "zip")
+        if output not in ("zip", "pdf"):
+            return Response(
+                {"success": False, "message": "output must be 'zip' or 'pdf'."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = self.filter_queryset(self.get_queryset())
+        receipt_ids = list(queryset.values_list("id", flat=True))
+        if not receipt_ids:
+            return Response(
+                {"success": False, "message": "No receipts match the given filters."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        stamp = timezone.localdate().strftime("%Y%m%d")
+        if output == "pdf":
+            if len(receipt_ids) > settings.RECEIPT_EXPORT_MERGE_LIMIT:
+                return Response(
+                    {"success": False, "message": (
+                        f"Merged PDF is limited to {settings.RECEIPT_EXPORT_MERGE_LIMIT} receipts; "
+                        f"use output=zip for {len(receipt_ids)} receipts."
+                    )},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            response = HttpResponse(merge_receipts_pdf(receipt_ids), content_type='application/pdf')
+            response['Content-Disposition'] = f'attachment; filename="Receipts_{stamp}.pdf"'
+        else:
+            response = StreamingHttpResponse(stream_receipts_zip(receipt_ids), content_type='application/zip')
+            response['Content-Disposition'] = f'attachment; filename="Receipts_{stamp}.zip"'
+        return response
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser, FormParser])
+    def import_csv(self, request):
+        """
+        Bulk import receipts from CSV.
+        Columns: reg_no, course_code, amount, date (YYYY-MM-DD), mode, txn_id, remarks.
+        """
+        return run_csv_import(request, import_receipts)
         
+    @action(detail=False, methods=['post'], url_path='reconcile', parser_classes=[MultiPartParser, FormParser])
+    def reconcile(self, request):
+        """
+        Match a bank/UPI statement CSV against receipts.
+        Columns: date, amount, txn_id (optional), description (optional).
+        `?window_days=3` sets how far apart dates may be for an amount-only match.
+        """
+        upload = request.FILES.get("file")
+        if not upload:
+            return Response(
+                {"success": False, "message": "A CSV file is required in the 'file' field."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            window_days = int(request.query_params.get("window_days", 3))
+            if not 0 <= window_days <= 31:
+                raise ValueError
+        except ValueError:
+            return Response(
+                {"success": False, "message": "window_days must be a whole number from 0 to 31."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        stream = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+        try:
+            report = reconcile_statement(stream, window_days=window_days)
+        except (ValueError, UnicodeDecodeError, csv.Error) as e:
+            return Response(
+                {"success": False, "message": f"Could not read CSV: {e}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response({"success": True, **report.as_dict()})
+
     @action(detail=False, methods=['get'], url_path='public/(?P<public_id>[^/.]+)')
     def download_public(self, request, public_id=None):
-        receipt = get_object_or_404(FeesReceipt, public_id=public_id)
-        
+        receipt = get_object_or_404(
+            FeesReceipt.objects.select_related("student__user", "course"), public_id=public_id
+        )
+        if wants_async_render(request):
+            job = enqueue_render(RenderJob.Kind.RECEIPT, receipt.pk, request.user)
+            return accepted_response(request, job)
+
         try:
-            pdf_content = generate_receipt_pdf(receipt)
+            pdf_content = get_receipt_pdf(receipt)
             if not pdf_content:
                  raise ValueError("PDF Generation returned empty bytes")
         except Exception as e:
@@ -81,4 +239,16 @@ class ExpenseViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAdmin]
     filterset_fields = ["category", "date"]
     search_fields = ["title", "description"]
-    ordering_fields = ["date", "amount"]
\ No newline at end of file
+    ordering_fields = ["date", "amount"]
+
+    def perform_destroy(self, instance):
+        validate_open_date(instance.date)
+        instance.delete()
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser, FormParser])
+    def import_csv(self, request):
+        """
+        Bulk import expenses from CSV.
+        Columns: category, title, amount, date (YYYY-MM-DD), description.
+        """
+        return run_csv_import(request, import_expenses)
@@ -2,79 +2,80 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from api.permissions import IsAdmin
-from .models import FeesReceipt, Expense
-from django.db.models import Sum, Count
-from django.db.models.functions import TruncMonth
+from rest_framework import status
+from .dashboard import get_dashboard, recompute_count
+from .forecast import MAX_MONTHS, get_forecast
+from .rollups import GRANULARITIES, period_report
 from django.utils import timezone
+from datetime import date
 
 class FinanceDashboardView(APIView):
+    """
+    Summary cards, six-month chart and recent transactions. Served from the
+    cache (see finance.dashboard); X-Cache says HIT, STALE or MISS.
+    """
     permission_classes = [IsAdmin]
 
     def get(self, request):
-        now = timezone.now()
-        current_month = now.month
-        current_year = now.year
+        payload, cache_status = get_dashboard()
+        response = Response(payload)
+        response["X-Cache"] = cache_status
+        response["X-Cache-Recomputes"] = str(recompute_count())
+        return response
 
-        # 1. Summary Cards
-        total_revenue = FeesReceipt.objects.aggregate(Sum('amount'))['amount__sum'] or 0
-        total_expense = Expense.objects.aggregate(Sum('amount'))['amount__sum'] or 0
-        
-        month_revenue = FeesReceipt.objects.filter(
-            date__month=current_month, date__year=current_year
-        ).aggregate(Sum('amount'))['amount__sum'] or 0
-        
-        month_expense = Expense.objects.filter(
-            date__month=current_month, date__year=current_year
-        ).aggregate(Sum('amount'))['amount__sum'] or 0
 
-        # 2. Revenue Chart Data (Last 6 months)
-        # This logic is simplified; for robust charting, you might want a specific helper
-        revenue_by_month = (
-            FeesReceipt.objects.annotate(month=TruncMonth('date'))
-            .values('month')
-            .annotate(total=Sum('amount'))
-            .order_by('-month')[:6]
-        )
-        
-        chart_data = []
-        for entry in revenue_by_month:
-            chart_data.append({
-                "month": entry['month'].strftime("%b %Y"),
-                "revenue": entry['total']
-            })
-        chart_data.reverse()
+class FinanceReportView(APIView):
+    """
+    Revenue/expense report for an arbitrary date range, bucketed by day,
+    week, month or year. Served entirely from the daily rollup tables.
+    """
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        today = timezone.localdate()
+        granularity = request.query_params.get("granularity", "month")
+        if granularity not in GRANULARITIES:
+            return Response(
+                {"success": False, "message": f"granularity must be one of: {', '.join(GRANULARITIES)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            start = date.fromisoformat(request.query_params.get("start") or today.replace(month=1, day=1).isoformat())
+            end = date.fromisoformat(request.query_params.get("end") or today.isoformat())
+        except ValueError:
+            return Response(
+                {"success": False, "message": "start and end must be dates in YYYY-MM-DD format."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if start > end:
+            return Response(
+                {"success": False, "message": "start must not be after end."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(period_report(start, end, granularity))
 
-        # 3. Recent Transactions
-        recent_receipts = FeesReceipt.objects.select_related('student__user').order_by('-created_at')[:5]
-        recent_expenses = Expense.objects.order_by('-created_at')[:5]
-        
-        transactions = []
-        for r in recent_receipts:
-            transactions.append({
-                "type": "credit",
-                "description": f"Fees: {r.student.user.get_full_name()}",
-                "amount": r.amount,
-                "date": r.date
-            })
-        for e in recent_expenses:
-            transactions.append({
-                "type": "debit",
-                "description": f"Exp: {e.title}",
-                "amount": e.amount,
-                "date": e.date
-            })
-        
-        # Sort combined list by date desc
-        transactions.sort(key=lambda x: x['date'], reverse=True)
 
-        return Response({
-            "summary": {
-                "total_revenue": total_revenue,
-                "total_expense": total_expense,
-                "net_income": total_revenue - total_expense,
-                "month_revenue": month_revenue,
-                "month_expense": month_expense
-            },
-            "chart_data": chart_data,
-            "recent_transactions": transactions[:10]
-        })
\ No newline at end of file
+class FeeForecastView(APIView):
+    """
+    Expected fee collections per week for the next `months` months, from
+    outstanding balances and each course's historic payment timing.
+    """
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        try:
+            months = int(request.query_params.get("months", 3))
+        except ValueError:
+            months = 0
+        if not 1 <= months <= MAX_MONTHS:
+            return Response(
+                {"success": False, "message": f"months must be a whole number from 1 to {MAX_MONTHS}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        payload, cache_status = get_forecast(months)
+        response = Response(payload)
+        response["X-Cache"] = cache_status
+        return response
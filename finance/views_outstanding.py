@@ -1,47 +1,131 @@
+from django.db.models import F, Value
+from django.db.models.functions import Concat
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django_filters import rest_framework as filters
 from rest_framework import viewsets
-from rest_framework.response import Response
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import CursorPagination
+from rest_framework.renderers import BaseRenderer, JSONRenderer
 from api.permissions import IsAdmin
-from courses.models import Enrollment
-from .models import FeesReceipt
-from django.db.models import Sum, OuterRef, Subquery, F, DecimalField
-from django.db.models.functions import Coalesce
+from .models import FeeLedger
+from .serializers import OutstandingFeeSerializer
+import csv
 
-class OutstandingFeesViewSet(viewsets.ViewSet):
+CSV_COLUMNS = [
+    ("student_id", "student_id"),
+    ("student_name", "student_name"),
+    ("reg_no", "student__reg_no"),
+    ("guardian_phone", "student__guardian_phone"),
+    ("student_phone", "student__user__phone"),
+    ("course_title", "course__title"),
+    ("total_fee", "total_fee"),
+    ("paid_amount", "total_paid"),
+    ("balance", "balance"),
+    ("last_payment_date", "last_payment_date"),
+]
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    Lets `?format=csv` through content negotiation. The CSV body itself is
+    streamed by the view; anything else (errors) is sent as JSON.
+    """
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = (renderer_context or {}).get("response")
+        if response is not None:
+            response["Content-Type"] = "application/json"
+        return JSONRenderer().render(data)
+
+
+class _Echo:
+    """File-like object whose write() returns the line for the generator."""
+    def write(self, value):
+        return value
+
+
+class OutstandingFeesPagination(CursorPagination):
+    """Keyset pagination: page N costs the same as page 1."""
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    ordering = ("-balance", "enrollment_id")
+
+
+class TiebreakOrderingFilter(OrderingFilter):
+    """
+    Appends the ledger key to every ordering. Many ledgers share a balance
+    (or a name), and the cursor only pages correctly through ties when
+    their order is fixed.
+    """
+    def get_ordering(self, request, queryset, view):
+        ordering = list(super().get_ordering(request, queryset, view) or [])
+        if not any(field.lstrip("-") in ("enrollment_id", "pk") for field in ordering):
+            ordering.append("enrollment_id")
+        return ordering
+
+
+class OutstandingFeesFilter(filters.FilterSet):
+    course = filters.NumberFilter(field_name="course_id")
+    min_balance = filters.NumberFilter(field_name="balance", lookup_expr="gte")
+
+    class Meta:
+        model = FeeLedger
+        fields = ["course", "min_balance"]
+
+
+class OutstandingFeesViewSet(viewsets.GenericViewSet):
     """
     Lists students who have paid less than the course total fee.
-    Optimized to avoid N+1 queries.
+    Reads the maintained FeeLedger, so this is an indexed scan on balance
+    rather than an aggregate over every receipt.
+
+    ?course=<id>&min_balance=<amount> filter, ?ordering=balance|-balance|
+    student_name|-student_name sorts, and ?format=csv streams every matching
+    row instead of a page.
     """
     permission_classes = [IsAdmin]
+    serializer_class = OutstandingFeeSerializer
+    pagination_class = OutstandingFeesPagination
+    renderer_classes = [JSONRenderer, CSVRenderer]
+    filter_backends = [filters.DjangoFilterBackend, TiebreakOrderingFilter]
+    filterset_class = OutstandingFeesFilter
+    ordering_fields = ["balance", "student_name"]
+    ordering = ["-balance", "enrollment_id"]
 
-    def list(self, request):
-        # Subquery to calculate total paid per student per course
-        paid_subquery = FeesReceipt.objects.filter(
-            student=OuterRef('student'),
-            course=OuterRef('course')
-        ).values('student', 'course').annotate(
-            total_paid=Sum('amount')
-        ).values('total_paid')
-
-        # Annotate enrollments with the paid amount
-        enrollments = Enrollment.objects.filter(status='active').select_related(
-            'student', 'course', 'student__user'
+    def get_queryset(self):
+        return FeeLedger.objects.filter(
+            enrollment__status='active', balance__gt=0
         ).annotate(
-            paid_amount=Coalesce(Subquery(paid_subquery), 0, output_field=DecimalField()),
-            balance=F('course__total_fees') - F('paid_amount')
-        ).filter(balance__gt=0)  # Filter efficiently at DB level
-
-        outstanding_list = []
-        for enrollment in enrollments:
-            outstanding_list.append({
-                "student_id": enrollment.student.id,
-                "student_name": enrollment.student.user.get_full_name(),
-                "reg_no": enrollment.student.reg_no,
-                "guardian_phone": enrollment.student.guardian_phone,
-                "student_phone": enrollment.student.user.phone,
-                "course_title": enrollment.course.title,
-                "total_fee": enrollment.course.total_fees,
-                "paid_amount": enrollment.paid_amount,
-                "balance": enrollment.balance
-            })
-
-        return Response(outstanding_list)
\ No newline at end of file
+            student_name=Concat(F("student__user__first_name"), Value(" "), F("student__user__last_name"))
+        )
+
+    def list(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+
+        if request.accepted_renderer.format == "csv":
+            return self.stream_csv(queryset)
+
+        page = self.paginate_queryset(queryset.select_related('student__user', 'course'))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    def stream_csv(self, queryset):
+        # values() + iterator() reads from a server-side cursor in fixed-size
+        # chunks, so memory stays flat however many rows match
+        rows = queryset.values_list(*(field for _, field in CSV_COLUMNS)).iterator(chunk_size=2000)
+        writer = csv.writer(_Echo())
+
+        def generate():
+            yield writer.writerow([name for name, _ in CSV_COLUMNS])
+            for row in rows:
+                yield writer.writerow(row)
+
+        filename = f"outstanding_fees_{timezone.localdate():%Y%m%d}.csv"
+        response = StreamingHttpResponse(generate(), content_type="text/csv")
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
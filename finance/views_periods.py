@@ -0,0 +1,31 @@
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from api.permissions import IsAdmin
+from .models import AccountingPeriod
+from .periods import close_period
+from .serializers import AccountingPeriodSerializer
+from .dashboard import invalidate_dashboard
+
+
+class AccountingPeriodViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Closed accounting periods and their frozen totals.
+    POST close/ with start, end (YYYY-MM-DD) and optional notes closes a new one.
+    """
+    queryset = AccountingPeriod.objects.select_related("closed_by").prefetch_related("totals__course")
+    serializer_class = AccountingPeriodSerializer
+    permission_classes = [IsAdmin]
+
+    @action(detail=False, methods=['post'])
+    def close(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        try:
+            period = close_period(data["start"], data["end"], user=request.user, notes=data.get("notes", ""))
+        except ValueError as e:
+            return Response({"success": False, "message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        invalidate_dashboard()
+        return Response(self.get_serializer(period).data, status=status.HTTP_201_CREATED)
@@ -10,6 +10,7 @@ class Student(models.Model):
     admission_date = models.DateField(default=timezone.localdate)
     address = models.TextField(blank=True)
     photo = models.ImageField(upload_to="students/photos/", blank=True, null=True)
+    photo_renditions = models.JSONField(default=dict, blank=True, editable=False)
     active = models.BooleanField(default=True)
 
     class Meta:
@@ -1,18 +1,28 @@
 from django.db import transaction
 from rest_framework import serializers
 from .models import Student
+from documents.images import rendition_url
 from accounts.serializers import UserSerializer, StudentUserCreateSerializer
 from django.utils import timezone
 
-class StudentSerializer(serializers.ModelSerializer):
+class PhotoThumbnailMixin:
+    """Small WebP rendition of the photo (the original until it is processed)."""
+    def get_thumbnail(self, obj):
+        url = rendition_url(obj, "photo", "photo_renditions")
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if url and request else url
+
+
+class StudentSerializer(PhotoThumbnailMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     user_payload = StudentUserCreateSerializer(write_only=True, required=False)
+    thumbnail = serializers.SerializerMethodField()
 
     class Meta:
         model = Student
         fields = [
             "id", "user", "user_payload", "reg_no", "guardian_name",
-            "guardian_phone", "admission_date", "address", "photo", "active",
+            "guardian_phone", "admission_date", "address", "photo", "thumbnail", "active",
         ]
         read_only_fields = ["id", "reg_no"]
 
@@ -45,7 +55,9 @@ class StudentSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
-class StudentSelfUpdateSerializer(serializers.ModelSerializer):
+class StudentSelfUpdateSerializer(PhotoThumbnailMixin, serializers.ModelSerializer):
+    thumbnail = serializers.SerializerMethodField()
+
     class Meta:
         model = Student
-        fields = ["photo"]
\ No newline at end of file
+        fields = ["photo", "thumbnail"]
\ No newline at end of file